@@ -0,0 +1,145 @@
+import asyncio
+import time
+
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import orjson
+from httpx import AsyncClient, Response
+
+from .rateLimiter import RateLimiter, accountKey
+from .util import get_headers
+
+LOCKED = b"this account is temporarily locked"
+
+
+class Account:
+    def __init__(self, session: AsyncClient, name: str = None):
+        self.session = session
+        self.name = name or str(accountKey(session))
+        self.pending = 0
+        self.locked_until = 0.0
+
+    @property
+    def locked(self) -> bool:
+        return time.time() < self.locked_until
+
+    def __repr__(self):
+        return f"Account({self.name!r}, pending={self.pending}, locked={self.locked})"
+
+
+class AccountPool:
+    """Pool of authenticated sessions that scraper queries are spread across.
+
+    Each query is leased to the account with the most rate limit budget left for its
+    operation. Accounts that come back with "this account is temporarily locked"
+    are quarantined and skipped until the quarantine expires.
+
+    pool = AccountPool.fromCookies(["cookies/a.cookies", "cookies/b.cookies"])
+    scraper = AsyncScraper(accountPool=pool)
+    """
+
+    def __init__(
+        self,
+        sessions: list[AsyncClient] = None,
+        rateLimiter: RateLimiter = None,
+        quarantine: float = 15 * 60,
+    ):
+        """Initialize the account pool.
+
+        Args:
+            sessions (list[AsyncClient], optional): Authenticated sessions to start with. Defaults to None.
+            rateLimiter (RateLimiter, optional): Rate limiter holding the per account budgets. Defaults to a new one.
+            quarantine (float, optional): Seconds a locked account is left alone. Defaults to 15 minutes.
+        """
+        self.rateLimiter = rateLimiter or RateLimiter()
+        self.quarantine = quarantine
+        self.accounts = {}
+        for session in sessions or []:
+            self.add(session)
+
+    @classmethod
+    def fromCookies(
+        cls, paths: list[str] | str, proxies: dict = None, **kwargs
+    ) -> "AccountPool":
+        """Build a pool from cookie files written by `save_cookies`.
+
+        Args:
+            paths (list[str] | str): Cookie files, or a directory of `*.cookies` files.
+            proxies (dict, optional): transport/proxy arguments for every session. Defaults to None.
+            **kwargs: Passed to AccountPool.
+        """
+        if isinstance(paths, str | Path) and Path(paths).is_dir():
+            paths = sorted(Path(paths).glob("*.cookies"))
+        elif isinstance(paths, str | Path):
+            paths = [paths]
+
+        pool = cls(**kwargs)
+        for path in paths:
+            session = AsyncClient(
+                cookies=orjson.loads(Path(path).read_bytes()),
+                follow_redirects=True,
+                http2=True,
+                verify=False,
+                timeout=30,
+                **(proxies or {}),
+            )
+            session._init_with_cookies = True
+            session.headers.update(get_headers(session))
+            pool.add(session, name=Path(path).stem)
+        return pool
+
+    def __len__(self):
+        return len(self.accounts)
+
+    def add(self, session: AsyncClient, name: str = None) -> Account:
+        account = Account(session, name)
+        self.accounts[accountKey(session)] = account
+        return account
+
+    def get(self, session: AsyncClient) -> Account | None:
+        """Find the pool account a session (or a client built from it) belongs to."""
+        return self.accounts.get(accountKey(session))
+
+    def pick(self, operation: str, exclude: Account = None) -> Account | None:
+        """Account with the most remaining budget for `operation`, None if all are locked."""
+        best, best_score = None, None
+        for account in self.accounts.values():
+            if account.locked or account is exclude:
+                continue
+            score = (
+                self.rateLimiter.remaining(account.session, operation) - account.pending
+            )
+            if best is None or score > best_score:
+                best, best_score = account, score
+        return best
+
+    @asynccontextmanager
+    async def lease(self, operation: str, exclude: Account = None):
+        """Hold the best account for `operation`, waiting out quarantines if needed."""
+        while not (account := self.pick(operation, exclude)):
+            if not self.accounts:
+                raise Exception("AccountPool is empty")
+            wake = min(a.locked_until for a in self.accounts.values())
+            await asyncio.sleep(max(wake - time.time(), 1))
+
+        account.pending += 1
+        try:
+            yield account
+        finally:
+            account.pending -= 1
+
+    def isLocked(self, r: Response) -> bool:
+        return LOCKED in r.content
+
+    def report(self, session: AsyncClient, r: Response) -> bool:
+        """Check a response for a locked account and quarantine it, returns True if locked."""
+        if not self.isLocked(r):
+            return False
+        if account := self.get(session):
+            account.locked_until = time.time() + self.quarantine
+        return True
+
+    async def aclose(self):
+        for account in self.accounts.values():
+            await account.session.aclose()
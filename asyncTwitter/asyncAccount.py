@@ -7,6 +7,7 @@ import math
 
 from logging import Logger
 from copy import deepcopy
+from functools import partial
 from tqdm import tqdm
 from datetime import datetime
 from httpx import AsyncClient, Response
@@ -23,13 +24,13 @@ from .constants import (
 )
 from .util import (
     get_headers,
+    loads,
     log,
     urlencode,
     find_key,
     RED,
     RESET,
     Path,
-    get_cursor,
     GREEN,
 )
 from colorama import Fore
@@ -42,6 +43,14 @@ except Exception:
     from ..asyncTwitter.twoCaptcha import TwoCaptcha
 
 from .asyncLogin import asyncLogin
+from .pageParser import PageParser
+from .proxyPool import ProxyPool
+from .singleFlight import SingleFlight
+from .concurrency import AdaptiveConcurrency
+from .rateLimiter import RateLimiter, accountKey
+from .entityStore import EntityStore
+from .responseCache import ResponseCache
+from .retry import RetryPolicy
 from httpx_socks import AsyncProxyTransport
 from urllib import parse
 
@@ -79,6 +88,16 @@ class AsyncAccount:
             twoCaptchaAPIKey is used to solve captchas for unlocking the account.
 
             **kwargs: Additional arguments to pass to the logger.
+
+        Keyword Args:
+            rateLimiter (RateLimiter, optional): Rate limiter to share between clients. Defaults to a new one.
+            fastJson (bool, optional): Parse responses with orjson straight from the raw bytes. Defaults to False.
+            cache (ResponseCache, optional): Serve repeated GraphQL reads from an on-disk cache. Defaults to None.
+            store (EntityStore, optional): Deduplicate users and tweets across results. Defaults to None.
+            adaptive (AdaptiveConcurrency, optional): Tune GraphQL concurrency from latency and 429/5xx/timeout feedback. Defaults to None.
+            proxyPool (ProxyPool, optional): Route GraphQL requests through the healthiest of many proxies, the caller closes it with `await pool.aclose()`. Defaults to None.
+            retry (RetryPolicy, optional): Retry/backoff policy for GraphQL and v1 requests, POSTs are only retried when they were never sent or got a 429. Defaults to RetryPolicy().
+            singleFlight (SingleFlight, optional): Send concurrent identical GET queries once and share the response. Defaults to None.
         """
         self.save = save
         self.debug = debug
@@ -89,6 +108,14 @@ class AsyncAccount:
         self.capi = "https://caps.twitter.com/v2"
         self.logger = self._init_logger()
         self.rate_limits = {}
+        self.fastJson = kwargs.get("fastJson", False)
+        self.cache: ResponseCache = kwargs.get("cache")
+        self.store: EntityStore = kwargs.get("store")
+        self.adaptive: AdaptiveConcurrency = kwargs.get("adaptive")
+        self.proxyPool: ProxyPool = kwargs.get("proxyPool")
+        self.retry: RetryPolicy = kwargs.get("retry") or RetryPolicy()
+        self.singleFlight: SingleFlight = kwargs.get("singleFlight")
+        self.rateLimiter = kwargs.get("rateLimiter") or RateLimiter()
         self.twoCaptcha = TwoCaptcha(main=self, apiKey=twoCaptchaApiKey)
         self.proxyString = proxies
 
@@ -422,29 +449,80 @@ class AsyncAccount:
             data = {"json": params}
         else:
             data = {"params": {k: orjson.dumps(v).decode() for k, v in params.items()}}
-        gqlResponse = await self.session.request(
+        # only reads are cached, POSTs are mutations
+        cached = method == "GET" and self.cache and self.cache.cacheable(op)
+        if cached:
+            key = self.cache.key(qid, op, params["variables"])
+            if gqlResponse := self.cache.get(key):
+                return self._ingest(loads(gqlResponse, self.fastJson))
+
+        async def fetch() -> Response:
+            gqlResponse = await self.retry.run(
+                lambda: self._gqlRequest(method, qid, op, data),
+                idempotent=method == "GET",
+                logger=self.logger,
+                name=op,
+            )
+            if cached:
+                self.cache.set(key, op, gqlResponse)
+            return gqlResponse
+
+        # POSTs are mutations, two identical ones are two actions
+        if method == "GET" and self.singleFlight:
+            gqlResponse = await self.singleFlight.do(
+                self.singleFlight.key(qid, params["variables"], features), fetch
+            )
+        else:
+            gqlResponse = await fetch()
+        if self.debug:
+            log(self.logger, gqlResponse)
+        return self._ingest(loads(gqlResponse, self.fastJson))
+
+    def _ingest(self, data: dict) -> dict:
+        return self.store.ingest(data) if self.store else data
+
+    async def _gqlRequest(self, method: str, qid: str, op: str, data: dict) -> Response:
+        await self.rateLimiter.acquire(self.session, op)
+        kwargs = dict(
             method=method,
             url=f"{self.gql_api}/{qid}/{op}",
             # url="https://fuck.com",
             headers=get_headers(self.session),
             **data,
         )
-        self.rate_limits[op] = {
-            k: int(v) for k, v in gqlResponse.headers.items() if "rate-limit" in k
-        }
-        if self.debug:
-            log(self.logger, gqlResponse)
-        return gqlResponse.json()
+        if self.proxyPool:
+            request = partial(
+                self.proxyPool.send, self.session, lambda c: c.request(**kwargs)
+            )
+        else:
+            request = partial(self.session.request, **kwargs)
+        try:
+            if self.adaptive:
+                async with self.adaptive.slot(accountKey(self.session)) as slot:
+                    gqlResponse = await request()
+                    slot.status = gqlResponse.status_code
+            else:
+                gqlResponse = await request()
+        except BaseException:
+            self.rateLimiter.release(self.session, op)
+            raise
+        self.rate_limits[op] = self.rateLimiter.update(self.session, op, gqlResponse)
+        return gqlResponse
 
     async def asyncV1(self, path: str, params: dict) -> dict:
         headers = get_headers(self.session)
         headers["content-type"] = "application/x-www-form-urlencoded"
-        v1Response = await self.session.post(
-            f"{self.v1_api}/{path}", headers=headers, data=urlencode(params)
+        v1Response = await self.retry.run(
+            lambda: self.session.post(
+                f"{self.v1_api}/{path}", headers=headers, data=urlencode(params)
+            ),
+            idempotent=False,
+            logger=self.logger,
+            name=path,
         )
         if self.debug:
             log(self.logger, v1Response)
-        return v1Response.json()
+        return loads(v1Response, self.fastJson)
 
     async def asyncCAPI(self, path:str, data:dict) -> dict:
         """Function for POSTing to the twitter capi
@@ -942,13 +1020,15 @@ class AsyncAccount:
     async def _async_paginate(
         self, method: str, operation: tuple, variables: dict, limit: int
     ) -> list[dict]:
+        parser = PageParser(operation[-1])
         initial_data = await self.asyncGQL(method, operation, variables)
         res = [initial_data]
-        ids = set(find_key(initial_data, "rest_id"))
+        page = parser.parse(initial_data)
+        ids = set(page.rest_ids)
         dups = 0
         DUP_LIMIT = 3
 
-        cursor = get_cursor(initial_data)
+        cursor = page.cursor_bottom
         while (dups < DUP_LIMIT) and cursor:
             prev_len = len(ids)
             if prev_len >= limit:
@@ -957,8 +1037,9 @@ class AsyncAccount:
             variables["cursor"] = cursor
             data = await self.asyncGQL(method, operation, variables)
 
-            cursor = get_cursor(data)
-            ids |= set(find_key(data, "rest_id"))
+            page = parser.parse(data)
+            cursor = page.cursor_bottom
+            ids |= set(page.rest_ids)
 
             if self.debug:
                 self.logger.debug(f"cursor: {cursor}\tunique results: {len(ids)}")
@@ -1,9 +1,10 @@
+import asyncio
 import sys
 
 from httpx import AsyncClient
 from secrets import choice
 from .constants import YELLOW, RED, BOLD, RESET, USER_AGENTS
-from .util import find_key
+from .util import async_get_code, find_key
 
 
 async def asyncUpdateToken(
@@ -178,8 +179,13 @@ async def asyncConfirmEmail(client: AsyncClient) -> AsyncClient:
 
 
 async def asyncSolveConfirmationChallenge(client: AsyncClient, **kwargs) -> AsyncClient:
-    if fn := kwargs.get("proton"):
-        confirmation_code = fn()
+    # the Proton Mail client the confirmation code is sent to, or like login.py a
+    # function returning the code
+    if proton := kwargs.get("proton"):
+        if callable(proton):
+            confirmation_code = await asyncio.to_thread(proton)
+        else:
+            confirmation_code = await async_get_code(proton)
         return await asyncUpdateToken(
             client,
             "flow_token",
@@ -228,7 +234,8 @@ async def asyncExecuteLoginFlow(client: AsyncClient, **kwargs) -> AsyncClient |
 
 
 async def asyncLogin(email: str, username: str, password: str, **kwargs) -> AsyncClient:
-    kwargs.pop("proton", None)
+    # not an AsyncClient argument, only the login flow needs it
+    proton = kwargs.pop("proton", None)
     
     print(f"[{YELLOW}warning{RESET}] Using Proxy: {kwargs.get('proxies')} Transport: {kwargs.get('transport')}")
     
@@ -258,7 +265,7 @@ async def asyncLogin(email: str, username: str, password: str, **kwargs) -> Asyn
         "password": password,
     }
 
-    client = await asyncExecuteLoginFlow(client, **kwargs)
+    client = await asyncExecuteLoginFlow(client, proton=proton, **kwargs)
     if not client or client.cookies.get("flow_errors") == "true":
         return False
     return client
@@ -1,4 +1,5 @@
 import asyncio
+import hashlib
 import logging.config
 import math
 import random
@@ -9,11 +10,28 @@ import aiofiles
 import orjson
 import websockets
 
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from logging import Logger
 from httpx import URL, AsyncClient, Limits, ReadTimeout, Response
 from httpx_socks import AsyncProxyTransport
 from tqdm.asyncio import tqdm_asyncio
+from .accountPool import AccountPool
+from .checkpoints import CheckpointStore
 from .asyncLogin import asyncLogin
+from .clientManager import ClientManager
+from .concurrency import AdaptiveConcurrency, Sample, TaskPool
+from .entityStore import EntityStore
+from .hedge import Hedger
+from .pageParser import PageParser
+from .proxyPool import Proxy, ProxyPool
+from .rateLimiter import RateLimiter, accountKey
+from .responseCache import ResponseCache
+from .retry import RetryPolicy
+from .seen import SeenStore, newest_tweet, unseen
+from .singleFlight import SingleFlight
+from .sinks import Sink
+from .writer import Writer
 from .constants import (
     Operation,
     SpaceState,
@@ -29,10 +47,10 @@ from .util import (
     build_params,
     find_key,
     flatten,
-    get_cursor,
     get_headers,
     get_json,
     init_session,
+    loads,
     log,
     save_json,
     set_qs,
@@ -40,11 +58,26 @@ from .util import (
 )
 from colorama import Fore
 
+# (operation, key, done) of the checkpointed queries the current _asyncrun ran
+_finished = ContextVar("finished", default=None)
+
+
+def _finish(name: str, key: str, done: bool = True):
+    if (finished := _finished.get()) is not None:
+        finished.append((name, key, done))
+
 
 class AsyncScraper:
     """Twitter scraper class for async operations.
 
     It performs actions like getting user data, tweets, followers, etc asynchronously.
+
+    Connections are pooled for the lifetime of the scraper, use it as an async context
+    manager or call `aclose()` when done.
+
+    async with AsyncScraper() as scraper:
+        await scraper.asyncAuthenticate(cookies="cookies.json")
+        await scraper.asyncFollowers([123])
     """
 
     def __init__(
@@ -69,6 +102,23 @@ class AsyncScraper:
 
         Keyword Args:
             max_connections (int, optional): Maximum connections. Defaults to 100.
+            max_keepalive_connections (int, optional): Idle connections kept alive. Defaults to 10.
+            keepalive_expiry (float, optional): Seconds to keep idle connections alive. Defaults to 5.0.
+            rateLimiter (RateLimiter, optional): Rate limiter to share between clients. Defaults to a new one.
+            accountPool (AccountPool, optional): Spread queries over many accounts instead of one session. Defaults to None.
+            fastJson (bool, optional): Parse responses with orjson straight from the raw bytes. Defaults to False.
+            cache (ResponseCache | bool, optional): Serve repeated GraphQL queries from an on-disk cache, True for one in `out`. Defaults to None.
+            store (EntityStore | bool, optional): Deduplicate users and tweets across results, True for a new one. Defaults to None.
+            sink (Sink | list[Sink], optional): Also hand every page to these sinks, e.g. ParquetSink. Defaults to None.
+            maxPendingWrites (int, optional): Disk writes queued on the writer thread before scraping waits for it. Defaults to 256.
+            concurrency (dict, optional): Max concurrent tasks per class, e.g. {"gql": 50, "media": 20, "chat": 10}. Defaults to those.
+            adaptive (AdaptiveConcurrency | bool, optional): Tune concurrency per account/proxy from latency and 429/5xx/timeout feedback, True for the defaults. Defaults to None.
+            retry (RetryPolicy, optional): Retry/backoff policy for GraphQL and media requests, shareable with AsyncSearch/AsyncAccount. Defaults to RetryPolicy().
+            hedge (Hedger | bool, optional): Race slow idempotent lookups (UserByScreenName, UsersByRestIds...) against a duplicate on another connection/account, True for the defaults. Defaults to None.
+            proxyPool (ProxyPool, optional): Route every GraphQL request through the healthiest of many proxies instead of `proxies`. Defaults to None.
+            checkpoints (CheckpointStore | bool, optional): Record the cursor of every paginated query so resume=True can continue it, True for one in `out`. Defaults to None.
+            seen (SeenStore | bool, optional): Newest entries seen per query for `aiterNew`, True for one persisted in `out`. Defaults to an in-memory one.
+            singleFlight (SingleFlight | bool, optional): Send concurrent identical queries once and share the response, shareable with AsyncSearch/AsyncAccount, True for a new one. Defaults to None.
         """
         self.makeFiles = makeFiles
         self.save = save
@@ -78,6 +128,44 @@ class AsyncScraper:
         self.guest = kwargs.pop("guest", False)
         self.logger = self._init_logger(**kwargs)
         self.max_connections = kwargs.get("max_connections", 100)
+        self.clients = ClientManager(
+            max_connections=self.max_connections,
+            max_keepalive_connections=kwargs.get("max_keepalive_connections", 10),
+            keepalive_expiry=kwargs.get("keepalive_expiry", 5.0),
+        )
+        self.accountPool: AccountPool = kwargs.get("accountPool")
+        self.rateLimiter = kwargs.get("rateLimiter") or (
+            self.accountPool.rateLimiter if self.accountPool else RateLimiter()
+        )
+        self.rate_limits = {}
+        self.fastJson = kwargs.get("fastJson", False)
+        self.cache: ResponseCache = kwargs.get("cache")
+        if self.cache is True:
+            self.cache = ResponseCache(self.out / "cache.sqlite")
+        self.store: EntityStore = kwargs.get("store")
+        if self.store is True:
+            self.store = EntityStore()
+        sink = kwargs.get("sink") or []
+        self.sinks: list[Sink] = sink if isinstance(sink, list) else [sink]
+        self.writer = Writer(kwargs.get("maxPendingWrites", 256), logger=self.logger)
+        self.tasks = TaskPool(kwargs.get("concurrency"))
+        self.retry: RetryPolicy = kwargs.get("retry") or RetryPolicy()
+        self.proxyPool: ProxyPool = kwargs.get("proxyPool")
+        self.singleFlight: SingleFlight = kwargs.get("singleFlight")
+        if self.singleFlight is True:
+            self.singleFlight = SingleFlight()
+        self.hedger: Hedger = kwargs.get("hedge")
+        if self.hedger is True:
+            self.hedger = Hedger()
+        self.adaptive: AdaptiveConcurrency = kwargs.get("adaptive")
+        if self.adaptive is True:
+            self.adaptive = AdaptiveConcurrency()
+        self.checkpoints: CheckpointStore = kwargs.get("checkpoints")
+        if self.checkpoints is True:
+            self.checkpoints = CheckpointStore(self.out / "checkpoints.sqlite")
+        self.seen: SeenStore = kwargs.get("seen") or SeenStore()
+        if self.seen is True:
+            self.seen = SeenStore(self.out / "seen.sqlite")
         self.proxyString = proxies
 
         if httpxSocks and proxies:
@@ -92,6 +180,55 @@ class AsyncScraper:
 
         # print(f'Logger: {self.logger}')
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def flush(self):
+        """Wait until every queued disk write is done."""
+        await self.writer.flush()
+
+    async def aclose(self):
+        """Close all pooled connections and flush pending writes and the sinks."""
+        await self.clients.aclose()
+        if self.proxyPool:
+            await self.proxyPool.aclose()
+        await self.writer.aclose()
+        for sink in self.sinks:
+            # off the event loop, closing waits for the sink's writes to hit disk
+            await asyncio.to_thread(sink.close)
+        if self.cache:
+            self.cache.close()
+        if self.checkpoints:
+            self.checkpoints.close()
+        self.seen.close()
+
+    @asynccontextmanager
+    async def _slot(self, key, proxy: Proxy = None):
+        """Adaptive concurrency slot for `key` behind `proxy`, set `.status` on it with the response status."""
+        if not self.adaptive:
+            yield Sample()
+            return
+        via = proxy.url if proxy else self.proxyString
+        async with self.adaptive.slot((key, via)) as slot:
+            yield slot
+
+    def _client(
+        self, name: str = "api", session: AsyncClient = None, **kwargs
+    ) -> AsyncClient:
+        """Get the pooled client for `session`, the authenticated session by default."""
+        session = session or self.session
+        if (client := self.clients.cached(name, session)) is not None:
+            return client
+        guest = self.guest and session is self.session
+        options = {
+            "headers": session.headers if guest else get_headers(session),
+            "cookies": session.cookies,
+        }
+        return self.clients.get(name, session, **(options | self.proxies | kwargs))
+
     async def asyncAuthenticate(
         self,
         email: str = None,
@@ -139,6 +276,8 @@ class AsyncScraper:
             self.proxies = {"transport": None, "proxy": proxies}
 
         kwargs.update(**self.proxies)
+        # session and proxies may change, drop connections tied to the old ones
+        await self.clients.aclose()
         # print(f'AsyncAcc Got: {email}, {username}, {password}, {session}, {self.cookies}, {self.proxies}')
 
         self.session = await self._async_validate_session(
@@ -304,9 +443,66 @@ class AsyncScraper:
         @param kwargs: optional keyword arguments
         @return: list of user data as dicts
         """
-        return await self._asyncrun(
-            Operation.UsersByRestIds, batch_ids(user_ids), **kwargs
-        )
+        if not self.store:
+            return await self._asyncrun(
+                Operation.UsersByRestIds, batch_ids(user_ids), **kwargs
+            )
+
+        # answer what we can from the store, only fetch the rest
+        known, missing = [], []
+        for user_id in user_ids:
+            if (user := self.store.user(user_id)) is not None:
+                known.append({"result": user})
+            else:
+                missing.append(user_id)
+        res = []
+        if missing:
+            res = await self._asyncrun(
+                Operation.UsersByRestIds, batch_ids(missing), **kwargs
+            ) or []
+        if known:
+            res.append({"data": {"users": known}})
+        return res
+
+    async def asyncHydrateUsers(
+        self, user_ids: list[int], charLimit: int = 4_500, **kwargs
+    ) -> tuple[dict, list]:
+        """
+        Resolve any number of user ids into user results with as few requests as possible.
+
+        Ids are deduplicated and answered from the entity store when there is one, the
+        rest are packed into maximal `UsersByRestIds` batches (split by `batch_ids` to
+        stay under the 431 header limit) that run concurrently on the "gql" pool, so
+        100k ids cost a few hundred requests instead of 100k `UserByRestId` queries.
+
+        users, missing = await scraper.asyncHydrateUsers(follower_ids)
+
+        @param user_ids: list of user ids
+        @param charLimit: max characters of ids per batch
+        @param kwargs: optional keyword arguments
+        @return: ({rest_id: user result}, ids that returned no user: suspended, deleted or failed)
+        """
+        ids = list(dict.fromkeys(map(str, user_ids)))
+        users = {}
+        if self.store:
+            for user_id in ids:
+                if (user := self.store.user(user_id)) is not None:
+                    users[user_id] = user
+        if fetch := [user_id for user_id in ids if user_id not in users]:
+            batches = [{"userIds": batch} for batch in batch_ids(fetch, charLimit)]
+            for data in await self._asyncrun(
+                Operation.UsersByRestIds, batches, **kwargs
+            ) or []:
+                for user in (data.get("data") or {}).get("users") or []:
+                    result = user.get("result") or {}
+                    if result.get("__typename") == "User" and result.get("rest_id"):
+                        users[result["rest_id"]] = result
+        missing = [user_id for user_id in ids if user_id not in users]
+        if missing:
+            self.logger.warning(
+                f"[UsersByRestIds] {len(missing)} of {len(ids)} users not found"
+            )
+        return users, missing
 
     async def asyncRecommendedUsers(
         self, user_ids: list[int] = None, **kwargs
@@ -358,6 +554,72 @@ class AsyncScraper:
         """
         return await self._asyncrun(Operation.UserByRestId, user_ids, **kwargs)
 
+    def aiterTweets(self, user_ids: list[int], **kwargs):
+        """
+        Stream tweets by user ids, page by page.
+
+        The entries of every page are yielded as soon as it is parsed, instead of
+        collecting the whole timeline in memory first like `asyncTweets`.
+
+        async for entries in scraper.aiterTweets([user_id], limit=1000):
+            ...
+
+        @param user_ids: list of user ids
+        @param kwargs: optional keyword arguments
+        @return: async iterator of the timeline entries of every page
+        """
+        return self._aiter(Operation.UserTweets, user_ids, **kwargs)
+
+    def aiterLikes(self, user_ids: list[int], **kwargs):
+        """
+        Stream likes by user ids, page by page.
+
+        @param user_ids: list of user ids
+        @param kwargs: optional keyword arguments
+        @return: async iterator of the timeline entries of every page
+        """
+        return self._aiter(Operation.Likes, user_ids, **kwargs)
+
+    def aiterFollowers(self, user_ids: list[int], **kwargs):
+        """
+        Stream followers by user ids, page by page.
+
+        @param user_ids: list of user ids
+        @param kwargs: optional keyword arguments
+        @return: async iterator of the timeline entries of every page
+        """
+        return self._aiter(Operation.Followers, user_ids, **kwargs)
+
+    def aiterFollowing(self, user_ids: list[int], **kwargs):
+        """
+        Stream following by user ids, page by page.
+
+        @param user_ids: list of user ids
+        @param kwargs: optional keyword arguments
+        @return: async iterator of the timeline entries of every page
+        """
+        return self._aiter(Operation.Following, user_ids, **kwargs)
+
+    def aiterFavoriters(self, tweet_ids: list[int], **kwargs):
+        """
+        Stream favoriters by tweet ids, page by page.
+
+        @param tweet_ids: list of tweet ids
+        @param kwargs: optional keyword arguments
+        @return: async iterator of the timeline entries of every page
+        """
+        return self._aiter(Operation.Favoriters, tweet_ids, **kwargs)
+
+    def aiterRetweeters(self, tweet_ids: list[int], **kwargs):
+        """
+        Stream retweeters by tweet ids, page by page.
+
+        @param tweet_ids: list of tweet ids
+        @param kwargs: optional keyword arguments
+        @return: async iterator of the timeline entries of every page
+        """
+        return self._aiter(Operation.Retweeters, tweet_ids, **kwargs)
+
     async def asyncDownloadMedia(
         self,
         ids: list[int],
@@ -376,7 +638,7 @@ class AsyncScraper:
         """
         out = Path("media")
         out.mkdir(parents=True, exist_ok=True)
-        tweets = self.asyncTweetsById(ids)
+        tweets = await self.asyncTweetsById(ids)
         urls = []
         for tweet in tweets:
             tweet_id = find_key(tweet, "id_str")[0]
@@ -402,24 +664,26 @@ class AsyncScraper:
                 [urls.append([url, video]) for video in hq_videos]
 
         async def process():
-            async with AsyncClient(
-                headers=self.session.headers,
-                cookies=self.session.cookies,
-                verify=False,
-                http2=True,
-                timeout=30,
-                **self.proxies,
-            ) as client:
-                tasks = (download(client, x, y) for x, y in urls)
-                if self.pbar:
-                    return await tqdm_asyncio.gather(*tasks, desc="Downloading media")
-                return await asyncio.gather(*tasks)
+            client = self._client("media")
+            return await self.tasks.map(
+                "media",
+                lambda x: download(client, *x),
+                urls,
+                desc=self.pbar and "Downloading media",
+            )
 
         async def download(client: AsyncClient, post_url: str, cdn_url: str) -> None:
             name = urlsplit(post_url).path.replace("/", "_")[1:]
             ext = urlsplit(cdn_url).path.split("/")[-1]
+            async def send() -> Response:
+                async with self._slot("media") as slot:
+                    # per request, the "media" client is shared with audio downloads
+                    r = await client.get(cdn_url, timeout=30)
+                    slot.status = r.status_code
+                return r
+
             try:
-                r = await client.get(cdn_url)
+                r = await self.retry.run(send, logger=self.logger, name="media")
                 if self.makeFiles:
                     # print('Making files!!')
                     async with aiofiles.open(out / f"{name}_{ext}", "wb") as fp:
@@ -443,8 +707,7 @@ class AsyncScraper:
 
         async def get_trends(client: AsyncClient, offset: str, url: str):
             try:
-                client.headers["x-twitter-utcoffset"] = offset
-                r = await client.get(url)
+                r = await client.get(url, headers={"x-twitter-utcoffset": offset})
                 trends = find_key(r.json(), "item")
                 return {t["content"]["trend"]["name"]: t for t in trends}
             except Exception as e:
@@ -481,23 +744,19 @@ class AsyncScraper:
                 "+1300",
                 "+1400",
             ]
-            async with AsyncClient(
-                headers=get_headers(self.session),
-                verify=False,
-                http2=True,
-                timeout=30,
-                **self.proxies,
-            ) as client:
-                tasks = (get_trends(client, o, url) for o in offsets)
-                if self.pbar:
-                    return await tqdm_asyncio.gather(*tasks, desc="Getting trends")
-                return await asyncio.gather(*tasks)
+            # trends never sent the account's cookies, only its headers
+            client = self._client("trends", cookies=None)
+            tasks = (get_trends(client, o, url) for o in offsets)
+            if self.pbar:
+                return await tqdm_asyncio.gather(*tasks, desc="Getting trends")
+            return await asyncio.gather(*tasks)
 
         # trends = asyncio.run(process())
         trends = await process()
         out = self.out / "raw" / "trends"
         out.mkdir(parents=True, exist_ok=True)
-        (out / f"{time.time_ns()}.json").write_text(
+        await self.writer.submit(
+            (out / f"{time.time_ns()}.json").write_text,
             orjson.dumps(
                 {
                     key: value
@@ -657,8 +916,9 @@ class AsyncScraper:
             info = await self._init_chat(c, key["chat_token"])
             chat = await self._get_chat(c, info["endpoint"], info["access_token"])
             if self.save:
-                (self.out / "raw" / f"chat_{key['rest_id']}.json").write_bytes(
-                    orjson.dumps(chat)
+                await self.writer.submit(
+                    (self.out / "raw" / f"chat_{key['rest_id']}.json").write_bytes,
+                    orjson.dumps(chat),
                 )
             return {
                 "space": key["rest_id"],
@@ -668,55 +928,36 @@ class AsyncScraper:
 
         async def process():
             (self.out / "raw").mkdir(parents=True, exist_ok=True)
-            limits = Limits(
-                max_connections=self.max_connections, max_keepalive_connections=10
+            c = self._client()
+            return await self.tasks.map(
+                "chat",
+                lambda key: get(c, key),
+                keys,
+                desc=self.pbar and "Downloading chat data",
             )
-            headers = self.session.headers if self.guest else get_headers(self.session)
-            cookies = self.session.cookies
-            async with AsyncClient(
-                limits=limits,
-                headers=headers,
-                cookies=cookies,
-                timeout=20,
-                verify=False,
-                **self.proxies,
-            ) as c:
-                tasks = (get(c, key) for key in keys)
-                if self.pbar:
-                    return await tqdm_asyncio.gather(
-                        *tasks, desc="Downloading chat data"
-                    )
-                return await asyncio.gather(*tasks)
 
         return await process()
         # return asyncio.run(process())
 
     async def _async_download_audio(self, data: list[dict]) -> None:
         async def get(s: AsyncClient, chunk: str, rest_id: str) -> tuple:
-            r = await s.get(chunk)
-            return rest_id, r
+            async def send() -> Response:
+                async with self._slot("media") as slot:
+                    r = await s.get(chunk)
+                    slot.status = r.status_code
+                return r
+
+            return rest_id, await self.retry.run(send, logger=self.logger, name="audio")
 
         async def process(data: list[dict]) -> list:
-            limits = Limits(
-                max_connections=self.max_connections, max_keepalive_connections=10
+            c = self._client("media")
+            chunks = [(chunk, d["rest_id"]) for d in data for chunk in d["chunks"]]
+            return await self.tasks.map(
+                "media",
+                lambda x: get(c, *x),
+                chunks,
+                desc=self.pbar and "Downloading audio",
             )
-            headers = self.session.headers if self.guest else get_headers(self.session)
-            cookies = self.session.cookies
-            async with AsyncClient(
-                limits=limits,
-                headers=headers,
-                cookies=cookies,
-                timeout=20,
-                **self.proxies,
-                verify=False,
-                http2=True,
-            ) as c:
-                tasks = []
-                for d in data:
-                    tasks.extend([get(c, chunk, d["rest_id"]) for chunk in d["chunks"]])
-                if self.pbar:
-                    return await tqdm_asyncio.gather(*tasks, desc="Downloading audio")
-                return await asyncio.gather(*tasks)
 
         # chunks = asyncio.run(process(data))
         chunks = await process(data)
@@ -731,8 +972,10 @@ class AsyncScraper:
         out.mkdir(parents=True, exist_ok=True)
         for space_id, chunks in streams.items():
             # 1hr ~= 50mb
-            with open(out / f"{space_id}.aac", "wb") as fp:
-                [fp.write(c.content) for c in chunks]
+            await self.writer.submit(
+                (out / f"{space_id}.aac").write_bytes,
+                b"".join(c.content for c in chunks),
+            )
 
     async def _async_check_streams(self, keys: list[dict]) -> list[dict]:
         async def get(c: AsyncClient, space: dict) -> dict:
@@ -741,21 +984,8 @@ class AsyncScraper:
             return {"space": space, "stream": stream}
 
         async def process():
-            limits = Limits(
-                max_connections=self.max_connections, max_keepalive_connections=10
-            )
-            headers = self.session.headers if self.guest else get_headers(self.session)
-            cookies = self.session.cookies
-            async with AsyncClient(
-                limits=limits,
-                headers=headers,
-                cookies=cookies,
-                timeout=20,
-                **self.proxies,
-                verify=False,
-                http2=True,
-            ) as c:
-                return await asyncio.gather(*(get(c, key) for key in keys))
+            c = self._client()
+            return await asyncio.gather(*(get(c, key) for key in keys))
 
         # return asyncio.run(process())
         return await process()
@@ -765,19 +995,42 @@ class AsyncScraper:
         operation: tuple[dict, str, str],
         queries: set | list[int | str | dict],
         **kwargs,
+    ):
+        finished = []
+        token = _finished.set(finished)
+        try:
+            results = await self._runQueries(operation, queries, **kwargs)
+        finally:
+            _finished.reset(token)
+        if results is not False and finished and all(done for *_, done in finished):
+            # the run got through, a later resume starts these queries from scratch
+            self.checkpoints.delete([(name, key) for name, key, _ in finished])
+        return results
+
+    async def _runQueries(
+        self,
+        operation: tuple[dict, str, str],
+        queries: set | list[int | str | dict],
+        **kwargs,
     ):
         keys, qid, name = operation
-        # stay within rate-limits
-        if (queriesLength := len(queries)) > 500:
+        # stay within rate-limits, bigger inputs are run in waves
+        if (queriesLength := len(queries)) > (chunkSize := self._chunkSize()):
             self.logger.warning(
-                f"Got {queriesLength} queries, truncating to first 500."
+                f"Got {queriesLength} queries, running them in chunks of {chunkSize}."
             )
-            queries = list(queries)[:500]
+            results = []
+            async for _, chunk in self._iterChunks(operation, list(queries), **kwargs):
+                if chunk is False:
+                    # partial results would pass for a complete run
+                    return False
+                results.extend(chunk)
+            return results
 
         if all(isinstance(q, dict) for q in queries):
             # data = asyncio.run(self._process(operation, list(queries), **kwargs))
             data = await self._process(operation, list(queries), **kwargs)
-            return get_json(data, **kwargs)
+            return self._ingest(get_json(data, fast=self.fastJson, **kwargs))
 
         # queries are of type set | list[int|str], need to convert to list[dict]
         _queries = [
@@ -791,109 +1044,437 @@ class AsyncScraper:
             self.logger.warning("INVALID RES")
             return False
         
-        if res[0][0].status_code == 429:
+        if res[0] is False or (
+            isinstance(res[0], list) and res[0] and res[0][0].status_code == 429
+        ):
             self.logger.warning("TOO MANY REQUESTS")
             return False
         
-        data = get_json(res, **kwargs)
+        data = self._ingest(get_json(res, fast=self.fastJson, **kwargs))
         return data.pop() if kwargs.get("cursor") else flatten(data)
 
+    def _ingest(self, data: list) -> list:
+        """Normalize users/tweets in parsed responses through the entity store, if any."""
+        if self.store:
+            for i, d in enumerate(data):
+                data[i] = self.store.ingest(d)
+        return data
+
+    def _chunkSize(self) -> int:
+        # 500 queries per window per account
+        return 500 * max(len(self.accountPool or ()), 1)
+
+    async def aiterChunks(
+        self,
+        operation: tuple[dict, str, str],
+        queries: list[int | str | dict],
+        chunkSize: int = None,
+        resume: bool = False,
+        **kwargs,
+    ):
+        """
+        Run any number of queries in rate-limit sized chunks, yielding results per chunk.
+
+        Only one chunk is held in memory at a time. The number of queries done is
+        recorded under `out/progress` once the caller asks for the next chunk, with
+        resume=True a rerun of the same operation and queries skips the queries an
+        interrupted run already handled, even if the chunk size changed.
+
+        async for users in scraper.aiterChunks(Operation.UserByRestId, user_ids, resume=True):
+            ...
+
+        @param operation: operation to run, e.g. Operation.Followers
+        @param queries: list of ids / screen names / query dicts
+        @param chunkSize: queries per chunk, defaults to 500 per account
+        @param resume: skip chunks completed by a previous run
+        @param kwargs: optional keyword arguments
+        @return: async iterator of lists of results
+        """
+        queries = list(queries)
+        chunkSize = chunkSize or self._chunkSize()
+        digest = hashlib.sha1(orjson.dumps(queries, default=str)).hexdigest()[:16]
+        progress = self.out / "progress" / f"{operation[-1]}_{digest}.json"
+        start = 0
+        if resume and progress.exists():
+            start = orjson.loads(progress.read_bytes()).get("offset", 0)
+            self.logger.info(f"Resuming {operation[-1]} at query {start}")
+
+        async for offset, results in self._iterChunks(
+            operation, queries, chunkSize, start, resume=resume, **kwargs
+        ):
+            if results is False:
+                self.logger.error(
+                    f"Queries {start}-{offset} of {operation[-1]} failed, stopping"
+                )
+                return
+            yield results
+            # only now has the caller handled the chunk
+            progress.parent.mkdir(parents=True, exist_ok=True)
+            progress.write_bytes(
+                orjson.dumps({"offset": offset, "total": len(queries)})
+            )
+            start = offset
+        # finished, the next run starts from scratch
+        progress.unlink(missing_ok=True)
+
+    async def _iterChunks(
+        self,
+        operation: tuple[dict, str, str],
+        queries: list,
+        chunkSize: int = None,
+        start: int = 0,
+        **kwargs,
+    ):
+        """(offset after the chunk, its results) per chunk, results False ends it."""
+        chunkSize = chunkSize or self._chunkSize()
+        for i in range(start, len(queries), chunkSize):
+            chunk = queries[i : i + chunkSize]
+            results = await self._asyncrun(operation, chunk, **kwargs)
+            yield i + len(chunk), results
+            if results is False:
+                return
+
     async def _query(self, client: AsyncClient, operation: tuple, **kwargs) -> Response:
+        if not self.singleFlight:
+            return await self._request(client, operation, **kwargs)
+        keys, qid, name = operation
+        key = self.singleFlight.key(
+            qid, Operation.default_variables | keys | kwargs, Operation.default_features
+        )
+        return await self.singleFlight.do(
+            key, lambda: self._request(client, operation, **kwargs)
+        )
+
+    async def _request(
+        self, client: AsyncClient, operation: tuple, **kwargs
+    ) -> Response:
         keys, qid, name = operation
         params = {
             "variables": Operation.default_variables | keys | kwargs,
             "features": Operation.default_features,
         }
-        r = await client.get(
-            f"https://twitter.com/i/api/graphql/{qid}/{name}",
-            params=build_params(params),
-        )
+        cached = self.cache and self.cache.cacheable(name)
+        if cached:
+            key = self.cache.key(qid, name, params["variables"])
+            if r := self.cache.get(key):
+                if self.save:
+                    await self.writer.submit(save_json, r, self.out, name, **kwargs)
+                await self._sink(name, r, **kwargs)
+                return r
+
+        async def send(c: AsyncClient) -> Response:
+            await self.rateLimiter.acquire(c, name)
+            # the proxy is chosen first, so the slot belongs to the exit that serves it
+            proxy = self.proxyPool and self.proxyPool.pick()
+            try:
+                async with self._slot(accountKey(c), proxy) as slot:
+                    r = await self._get(
+                        c,
+                        f"https://twitter.com/i/api/graphql/{qid}/{name}",
+                        proxy=proxy,
+                        params=build_params(params),
+                    )
+                    slot.status = r.status_code
+            except BaseException:
+                self.rateLimiter.release(c, name)
+                raise
+            self.rate_limits[name] = self.rateLimiter.update(c, name, r)
+            return r
+
+        async def hedge() -> Response:
+            async with self._hedgeLease(client, name) as c:
+                return await send(c)
+
+        async def attempt() -> Response:
+            if self.hedger and self.hedger.hedges(name):
+                return await self.hedger.run(
+                    name,
+                    lambda: send(client),
+                    hedge,
+                )
+            return await send(client)
+
+        r = await self.retry.run(attempt, logger=self.logger, name=name)
+        if self.accountPool and self.accountPool.report(client, r):
+            self.logger.error(f"[{name}] Account is locked, moving it to quarantine")
+            if self.accountPool.pick(name):
+                async with self._lease(name) as leased:
+                    # not _query, this call is the in-flight one for its key
+                    return await self._request(leased, operation, **kwargs)
+        elif cached:
+            self.cache.set(key, name, r)
         if self.debug:
-            log(self.logger, self.debug, r)
+            log(self.logger, r, level=self.debug)
         if self.save:
-            save_json(r, self.out, name, **kwargs)
+            await self.writer.submit(save_json, r, self.out, name, **kwargs)
+        await self._sink(name, r, **kwargs)
         return r
 
+    async def _get(
+        self, client: AsyncClient, url: str, proxy: Proxy = None, **kwargs
+    ) -> Response:
+        """GET on `client`, or on its copy behind `proxy`, by default the healthiest of the proxy pool."""
+        if self.proxyPool:
+            return await self.proxyPool.send(
+                client, lambda c: c.get(url, **kwargs), proxy
+            )
+        return await client.get(url, **kwargs)
+
+    @asynccontextmanager
+    async def _hedgeLease(self, client: AsyncClient, name: str):
+        """Client for a hedged duplicate: another pool account if there is one, else a separate connection pool."""
+        if self.accountPool:
+            current = self.accountPool.get(client)
+            if self.accountPool.pick(name, exclude=current):
+                # leased, so the pool counts the duplicate against that account
+                async with self.accountPool.lease(name, exclude=current) as account:
+                    yield self._client(session=account.session)
+                return
+        yield self._client("hedge")
+
+    async def _sink(self, name: str, r: Response, **kwargs):
+        if r.status_code != 200:
+            return
+        for sink in self.sinks:
+            try:
+                if (backlog := sink.write(name, raw=r.content, **kwargs)) is not None:
+                    # the sink is behind, hold this request until it catches up
+                    await asyncio.wait([asyncio.wrap_future(backlog)])
+            except Exception as e:
+                self.logger.error(f"[{name}] {type(sink).__name__} failed to write: {e}")
+
     async def _process(self, operation: tuple, queries: list[dict], **kwargs):
-        limits = Limits(
-            max_connections=self.max_connections, max_keepalive_connections=10
+        # Limit queries to 1
+        queryLimit = kwargs.pop("queryLimit", False)
+
+        if queryLimit:
+            queries = queries[:queryLimit]
+
+        return await self.tasks.map(
+            "gql",
+            lambda q: self._dispatch(operation, q, **kwargs),
+            queries,
+            desc=self.pbar and operation[-1],
         )
-        headers = self.session.headers if self.guest else get_headers(self.session)
-        cookies = self.session.cookies
-        async with AsyncClient(
-            limits=limits,
-            headers=headers,
-            cookies=cookies,
-            timeout=20,
-            verify=False,
-            http2=True,
-            follow_redirects=True,
-            **self.proxies,
-        ) as c:
-            # Limit queries to 1
-            queryLimit = kwargs.pop("queryLimit", False)
 
-            if queryLimit:
-                queries = queries[:queryLimit]
+    async def aiterCompleted(self, operation: tuple, queries: list, **kwargs):
+        """
+        Run queries on the bounded "gql" pool, yielding each one's results as soon as it finishes.
+
+        async for query, pages in scraper.aiterCompleted(Operation.Followers, user_ids):
+            ...
 
-            tasks = (self._paginate(c, operation, **q, **kwargs) for q in queries)
+        @param operation: operation to run, e.g. Operation.Followers
+        @param queries: list of ids / screen names / query dicts
+        @param kwargs: optional keyword arguments
+        @return: async iterator of (query, list of parsed pages)
+        """
+        keys = operation[0]
+        queries = [
+            q if isinstance(q, dict) else {dictKey: q for dictKey in keys}
+            for q in queries
+        ]
+        async for i, res in self.tasks.aiter(
+            "gql", lambda q: self._dispatch(operation, q, **kwargs), queries
+        ):
+            yield queries[i], self._ingest(get_json(res or [], fast=self.fastJson))
 
-            if self.pbar:
-                return await tqdm_asyncio.gather(*tasks, desc=operation[-1])
-            return await asyncio.gather(*tasks)
+    async def aiterNew(
+        self,
+        operation: tuple,
+        queries: list,
+        limit: int = None,
+        maxPages: int = 10,
+        **kwargs,
+    ):
+        """
+        Poll queries incrementally, yielding only the entries added since the last poll.
+
+        Pages are fetched newest first until one contains an entry seen before, so a
+        poll with nothing new costs a single request. The first poll of a query reads
+        `limit` entries, or only its first page. A pinned tweet is skipped, it is old
+        and on top of every poll. If the known entries are gone (deleted tweets, lost
+        followers) a poll stops at the first tweet older than them, or after `maxPages`.
+        Seen entry ids are kept in `self.seen`.
+
+        while True:
+            async for query, entries in scraper.aiterNew(Operation.Followers, [user_id]):
+                ...
+            await asyncio.sleep(180)
+
+        @param operation: operation to poll, e.g. Operation.Followers or Operation.UserTweets
+        @param queries: list of ids / screen names / query dicts
+        @param limit: entries read by the first poll of a query, defaults to one page
+        @param maxPages: pages read by a later poll at most, defaults to 10
+        @param kwargs: optional keyword arguments
+        @return: async iterator of (query, list of new entries, newest first)
+        """
+        keys, qid, name = operation
+        for query in queries:
+            if not isinstance(query, dict):
+                query = {dictKey: query for dictKey in keys}
+            key = self.seen.key(query)
+            known = set(self.seen.get(name, key))
+            newest = newest_tweet(known)
+            new, pages = [], 0
+            async for r, data, page in self._aiterPages(
+                self._queryClient(), operation, **query, **kwargs
+            ):
+                entries = [e for e in page.entries if e is not page.pinned]
+                entries, hit = unseen(entries, known, newest)
+                new.extend(entries)
+                pages += 1
+                if hit or (not known and len(new) >= (limit or 0)):
+                    break
+                if pages >= maxPages:
+                    self.logger.warning(
+                        f"[{name}] None of the known entries of {query} came back in {pages} pages, stopping"
+                    )
+                    break
+            self.seen.add(name, key, [e["entryId"] for e in new])
+            if new:
+                yield query, self.store.ingest(new) if self.store else new
+
+    @asynccontextmanager
+    async def _lease(self, name: str):
+        """Client for one request, on the pool account with the most budget left if pooled."""
+        if not self.accountPool:
+            yield self._client()
+            return
+        async with self.accountPool.lease(name) as account:
+            yield self._client(session=account.session)
+
+    def _queryClient(self) -> AsyncClient | None:
+        """Client for a paginated query, None to lease a pool account for every page."""
+        return None if self.accountPool else self._client()
+
+    async def _queryPage(
+        self, client: AsyncClient | None, operation: tuple, **kwargs
+    ) -> Response:
+        # leased per page, so a query moves off an account that got locked mid-way
+        if client is not None:
+            return await self._query(client, operation, **kwargs)
+        async with self._lease(operation[-1]) as leased:
+            return await self._query(leased, operation, **kwargs)
+
+    async def _dispatch(self, operation: tuple, query: dict, **kwargs):
+        return await self._paginate(
+            self._queryClient(), operation, **query, **kwargs
+        )
+
+    async def _aiter(self, operation: tuple, queries: list, **kwargs):
+        """Yield the entries of every page of every query, one query after another."""
+        keys, qid, name = operation
+        for query in queries:
+            if not isinstance(query, dict):
+                query = {dictKey: query for dictKey in keys}
+            async for r, data, page in self._aiterPages(
+                self._queryClient(), operation, **query, **kwargs
+            ):
+                if page.entries:
+                    yield self.store.ingest(page.entries) if self.store else page.entries
 
     async def _paginate(self, client: AsyncClient, operation: tuple, **kwargs):
+        resume = kwargs.pop("resume", False)
+        is_resuming = bool(kwargs.get("cursor"))
+        cursor = kwargs.get("cursor")
+        name = operation[-1]
+        if checkpoints := self._checkpoints(resume):
+            query = {k: v for k, v in kwargs.items() if k not in ("cursor", "limit")}
+            key = checkpoints.key(query)
+            seen = 0
+            if resume and not is_resuming and (state := checkpoints.get(name, key)):
+                cursor, seen, done = state
+                if done:
+                    self.logger.info(f"[{name}] Skipping {query}, finished by an earlier run")
+                    _finish(name, key)
+                    return []
+                if cursor:
+                    self.logger.info(f"[{name}] Resuming {query} after {seen} results")
+                    kwargs["cursor"] = cursor
+                    # the limit counts from the original start, not from the resume
+                    if "limit" in kwargs:
+                        kwargs["limit"] -= seen
+                        if kwargs["limit"] <= 0:
+                            return []
+            start, ids = seen, set()
+        res = []
+        try:
+            async for r, data, page in self._aiterPages(client, operation, **kwargs):
+                res.append(r)
+                cursor = page.cursor_bottom
+                if checkpoints:
+                    # unique results, what `limit` is compared against
+                    ids.update(page.rest_ids)
+                    seen = start + len(ids)
+                    checkpoints.save(name, key, query, cursor, seen)
+        except Exception as e:
+            self.logger.error(f"Failed to get pagination data\n{e}")
+            checkpoints and _finish(name, key, done=False)
+            if not res:
+                return
+            # the result is incomplete, say so rather than pass it off as the whole query
+            self.logger.warning(
+                f"[{name}] Returning the {len(res)} pages fetched before the failure"
+                + (", resume=True continues after them" if checkpoints else "")
+            )
+            # keep the pages we already have, the checkpoint still points past them
+            return (res, cursor) if is_resuming else res
+        if checkpoints and res:
+            checkpoints.save(name, key, query, cursor, seen, done=True)
+            _finish(name, key)
+        if is_resuming:
+            return res, cursor
+        if not res:
+            return False
+        return res
+
+    def _checkpoints(self, resume: bool = False) -> CheckpointStore | None:
+        # resuming needs a store, default to the one checkpoints=True would have used
+        if resume and not self.checkpoints:
+            self.checkpoints = CheckpointStore(self.out / "checkpoints.sqlite")
+        return self.checkpoints
+
+    async def _aiterPages(self, client: AsyncClient, operation: tuple, **kwargs):
+        """Yield (response, data, parsed Page) for every page of a query."""
+        parser = PageParser(operation[-1])
         limit = kwargs.pop("limit", math.inf)
         cursor = kwargs.pop("cursor", None)
-        is_resuming = False
+        ids = set()
         dups = 0
         DUP_LIMIT = 3
-        if cursor:
-            is_resuming = True
-            res = []
-            ids = set()
-        else:
-            try:
-                r = await self._query(client, operation, **kwargs)
-                
-                if r.status_code == 429: 
-                    self.logger.error("Too Many Requests...")
-                    return False
-                
-                initial_data = r.json()
+        if not cursor:
+            r = await self._queryPage(client, operation, **kwargs)
 
-                res = [r]
-                # ids = get_ids(initial_data, operation) # todo
-                ids = set(find_key(initial_data, "rest_id"))
-                cursor = get_cursor(initial_data)
-            except Exception as e:
-                self.logger.error("Failed to get initial pagination data", e)
+            if r.status_code == 429: 
+                self.logger.error("Too Many Requests...")
                 return
+
+            data = loads(r, self.fastJson)
+            page = parser.parse(data)
+            ids |= set(page.rest_ids)
+            cursor = page.cursor_bottom
+            yield r, data, page
         while (dups < DUP_LIMIT) and cursor:
             prev_len = len(ids)
             if prev_len >= limit:
                 break
-            try:
-                r = await self._query(client, operation, cursor=cursor, **kwargs)
-                if r.status_code == 429: 
-                    self.logger.error("Too Many Requests.. waiting 60 sec..")
-                    await asyncio.sleep(60)
-                    continue
-                data = r.json()
-            except Exception as e:
-                self.logger.error(f"Failed to get pagination data\n{e}")
-                return
-            cursor = get_cursor(data)
-            # ids |= get_ids(data, operation) # todo
-            ids |= set(find_key(data, "rest_id"))
+            r = await self._queryPage(client, operation, cursor=cursor, **kwargs)
+            if r.status_code == 429: 
+                # the rate limiter holds the next request until the window resets,
+                # a query that keeps getting them gives up like one that stopped moving
+                self.logger.error("Too Many Requests.. waiting for rate limit reset..")
+                dups += 1
+                continue
+            data = loads(r, self.fastJson)
+            page = parser.parse(data)
+            cursor = page.cursor_bottom
+            ids |= set(page.rest_ids)
             if self.debug:
                 self.logger.debug(f"Unique results: {len(ids)}\tcursor: {cursor}")
             if prev_len == len(ids):
                 dups += 1
-            res.append(r)
-        if is_resuming:
-            return res, cursor
-        return res
+            yield r, data, page
 
     async def _space_listener(self, chat: dict, frequency: int):
         def rand_color():
@@ -1001,12 +1582,12 @@ class AsyncScraper:
             http2=True,
             verify=False,
         ) as c:
-            tasks = (get(c, _id) for _id in spaces)
-            if self.pbar:
-                return await tqdm_asyncio.gather(
-                    *tasks, desc="Getting live transcripts"
-                )
-            return await asyncio.gather(*tasks)
+            return await self.tasks.map(
+                "chat",
+                lambda space: get(c, space),
+                spaces,
+                desc=self.pbar and "Getting live transcripts",
+            )
 
     async def asyncSpaceLiveTranscript(self, room: str, frequency: int = 1):
         """
@@ -1110,12 +1691,8 @@ class AsyncScraper:
             return {"space": space, "chunks": sort_chunks(all_chunks)}
 
         async def process(spaces: list[dict]):
-            limits = Limits(max_connections=self.max_connections)
-            headers, cookies = self.session.headers, self.session.cookies
-            async with AsyncClient(
-                limits=limits, headers=headers, cookies=cookies, timeout=20, **self.proxies, verify=False, http2=True
-            ) as c:
-                return await asyncio.gather(*(poll_space(c, space) for space in spaces))
+            c = self._client("media")
+            return await asyncio.gather(*(poll_space(c, space) for space in spaces))
 
         spaces = self.asyncSpaces(rooms=rooms)
         # return asyncio.run(process(spaces))
@@ -1,26 +1,56 @@
 import asyncio
 import logging.config
 import math
-import random
 import re
 import time
 import orjson
 import anyio
 
+from datetime import datetime, timezone
 from functools import partial
 from logging import Logger
 from pathlib import Path
 from httpx import AsyncClient
 from .constants import Operation, LOG_CONFIG, GREEN, YELLOW, RESET
+from .accountPool import AccountPool
+from .concurrency import TaskPool
 from .asyncLogin import asyncLogin
-from .util import get_headers, find_key, build_params
-from functools import partial
+from .rateLimiter import RateLimiter
+from .pageParser import PageParser
+from .retry import RetryPolicy
+from .seen import SeenStore, newest_tweet, unseen
+from .singleFlight import SingleFlight
+from .sinks import Sink
+from .util import get_headers, build_params, loads
 from colorama import Fore
 from httpx_socks import AsyncProxyTransport
 
 reset = "\x1b[0m"
 colors = [f"\x1b[{i}m" for i in range(31, 37)]
 
+SNOWFLAKE_EPOCH = 1288834974657  # ms, twitter's id epoch
+
+
+def snowflake_time(rest_id: int | str) -> float:
+    """Unix time a tweet id was created at."""
+    return ((int(rest_id) >> 22) + SNOWFLAKE_EPOCH) / 1000
+
+
+def to_timestamp(value: str | datetime | float) -> float:
+    """Unix time of a date, ISO string or timestamp, naive dates are UTC."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def search_time(ts: float) -> str:
+    """since:/until: operand with second precision."""
+    return datetime.fromtimestamp(int(ts), timezone.utc).strftime("%Y-%m-%d_%H:%M:%S_UTC")
+
 
 class AsyncSearch:
     def __init__(
@@ -43,6 +73,16 @@ class AsyncSearch:
             twid (bool, optional): Provide the accounts Rest_Id. Defaults to False.
             proxies (str, optional): The proxy string to provide to AsyncClient. Defaults to None.
             httpxSocks (bool, optional): Use httpx-socks or native proxies. Defaults to False.
+
+        Keyword Args:
+            rateLimiter (RateLimiter, optional): Rate limiter to share between clients. Defaults to a new one.
+            accountPool (AccountPool, optional): Spread requests over many accounts instead of one session. Defaults to None.
+            fastJson (bool, optional): Parse responses with orjson straight from the raw bytes. Defaults to False.
+            sink (Sink | list[Sink], optional): Also hand every page of entries to these sinks, e.g. ParquetSink. Defaults to None.
+            retry (RetryPolicy, optional): Retry/backoff policy for search requests and empty pages. Defaults to RetryPolicy().
+            concurrency (dict, optional): Max concurrent tasks per class, `asyncSearchWindows` runs its windows as "gql". Defaults to {"gql": 50}.
+            seen (SeenStore | bool, optional): Newest results seen per query for `aiterNew`, True for one persisted in "data/seen.sqlite". Defaults to an in-memory one.
+            singleFlight (SingleFlight, optional): Send concurrent identical search pages once and share the response. Defaults to None.
         """
         self.save = save
         self.debug = debug
@@ -52,6 +92,20 @@ class AsyncSearch:
         self.v2_api = "https://twitter.com/i/api/2"
         self.logger = self._init_logger(**kwargs)
         self.rate_limits = {}
+        self.fastJson = kwargs.get("fastJson", False)
+        self.parser = PageParser(Operation.SearchTimeline[-1])
+        self.retry: RetryPolicy = kwargs.get("retry") or RetryPolicy()
+        self.tasks = TaskPool(kwargs.get("concurrency"))
+        self.singleFlight: SingleFlight = kwargs.get("singleFlight")
+        self.seen: SeenStore = kwargs.get("seen") or SeenStore()
+        if self.seen is True:
+            self.seen = SeenStore("data/seen.sqlite")
+        sink = kwargs.get("sink") or []
+        self.sinks: list[Sink] = sink if isinstance(sink, list) else [sink]
+        self.accountPool: AccountPool = kwargs.get("accountPool")
+        self.rateLimiter = kwargs.get("rateLimiter") or (
+            self.accountPool.rateLimiter if self.accountPool else RateLimiter()
+        )
         #self.twoCaptcha = TwoCaptcha(main=self, apiKey=twoCaptchaApiKey)
         self.proxyString = proxies
 
@@ -65,6 +119,33 @@ class AsyncSearch:
 
         self.ogProxyString = proxies
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def aclose(self):
+        """Flush and close the sinks and the seen store, the session stays open."""
+        for sink in self.sinks:
+            # off the event loop, closing waits for the sink's writes to hit disk
+            await asyncio.to_thread(sink.close)
+        self.seen.close()
+
+    async def _flushSinks(self):
+        for sink in self.sinks:
+            await asyncio.to_thread(sink.flush)
+
+    async def _sink(self, entries: list[dict], **query):
+        name = Operation.SearchTimeline[-1]
+        for sink in self.sinks:
+            try:
+                if (backlog := sink.write(name, entries, **query)) is not None:
+                    # the sink is behind, hold this page until it catches up
+                    await asyncio.wait([asyncio.wrap_future(backlog)])
+            except Exception as e:
+                self.logger.error(f"[{name}] {type(sink).__name__} failed to write: {e}")
+
     async def asyncAuthenticate(
         self,
         email: str = None,
@@ -162,8 +243,202 @@ class AsyncSearch:
         out = Path(out)
         out.mkdir(parents=True, exist_ok=True)
         processResults = await self.process(queries, limit, out, **kwargs)
+        await self._flushSinks()
         return processResults
 
+    async def asyncSearchWindows(
+        self,
+        query: dict,
+        since: str | datetime | float,
+        until: str | datetime | float = None,
+        windows: int = 8,
+        windowLimit: int = 1_000,
+        minWindow: float = 60 * 60,
+        limit: int = math.inf,
+        out: str = "data/search_results",
+        **kwargs,
+    ) -> list[dict]:
+        """Search one query over a date range, many time windows at once
+
+        The range is cut into `windows` disjoint since:/until: windows which are paginated
+        concurrently, across the account pool if there is one. A window still going after
+        `windowLimit` results is dense: the part of it not reached yet (older than the
+        oldest tweet seen) is split in two and queued, while both halves are at least
+        `minWindow` seconds. A shorter rest is queued whole and paginated to its end.
+
+        entries = await search.asyncSearchWindows(
+            {"query": "python", "category": "Latest"}, since="2023-01-01", until="2023-07-01"
+        )
+
+        Args:
+            query (dict): Query to search for, without since:/until: operators.
+            since (str | datetime | float): Start of the range, ISO date, datetime or unix time. Naive dates are UTC.
+            until (str | datetime | float, optional): End of the range. Defaults to now.
+            windows (int, optional): Windows the range starts out split into. Defaults to 8.
+            windowLimit (int, optional): Results paginated per window before it is split. Defaults to 1_000.
+            minWindow (float, optional): Dense windows shorter than this many seconds aren't split, but paginated without windowLimit. Defaults to 1 hour.
+            limit (int, optional): Stop once this many unique results were found. Defaults to no limit.
+            out (str, optional): Output directory for results. Defaults to "data/search_results".
+
+        Returns:
+            list[dict]: entries of all windows, deduplicated by entryId
+        """
+        out = Path(out)
+        out.mkdir(parents=True, exist_ok=True)
+        start = to_timestamp(since)
+        end = to_timestamp(until) if until is not None else time.time()
+        step = (end - start) / windows
+        sem = self.tasks.semaphore("gql")
+        results = {}
+
+        async def search(lo: float, hi: float, pageLimit: float = windowLimit) -> tuple:
+            window = query | {
+                "query": f'{query["query"]} since:{search_time(lo)} until:{search_time(hi)}'
+            }
+            found = []
+            async with sem:
+                async for entries in self._aiterPages(window, pageLimit, out, **kwargs):
+                    if entries is None:
+                        break
+                    found.extend(entries)
+            return lo, hi, pageLimit, found
+
+        pending = {
+            asyncio.ensure_future(search(start + i * step, start + (i + 1) * step))
+            for i in range(windows)
+        }
+        try:
+            while pending and len(results) < limit:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    lo, hi, pageLimit, found = task.result()
+                    ids = {e["entryId"] for e in found}
+                    for entry in found:
+                        results.setdefault(entry["entryId"], entry)
+                    if len(ids) < pageLimit or len(results) >= limit:
+                        continue
+                    times = [
+                        snowflake_time(i.split("-")[-1])
+                        for i in ids
+                        if i.startswith("tweet-")
+                    ]
+                    # since:/until: have second precision
+                    oldest = int(min(times)) if times else hi
+                    if not lo < oldest < hi:
+                        continue
+                    if oldest - lo < 2 * minWindow:
+                        # halves would be under minWindow, page the rest through in one go
+                        self.debug and self.logger.debug(
+                            f"Paginating dense window {search_time(lo)} - {search_time(oldest)} without a limit"
+                        )
+                        pending.add(asyncio.ensure_future(search(lo, oldest, math.inf)))
+                        continue
+                    if self.debug:
+                        self.logger.debug(
+                            f"Splitting dense window {search_time(lo)} - {search_time(oldest)}"
+                        )
+                    mid = (lo + oldest) / 2
+                    pending |= {
+                        asyncio.ensure_future(search(*p))
+                        for p in [(lo, mid), (mid, oldest)]
+                    }
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self._flushSinks()
+        return list(results.values())
+
+    async def aiterSearch(
+        self,
+        queries: list[dict],
+        limit: int = 50,
+        out: str = "data/search_results",
+        **kwargs,
+    ):
+        """Stream search results page by page
+
+        Same queries as `asyncSearch`, but they are run one after another and the entries
+        of every page are yielded as soon as they arrive. The sinks are flushed once the
+        iterator ends or is closed, wrap it in `contextlib.aclosing` to stop early.
+
+        async for entries in search.aiterSearch([{"query": "python", "category": "Latest"}]):
+            ...
+
+        Args:
+            queries (list[dict]): List of queries to search for.
+            limit (int, optional): Maximum results per query. Defaults to 50.
+            out (str, optional): Output directory for results. Defaults to "data/search_results".
+
+        Yields:
+            list: entries of one page
+        """
+        out = Path(out)
+        out.mkdir(parents=True, exist_ok=True)
+        try:
+            for query in queries:
+                async for entries in self._aiterPages(query, limit, out, **kwargs):
+                    if entries is None:
+                        break
+                    yield entries
+        finally:
+            # also when the caller stops early
+            await self._flushSinks()
+
+    async def aiterNew(
+        self,
+        queries: list[dict],
+        out: str = "data/search_results",
+        maxPages: int = 10,
+        **kwargs,
+    ):
+        """Poll searches incrementally, yielding only the results added since the last poll
+
+        Pages are fetched until one contains a result seen before, or a tweet older than
+        the newest seen one, so a poll with nothing new costs a single request. The first
+        poll of a query only reads its first page, later ones read `maxPages` at most.
+        Use the "Latest" category, "Top" isn't ordered by time.
+
+        while True:
+            async for query, entries in search.aiterNew([{"query": "python", "category": "Latest"}]):
+                ...
+            await asyncio.sleep(60)
+
+        Args:
+            queries (list[dict]): List of queries to poll.
+            out (str, optional): Output directory for results. Defaults to "data/search_results".
+            maxPages (int, optional): Pages a poll reads at most. Defaults to 10.
+
+        Yields:
+            tuple: (query, list of new entries, newest first)
+        """
+        out = Path(out)
+        out.mkdir(parents=True, exist_ok=True)
+        name = Operation.SearchTimeline[-1]
+        for query in queries:
+            key = self.seen.key(query)
+            known = set(self.seen.get(name, key))
+            newest = newest_tweet(known)
+            new, pages = [], 0
+            async for entries in self._aiterPages(query, math.inf, out, **kwargs):
+                if entries is None:
+                    break
+                entries, hit = unseen(entries, known, newest)
+                new.extend(entries)
+                pages += 1
+                if hit or not known:
+                    break
+                if pages >= maxPages:
+                    self.logger.warning(
+                        f'None of the known results of {query["query"]} came back in {pages} pages, stopping'
+                    )
+                    break
+            self.seen.add(name, key, [e["entryId"] for e in new])
+            if new:
+                yield query, new
+
     async def process(
         self, queries: list[dict], limit: int, out: Path, **kwargs
     ) -> list:
@@ -189,6 +464,22 @@ class AsyncSearch:
     async def paginate(
         self, query: dict, limit: int, out: Path, results: list, **kwargs
     ) -> list[dict]:
+        res = []
+        async for entries in self._aiterPages(query, limit, out, **kwargs):
+            if entries is None:
+                if not res:
+                    return
+                # keep the pages we already have, like AsyncScraper._paginate
+                self.logger.warning(
+                    f'Returning the {len(res)} results of {query["query"]} fetched before the failure'
+                )
+                break
+            res.extend(entries)
+        results.append(res)
+        return res
+
+    async def _aiterPages(self, query: dict, limit: int, out: Path, **kwargs):
+        """Yield the entries of every page, None if a page could not be fetched."""
         params = {
             "variables": {
                 "count": 20,
@@ -200,7 +491,6 @@ class AsyncSearch:
             "fieldToggles": {"withArticleRichContentState": False},
         }
 
-        res = []
         cursor = ""
         total = set()
 
@@ -208,63 +498,110 @@ class AsyncSearch:
             if cursor:
                 params["variables"]["cursor"] = cursor
             
-            getFunc = partial(self.get, self.session, params)
+            if self.accountPool:
+                getFunc = partial(self.pooledGet, params)
+            else:
+                getFunc = partial(self.get, self.session, params)
             backoffResults = await self.backoff(getFunc, **kwargs)
 
             if not backoffResults:
                 if self.debug:
                     self.logger.debug("Failed to backoff")
+                yield None
                 return
             data, entries, cursor = backoffResults
-            res.extend(entries)
             if len(entries) <= 2 or len(total) >= limit:  # just cursors
                 self.debug and self.logger.debug(
                     f'[{GREEN}success{RESET}] Returned {len(total)} search results for {query["query"]}'
                 )
-                results.append(res)
-                return res
-            total |= set(find_key(entries, "entryId"))
+                yield entries
+                return
+            total |= {e["entryId"] for e in entries}
             self.debug and self.logger.debug(f'Searching: {query.get("query")}')
             self.save and (out / f"{time.time_ns()}.json").write_bytes(
                 orjson.dumps(entries)
             )
+            await self._sink(entries, query=query["query"])
+            yield entries
 
     async def get(self, client: AsyncClient, params: dict) -> tuple:
+        if (result := await self._getPage(client, params)) is None:
+            return await self.pooledGet(params)
+        return result
+
+    async def _getPage(self, client: AsyncClient, params: dict) -> tuple | None:
+        """`get` on one client, None if its pool account turned out to be locked."""
         _, operationQueryID, operationName = Operation.SearchTimeline
-        response = await client.get(
-            f"https://twitter.com/i/api/graphql/{operationQueryID}/{operationName}",
-            params=build_params(params),
-        )
+
+        async def send():
+            await self.rateLimiter.acquire(client, operationName)
+            try:
+                response = await client.get(
+                    f"https://twitter.com/i/api/graphql/{operationQueryID}/{operationName}",
+                    params=build_params(params),
+                )
+            except BaseException:
+                self.rateLimiter.release(client, operationName)
+                raise
+            self.rate_limits[operationName] = self.rateLimiter.update(
+                client, operationName, response
+            )
+            return response
+
+        async def fetch() -> tuple:
+            response = await self.retry.run(send, logger=self.logger, name=operationName)
+            # reported by the caller that sent it, not by everyone sharing it
+            locked = bool(self.accountPool and self.accountPool.report(client, response))
+            return response, locked
+
+        if self.singleFlight:
+            # own namespace, the shared result is (response, locked), not a Response
+            response, locked = await self.singleFlight.do(
+                self.singleFlight.key(
+                    f"search/{operationQueryID}", params["variables"], params["features"]
+                ),
+                fetch,
+            )
+        else:
+            response, locked = await fetch()
         
-        if 'this account is temporarily locked' in response.text:
+        if locked:
+            self.logger.error(f'[{operationName}] Account is locked, moving it to quarantine')
+            return None
+
+        if b'this account is temporarily locked' in response.content:
             self.logger.error(f'[{self.username}] Account is locked, please use AsyncAccount.unlockViaArkoseCaptcha() or do it manually.')
             return False
         
-        self.rate_limits[operationName] = {
-            k: int(v) for k, v in response.headers.items() if "rate-limit" in k
-        }
-        data = response.json()
+        data = loads(response, self.fastJson)
         if self.debug:
             self.logger.info(f"Rate limits: {self.rate_limits[operationName]}")
-        cursor = self.get_cursor(data)
+        page = self.parser.parse(data)
         entries = [
             field
-            for key in find_key(data, "entries")
-            for field in key
+            for field in page.entries
             if re.search(r"^(tweet|user)-", field["entryId"])
         ]
         # add on query info
         for entry in entries:
             entry["query"] = params["variables"]["rawQuery"]
-        return data, entries, cursor
+        return data, entries, page.cursor_bottom, page
+
+    async def pooledGet(self, params: dict) -> tuple:
+        """`get` on the pool account with the most search budget left."""
+        while True:
+            # a locked account's lease ends before the next one starts
+            async with self.accountPool.lease(Operation.SearchTimeline[-1]) as account:
+                result = await self._getPage(account.session, params)
+            if result is not None:
+                return result
 
     def get_cursor(self, data: list[dict]):
-        for e in find_key(data, "content"):
-            if e.get("cursorType") == "Bottom":
-                return e["value"]
+        return self.parser.parse(data).cursor_bottom
 
     async def backoff(self, fn, **kwargs):
-        retries = kwargs.get("retries", 3)
+        # HTTP errors are retried by self.retry inside `get`, this retries bad pages
+        retries = kwargs.get("retries", self.retry.retries)
         for i in range(retries + 1):
             try:
                 resultsFromFunction = await fn()
@@ -272,12 +609,12 @@ class AsyncSearch:
                 if not resultsFromFunction:
                     return False
                 
-                data, entries, cursor = resultsFromFunction
+                data, entries, cursor, page = resultsFromFunction
                 if errors := data.get("errors"):
                     for e in errors:
                         self.logger.warning(f'{YELLOW}{e.get("message")}{RESET}')
                         return [], [], ""
-                ids = set(find_key(data, "entryId"))
+                ids = set(page.entry_ids)
                 if len(ids) >= 2:
                     return data, entries, cursor
             except Exception as e:
@@ -285,7 +622,7 @@ class AsyncSearch:
                     if self.debug:
                         self.logger.debug(f"Max retries exceeded\n{e}")
                     return
-                t = 2**i + random.random()
+                t = self.retry.delay(i)
                 if self.debug:
                     self.logger.debug(f'Retrying in {f"{t:.2f}"} seconds\t\t{e}')
                 await asyncio.sleep(t)
@@ -74,16 +74,24 @@ def build_params(params: dict) -> dict:
 
 
 def save_json(r: Response, path: Path, name: str, **kwargs):
+    # error pages come back as html/text, they are not json to save as-is
+    if "json" not in r.headers.get("content-type", ""):
+        return
     try:
-        data = r.json()
         kwargs.pop("cursor", None)
         out = path / "_".join(map(str, kwargs.values()))
         out.mkdir(parents=True, exist_ok=True)
-        (out / f"{time.time_ns()}_{name}.json").write_bytes(orjson.dumps(data))
+        # the body is already json, no need to parse and re-serialize it
+        (out / f"{time.time_ns()}_{name}.json").write_bytes(r.content)
     except Exception as e:
         print(f"Failed to save data: {e}")
 
 
+def loads(r: Response, fast: bool = False) -> any:
+    """Parse a json response, with fast=True orjson parses the raw bytes without decoding them to str first"""
+    return orjson.loads(r.content) if fast else r.json()
+
+
 def flatten(seq: list | tuple) -> list:
     flat = []
     for e in seq:
@@ -94,7 +102,7 @@ def flatten(seq: list | tuple) -> list:
     return flat
 
 
-def get_json(res: list[Response], **kwargs) -> list:
+def get_json(res: list[Response], fast: bool = False, **kwargs) -> list:
     cursor = kwargs.get("cursor")
     temp = res
     if any(isinstance(r, (list, tuple)) for r in res):
@@ -102,7 +110,7 @@ def get_json(res: list[Response], **kwargs) -> list:
     results = []
     for r in temp:
         try:
-            data = r.json()
+            data = loads(r, fast)
             if cursor:
                 results.append([data, cursor])
             else:
@@ -197,24 +205,21 @@ def find_key(obj: any, key: str) -> list:
     @return: list of values
     """
 
-    def helper(obj: any, key: str, L: list) -> list:
-        if not obj:
-            return L
-
+    def helper(obj: any, L: list):
         if isinstance(obj, list):
             for e in obj:
-                L.extend(helper(e, key, []))
-            return L
+                if e and isinstance(e, dict | list):
+                    helper(e, L)
+        elif isinstance(obj, dict):
+            if obj.get(key):
+                L.append(obj[key])
+            for v in obj.values():
+                if v and isinstance(v, dict | list):
+                    helper(v, L)
 
-        if isinstance(obj, dict) and obj.get(key):
-            L.append(obj[key])
-
-        if isinstance(obj, dict) and obj:
-            for k in obj:
-                L.extend(helper(obj[k], key, []))
-        return L
-
-    return helper(obj, key, [])
+    L = []
+    helper(obj, L)
+    return L
 
 
 def log(logger: Logger, level: int, r: Response):
@@ -241,11 +246,10 @@ def log(logger: Logger, level: int, r: Response):
 
     try:
         status = r.status_code
-        (
-            txt,
-            data,
-        ) = r.text, r.json()
+        # only decode the body when it is actually printed
+        txt = r.text if level >= 3 else None
         if "json" in r.headers.get("content-type", ""):
+            data = orjson.loads(r.content)
             if data.get("errors") and not find_key(data, "instructions"):
                 logger.error(f"[{RED}error{RESET}] {status} {data}")
             else:
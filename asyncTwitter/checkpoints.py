@@ -0,0 +1,91 @@
+import hashlib
+import sqlite3
+import time
+
+from pathlib import Path
+
+import orjson
+
+
+class CheckpointStore:
+    """SQLite record of how far every paginated query got.
+
+    `_paginate` saves (operation, query key, last cursor, seen count) after every page
+    and marks the query done once it runs out of pages. A rerun with resume=True
+    continues each query from its stored cursor and skips the finished ones. Once a
+    run got through all of its queries their checkpoints are deleted, so the next
+    run starts from scratch.
+
+    scraper = AsyncScraper(checkpoints=True)
+    await scraper.asyncFollowers(user_ids)               # crashes half way
+    await scraper.asyncFollowers(user_ids, resume=True)  # picks up where it stopped
+    """
+
+    def __init__(self, path: str = "data/checkpoints.sqlite"):
+        """Initialize the checkpoint store.
+
+        Args:
+            path (str, optional): SQLite database file. Defaults to "data/checkpoints.sqlite".
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "operation TEXT, key TEXT, query TEXT, cursor TEXT, seen INTEGER, "
+            "done INTEGER, updated REAL, PRIMARY KEY (operation, key))"
+        )
+
+    @staticmethod
+    def key(query: dict) -> str:
+        return hashlib.sha1(
+            orjson.dumps(query, option=orjson.OPT_SORT_KEYS, default=str)
+        ).hexdigest()
+
+    def get(self, operation: str, key: str) -> tuple[str, int, bool] | None:
+        """(cursor, seen, done) of a query, None if it was never checkpointed."""
+        row = self.db.execute(
+            "SELECT cursor, seen, done FROM checkpoints WHERE operation = ? AND key = ?",
+            (operation, key),
+        ).fetchone()
+        return (row[0], row[1], bool(row[2])) if row else None
+
+    def save(
+        self,
+        operation: str,
+        key: str,
+        query: dict,
+        cursor: str,
+        seen: int,
+        done: bool = False,
+    ):
+        self.db.execute(
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                operation,
+                key,
+                orjson.dumps(query, default=str).decode(),
+                cursor,
+                seen,
+                int(done),
+                time.time(),
+            ),
+        )
+
+    def delete(self, checkpoints: list[tuple[str, str]]):
+        """Forget the checkpoints of (operation, key) pairs."""
+        self.db.executemany(
+            "DELETE FROM checkpoints WHERE operation = ? AND key = ?", checkpoints
+        )
+
+    def clear(self, operation: str = None):
+        """Forget the checkpoints of one operation, or all of them."""
+        if operation:
+            self.db.execute("DELETE FROM checkpoints WHERE operation = ?", (operation,))
+        else:
+            self.db.execute("DELETE FROM checkpoints")
+
+    def close(self):
+        self.db.close()
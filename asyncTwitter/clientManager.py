@@ -0,0 +1,83 @@
+from httpx import AsyncClient, CookieConflict, Cookies, Limits, Request
+
+
+def _csrf(cookies: Cookies):
+    """Request hook setting x-csrf-token to the ct0 `cookies` hold right now."""
+
+    async def hook(request: Request):
+        try:
+            ct0 = cookies.get("ct0")
+        except CookieConflict:
+            return
+        if ct0:
+            request.headers["x-csrf-token"] = ct0
+
+    return hook
+
+
+class ClientManager:
+    """Keeps long-lived AsyncClients around so keep-alive connections are reused.
+
+    Clients are created lazily, one per (name, session) pair, and stay open until
+    `aclose()` is called. AsyncScraper uses a "api" client for GraphQL/REST calls and
+    a "media" client for CDN downloads so the two never starve each other's pool.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 5.0,
+        **kwargs,
+    ):
+        """Initialize the client manager.
+
+        Args:
+            max_connections (int, optional): Maximum connections per client. Defaults to 100.
+            max_keepalive_connections (int, optional): Idle connections kept open per client. Defaults to 10.
+            keepalive_expiry (float, optional): Seconds an idle connection is kept open. Defaults to 5.0.
+            **kwargs: Default arguments passed to every AsyncClient.
+        """
+        self.limits = Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.defaults = {
+            "verify": False,
+            "http2": True,
+            "timeout": 20,
+            "follow_redirects": True,
+        } | kwargs
+        self.clients = {}
+
+    def get(self, name: str, session: AsyncClient = None, **kwargs) -> AsyncClient:
+        """Get the client for `name`/`session`, creating it on first use.
+
+        kwargs are only used when the client is created, so options that differ
+        between callers (e.g. timeouts) belong on the request, or on a separate name.
+        A Cookies instance passed as `cookies` is shared rather than copied.
+        """
+        if (client := self.cached(name, session)) is None:
+            client = self.clients[(name, session)] = AsyncClient(
+                limits=self.limits, **(self.defaults | kwargs)
+            )
+            if isinstance(cookies := kwargs.get("cookies"), Cookies):
+                # one jar, so cookies the server rotates (ct0) reach every client
+                client.cookies.jar = cookies.jar
+                if "x-csrf-token" in client.headers:
+                    # and the csrf header follows ct0 instead of keeping the first one
+                    client.event_hooks["request"].append(_csrf(client.cookies))
+        return client
+
+    def cached(self, name: str, session: AsyncClient = None) -> AsyncClient | None:
+        """The open client for `name`/`session`, None if there is none yet."""
+        client = self.clients.get((name, session))
+        return None if client is None or client.is_closed else client
+
+    async def aclose(self):
+        """Close every client this manager opened."""
+        clients, self.clients = self.clients, {}
+        for client in clients.values():
+            if not client.is_closed:
+                await client.aclose()
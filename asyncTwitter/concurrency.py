@@ -0,0 +1,246 @@
+import asyncio
+import time
+
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from httpx import TimeoutException
+from tqdm import tqdm
+
+DEFAULT_LIMITS = {"gql": 50, "media": 20, "chat": 10}
+
+# classes the current task is a worker of, inherited by the tasks it starts
+_running = ContextVar("running", default=frozenset())
+
+
+class TaskPool:
+    """Bounded worker pools, one concurrency cap per class of work.
+
+    Instead of creating a coroutine per input and gathering them all at once, a
+    fixed number of workers pull inputs one at a time, so memory and scheduling
+    overhead stay flat however long the input is. The cap of a class is shared by
+    everything running in it, e.g. two concurrent `map("gql", ...)` calls still
+    never run more than limits["gql"] GraphQL tasks between them.
+
+    A task of a class can't `map`/`aiter` that same class: once every slot is held
+    by an outer task waiting on its inner work, nothing could run. That raises a
+    RuntimeError right away, nest a different class instead.
+
+    pool = TaskPool({"gql": 20})
+    async for i, result in pool.aiter("gql", fetch, ids):
+        ...
+    """
+
+    def __init__(self, limits: dict = None):
+        """Initialize the task pool.
+
+        Args:
+            limits (dict, optional): Max concurrent tasks per class, merged over {"gql": 50, "media": 20, "chat": 10}. Defaults to None.
+        """
+        self.limits = DEFAULT_LIMITS | (limits or {})
+        self.semaphores = {}
+
+    def semaphore(self, kind: str) -> asyncio.Semaphore:
+        if (sem := self.semaphores.get(kind)) is None:
+            sem = self.semaphores[kind] = asyncio.Semaphore(self.limits.get(kind, 10))
+        return sem
+
+    async def aiter(self, kind: str, fn, items, desc: str = None):
+        """Run `fn(item)` for every item, yielding (index, result) as each one completes.
+
+        The first exception raised by `fn` stops the remaining work and is re-raised.
+        """
+        if kind in (running := _running.get()):
+            raise RuntimeError(
+                f'TaskPool.aiter("{kind}") inside a "{kind}" task would deadlock, '
+                "use another class for the inner work"
+            )
+        limit = self.limits.get(kind, 10)
+        workers = min(limit, len(items)) if hasattr(items, "__len__") else limit
+        if not workers:
+            return
+        pending = iter(enumerate(items))
+        results = asyncio.Queue()
+        # results not yet taken by the consumer, workers stop pulling inputs past this
+        room = asyncio.Semaphore(workers * 2)
+        done = object()
+        sem = self.semaphore(kind)
+
+        async def worker():
+            _running.set(running | {kind})
+            try:
+                while True:
+                    await room.acquire()
+                    if (nxt := next(pending, None)) is None:
+                        break
+                    i, item = nxt
+                    async with sem:
+                        result = await fn(item)
+                    results.put_nowait((i, result, None))
+            except Exception as e:
+                results.put_nowait((None, None, e))
+            finally:
+                results.put_nowait(done)
+
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        total = len(items) if hasattr(items, "__len__") else None
+        pbar = desc and tqdm(total=total, desc=desc)
+        try:
+            while workers:
+                message = await results.get()
+                if message is done:
+                    workers -= 1
+                    continue
+                i, result, error = message
+                if error is not None:
+                    raise error
+                room.release()
+                pbar and pbar.update()
+                yield i, result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            pbar and pbar.close()
+
+    async def map(self, kind: str, fn, items, desc: str = None) -> list:
+        """Run `fn(item)` for every item, returns the results in input order."""
+        items = items if hasattr(items, "__len__") else list(items)
+        res = [None] * len(items)
+        async for i, result in self.aiter(kind, fn, items, desc):
+            res[i] = result
+        return res
+
+
+TIMEOUT = -1  # Sample.status of a request that timed out
+
+
+class Sample:
+    __slots__ = ("status",)
+
+    def __init__(self):
+        self.status = None
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for one account/proxy/host.
+
+    Grows the limit by about one per round trip while the p95 latency stays under
+    `latencyTarget` (default: twice the best median seen so far), and multiplies it by
+    `backoff` on 429s, 5xx and timeouts, at most once per round trip so a burst of
+    failures from the same window only counts once.
+    """
+
+    def __init__(
+        self,
+        initial: int = 10,
+        minimum: int = 1,
+        maximum: int = 100,
+        backoff: float = 0.5,
+        latencyTarget: float = None,
+        window: int = 100,
+    ):
+        """Initialize the adaptive limiter.
+
+        Args:
+            initial (int, optional): Starting concurrency. Defaults to 10.
+            minimum (int, optional): Lowest concurrency. Defaults to 1.
+            maximum (int, optional): Highest concurrency. Defaults to 100.
+            backoff (float, optional): Multiplier applied on overload. Defaults to 0.5.
+            latencyTarget (float, optional): p95 latency in seconds to stay under. Defaults to 2x the best median seen.
+            window (int, optional): Latency samples kept for the percentiles. Defaults to 100.
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latencyTarget = latencyTarget
+        self.latencies = deque(maxlen=window)
+        self.baseline = None
+        self.inflight = 0
+        self.lastDecrease = 0.0
+        self.cond = asyncio.Condition()
+
+    def p95(self) -> float | None:
+        if len(self.latencies) < 10:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one unit of concurrency, the caller reports the outcome with `.status`.
+
+        async with limiter.slot() as s:
+            r = await client.get(url)
+            s.status = r.status_code
+        """
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.inflight < int(self.limit))
+            self.inflight += 1
+        sample = Sample()
+        start = time.monotonic()
+        try:
+            yield sample
+        except (TimeoutException, asyncio.TimeoutError):
+            sample.status = TIMEOUT
+            raise
+        finally:
+            self.record(sample.status, time.monotonic() - start)
+            async with self.cond:
+                self.inflight -= 1
+                self.cond.notify_all()
+
+    def record(self, status: int | None, latency: float):
+        now = time.monotonic()
+        if status == TIMEOUT or status == 429 or (status and status >= 500):
+            # one decrease per round trip, the rest of the burst saw the same overload
+            if now - self.lastDecrease > (self.p95() or latency):
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                self.lastDecrease = now
+            return
+        if status is None:
+            return
+        self.latencies.append(latency)
+        p95 = self.p95()
+        if p95 is None:
+            return
+        if len(self.latencies) >= 20:
+            median = sorted(self.latencies)[len(self.latencies) // 2]
+            self.baseline = min(self.baseline or median, median)
+        target = self.latencyTarget or (self.baseline and self.baseline * 2)
+        if not target or p95 <= target:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        elif now - self.lastDecrease > p95:
+            # latency is climbing, back off gently before the server starts refusing,
+            # once per round trip like the overload path
+            self.limit = max(self.minimum, self.limit * 0.9)
+            self.lastDecrease = now
+
+
+class AdaptiveConcurrency:
+    """One AdaptiveLimiter per key, e.g. per account or proxy, created on first use.
+
+    scraper = AsyncScraper(adaptive=AdaptiveConcurrency(maximum=50))
+    """
+
+    def __init__(self, **kwargs):
+        """Initialize the adaptive concurrency controller.
+
+        Args:
+            **kwargs: Passed to every AdaptiveLimiter.
+        """
+        self.options = kwargs
+        self.limiters = {}
+
+    def get(self, key) -> AdaptiveLimiter:
+        if (limiter := self.limiters.get(key)) is None:
+            limiter = self.limiters[key] = AdaptiveLimiter(**self.options)
+        return limiter
+
+    def slot(self, key):
+        return self.get(key).slot()
+
+    def limits(self) -> dict:
+        return {key: int(limiter.limit) for key, limiter in self.limiters.items()}
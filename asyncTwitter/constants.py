@@ -77,6 +77,46 @@ ID_MAP = {
     'Favoriters': '^user-\d+$'
 }
 
+# where the timeline instructions live for each operation, see util.get_instructions
+# paths that stop matching are re-learned at runtime, so these only need to be mostly right
+_USER_TIMELINE = ('data', 'user', 'result', 'timeline', 'timeline', 'instructions')
+_USER_TIMELINE_V2 = ('data', 'user', 'result', 'timeline_v2', 'timeline', 'instructions')
+INSTRUCTION_PATHS = {
+    'Followers': _USER_TIMELINE,
+    'Following': _USER_TIMELINE,
+    'Likes': _USER_TIMELINE_V2,
+    'UserTweets': _USER_TIMELINE_V2,
+    'UserTweetsAndReplies': _USER_TIMELINE_V2,
+    'UserMedia': _USER_TIMELINE_V2,
+    'Retweeters': ('data', 'retweeters_timeline', 'timeline', 'instructions'),
+    'Favoriters': ('data', 'favoriters_timeline', 'timeline', 'instructions'),
+    'TweetDetail': ('data', 'threaded_conversation_with_injections_v2', 'instructions'),
+    'SearchTimeline': ('data', 'search_by_raw_query', 'search_timeline', 'timeline', 'instructions'),
+    'ConnectTabTimeline': ('data', 'connect_tab_timeline', 'timeline', 'instructions'),
+    'HomeTimeline': ('data', 'home', 'home_timeline_urt', 'instructions'),
+    'HomeLatestTimeline': ('data', 'home', 'home_timeline_urt', 'instructions'),
+    'Bookmarks': ('data', 'bookmark_timeline_v2', 'timeline', 'instructions'),
+}
+
+# seconds a cached response stays fresh, operations not listed here are never cached
+CACHE_TTL = {
+    'TweetResultByRestId': 7 * 24 * 60 * 60,
+    'TweetDetail': 60 * 60,
+    'TweetStats': 60 * 60,
+    'UserByScreenName': 24 * 60 * 60,
+    'UserByRestId': 24 * 60 * 60,
+    'UsersByRestIds': 24 * 60 * 60,
+    'ProfileSpotlightsQuery': 24 * 60 * 60,
+    'UserTweets': 15 * 60,
+    'UserTweetsAndReplies': 15 * 60,
+    'UserMedia': 15 * 60,
+    'Likes': 15 * 60,
+    'Followers': 5 * 60,
+    'Following': 5 * 60,
+    'Retweeters': 5 * 60,
+    'Favoriters': 5 * 60,
+}
+
 
 @dataclass
 class SearchCategory:
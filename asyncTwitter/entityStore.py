@@ -0,0 +1,111 @@
+import time
+
+from collections import OrderedDict
+
+KINDS = {"User": "users", "Tweet": "tweets"}
+
+
+class EntityStore:
+    """LRU store of User and Tweet results, normalized by rest_id.
+
+    Every response passed to `ingest()` is walked once. Each user/tweet result found
+    is merged into the stored object for its rest_id and the response is rewired to
+    point at that object, so a profile seen across many timelines is held once and
+    always reflects the latest copy.
+
+    store = EntityStore(maxSize=200_000)
+    scraper = AsyncScraper(store=store)
+    await scraper.asyncFollowers([123])
+    store.user("123"), store.stats()
+    """
+
+    def __init__(self, maxSize: int = 100_000, ttl: float = None):
+        """Initialize the entity store.
+
+        Args:
+            maxSize (int, optional): Users and tweets to keep, each. Defaults to 100_000.
+            ttl (float, optional): Seconds an entity is served by `user()`/`tweet()`, forever if None. Defaults to None.
+        """
+        self.maxSize = maxSize
+        self.ttl = ttl
+        self.users = OrderedDict()
+        self.tweets = OrderedDict()
+        self.seen = {}  # rest_id -> time it was last ingested
+        self.hits = 0
+        self.misses = 0
+        self.merged = 0
+
+    def _put(self, kind: str, result: dict) -> dict:
+        entities = getattr(self, kind)
+        rest_id = result["rest_id"]
+        self.seen[rest_id] = time.time()
+        if (stored := entities.get(rest_id)) is not None:
+            entities.move_to_end(rest_id)
+            if stored is not result:
+                # newer fields win, fields only the stored copy has are kept
+                stored.update(result)
+                self.merged += 1
+            return stored
+        entities[rest_id] = result
+        if len(entities) > self.maxSize:
+            old, _ = entities.popitem(last=False)
+            self.seen.pop(old, None)
+        return result
+
+    def _walk(self, node):
+        # returns the canonical object for `node`, children are rewired in place
+        if isinstance(node, dict):
+            for k, v in node.items():
+                if isinstance(v, dict | list):
+                    node[k] = self._walk(v)
+            kind = KINDS.get(node.get("__typename"))
+            if kind and "rest_id" in node:
+                return self._put(kind, node)
+            if node.get("__typename") == "TweetWithVisibilityResults":
+                # the wrapped tweet has no __typename of its own
+                if "rest_id" in (tweet := node.get("tweet", {})):
+                    node["tweet"] = self._put("tweets", tweet)
+        elif isinstance(node, list):
+            for i, v in enumerate(node):
+                if isinstance(v, dict | list):
+                    node[i] = self._walk(v)
+        return node
+
+    def ingest(self, data: dict | list) -> dict | list:
+        """Normalize every user/tweet result in a response, returns the rewired response."""
+        return self._walk(data)
+
+    def _get(self, kind: str, rest_id: str | int) -> dict | None:
+        entities = getattr(self, kind)
+        rest_id = str(rest_id)
+        result = entities.get(rest_id)
+        if result is not None and (
+            self.ttl is None or time.time() - self.seen.get(rest_id, 0) < self.ttl
+        ):
+            entities.move_to_end(rest_id)
+            self.hits += 1
+            return result
+        self.misses += 1
+        return None
+
+    def user(self, rest_id: str | int) -> dict | None:
+        return self._get("users", rest_id)
+
+    def tweet(self, rest_id: str | int) -> dict | None:
+        return self._get("tweets", rest_id)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "users": len(self.users),
+            "tweets": len(self.tweets),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "merged": self.merged,
+        }
+
+    def clear(self):
+        self.users.clear()
+        self.tweets.clear()
+        self.seen.clear()
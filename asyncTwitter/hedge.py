@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+from collections import deque
+
+from httpx import Response
+
+from .retry import RETRY_STATUSES
+
+# idempotent single object lookups, safe to send twice
+HEDGED_OPERATIONS = {
+    "UserByScreenName",
+    "UserByRestId",
+    "UsersByRestIds",
+    "TweetResultByRestId",
+}
+
+
+class Hedger:
+    """Hedged requests for idempotent GraphQL reads.
+
+    If a request hasn't answered after the operation's p95 latency, a duplicate is sent
+    through another connection/account and whichever answers first with a usable
+    response wins, the other is cancelled. A quick 429/5xx or error doesn't win over
+    a slower success. Hedges are paid for out of a budget, every request earns `budget`
+    of a hedge, so they never add more than that fraction of extra load.
+
+    scraper = AsyncScraper(hedge=Hedger(budget=0.05))
+    """
+
+    def __init__(
+        self,
+        operations: set[str] = None,
+        percentile: float = 0.95,
+        budget: float = 0.05,
+        minDelay: float = 0.05,
+        window: int = 200,
+        minSamples: int = 20,
+    ):
+        """Initialize the hedger.
+
+        Args:
+            operations (set[str], optional): Operation names to hedge. Defaults to HEDGED_OPERATIONS.
+            percentile (float, optional): Latency percentile after which the hedge is sent. Defaults to 0.95.
+            budget (float, optional): Extra load allowed, as a fraction of requests. Defaults to 0.05.
+            minDelay (float, optional): Never hedge sooner than this many seconds. Defaults to 0.05.
+            window (int, optional): Latency samples kept per operation. Defaults to 200.
+            minSamples (int, optional): Samples needed before an operation is hedged. Defaults to 20.
+        """
+        self.operations = HEDGED_OPERATIONS if operations is None else operations
+        self.percentile = percentile
+        self.budget = budget
+        self.minDelay = minDelay
+        self.window = window
+        self.minSamples = minSamples
+        self.latencies = {}
+        self.tokens = 1.0
+        self.sent = 0
+        self.won = 0
+
+    def hedges(self, operation: str) -> bool:
+        return operation in self.operations
+
+    def delay(self, operation: str) -> float | None:
+        """Seconds to wait before hedging `operation`, None until enough samples exist."""
+        samples = self.latencies.get(operation)
+        if not samples or len(samples) < self.minSamples:
+            return None
+        ordered = sorted(samples)
+        p = ordered[min(int(len(ordered) * self.percentile), len(ordered) - 1)]
+        return max(p, self.minDelay)
+
+    def record(self, operation: str, latency: float):
+        if (samples := self.latencies.get(operation)) is None:
+            samples = self.latencies[operation] = deque(maxlen=self.window)
+        samples.append(latency)
+
+    @staticmethod
+    def usable(task: asyncio.Future) -> bool:
+        if task.exception() is not None:
+            return False
+        r = task.result()
+        return not isinstance(r, Response) or r.status_code not in RETRY_STATUSES
+
+    async def run(self, operation: str, primary, backup):
+        """Await `primary()`, racing it against `backup()` if it is slower than the hedge delay."""
+        self.tokens = min(self.tokens + self.budget, 10.0)
+        start = time.monotonic()
+        first = asyncio.ensure_future(primary())
+        second = None
+        try:
+            delay = self.delay(operation)
+            if delay is None or self.tokens < 1:
+                r = await first
+                self.record(operation, time.monotonic() - start)
+                return r
+
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done:
+                self.record(operation, time.monotonic() - start)
+                return first.result()
+
+            self.tokens -= 1
+            self.sent += 1
+            second = asyncio.ensure_future(backup())
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if self.usable(task):
+                        self.won += task is second
+                        self.record(operation, time.monotonic() - start)
+                        return task.result()
+            # neither succeeded, the primary's outcome goes to the retry policy
+            return first.result()
+        finally:
+            # the loser, or both if our caller was cancelled
+            for task in (first, second):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "hedged": self.sent,
+            "hedge_wins": self.won,
+            "delays": {op: self.delay(op) for op in self.latencies},
+        }
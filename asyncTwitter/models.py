@@ -0,0 +1,190 @@
+"""
+Typed views over the GraphQL payloads returned by the scrapers.
+
+Models are slotted and only keep the modeled fields, so holding a million users
+costs a fraction of the raw result dicts. Pass raw=True to keep the original result
+on `.raw` for anything that isn't modeled.
+
+for user in users(await scraper.asyncFollowers([123])):
+    user.screen_name, user.followers_count
+"""
+from dataclasses import dataclass, field
+from typing import Iterator
+
+
+@dataclass(slots=True)
+class Media:
+    id: str
+    type: str
+    url: str = None  # the t.co link in the tweet text
+    media_url: str = None
+    video_url: str = None  # highest bitrate mp4 for videos and gifs
+
+    @classmethod
+    def fromRaw(cls, media: dict) -> "Media":
+        variants = media.get("video_info", {}).get("variants", [])
+        mp4s = [v for v in variants if v.get("content_type") == "video/mp4"]
+        best = max(mp4s, key=lambda v: v.get("bitrate", 0), default={})
+        return cls(
+            id=media.get("id_str"),
+            type=media.get("type"),
+            url=media.get("url"),
+            media_url=media.get("media_url_https"),
+            video_url=best.get("url"),
+        )
+
+
+@dataclass(slots=True)
+class User:
+    rest_id: str
+    screen_name: str = None
+    name: str = None
+    description: str = None
+    location: str = None
+    created_at: str = None
+    followers_count: int = 0
+    friends_count: int = 0
+    statuses_count: int = 0
+    favourites_count: int = 0
+    verified: bool = False  # legacy verification
+    is_blue_verified: bool = False
+    protected: bool = False
+    profile_image_url: str = None
+    raw: dict = field(default=None, repr=False)
+
+    @classmethod
+    def fromResult(cls, result: dict, raw: bool = False) -> "User":
+        legacy = result.get("legacy", {})
+        core = result.get("core", {})  # newer payloads moved these out of legacy
+        return cls(
+            rest_id=result.get("rest_id"),
+            screen_name=core.get("screen_name") or legacy.get("screen_name"),
+            name=core.get("name") or legacy.get("name"),
+            description=legacy.get("description"),
+            location=result.get("location", {}).get("location")
+            or legacy.get("location"),
+            created_at=core.get("created_at") or legacy.get("created_at"),
+            followers_count=legacy.get("followers_count", 0),
+            friends_count=legacy.get("friends_count", 0),
+            statuses_count=legacy.get("statuses_count", 0),
+            favourites_count=legacy.get("favourites_count", 0),
+            verified=legacy.get("verified", False),
+            is_blue_verified=result.get("is_blue_verified", False),
+            protected=result.get("privacy", {}).get("protected")
+            or legacy.get("protected", False),
+            profile_image_url=result.get("avatar", {}).get("image_url")
+            or legacy.get("profile_image_url_https"),
+            raw=result if raw else None,
+        )
+
+
+@dataclass(slots=True)
+class Tweet:
+    rest_id: str
+    text: str = None
+    created_at: str = None
+    lang: str = None
+    conversation_id: str = None
+    in_reply_to_status_id: str = None
+    reply_count: int = 0
+    retweet_count: int = 0
+    quote_count: int = 0
+    favorite_count: int = 0
+    view_count: int = None
+    user: User = None
+    media: list[Media] = field(default_factory=list)
+    raw: dict = field(default=None, repr=False)
+
+    @classmethod
+    def fromResult(cls, result: dict, raw: bool = False) -> "Tweet":
+        result = result.get("tweet", result)  # TweetWithVisibilityResults
+        legacy = result.get("legacy", {})
+        note = result.get("note_tweet", {}).get("note_tweet_results", {})
+        author = result.get("core", {}).get("user_results", {}).get("result")
+        views = result.get("views", {}).get("count")
+        return cls(
+            rest_id=result.get("rest_id"),
+            text=note.get("result", {}).get("text") or legacy.get("full_text"),
+            created_at=legacy.get("created_at"),
+            lang=legacy.get("lang"),
+            conversation_id=legacy.get("conversation_id_str"),
+            in_reply_to_status_id=legacy.get("in_reply_to_status_id_str"),
+            reply_count=legacy.get("reply_count", 0),
+            retweet_count=legacy.get("retweet_count", 0),
+            quote_count=legacy.get("quote_count", 0),
+            favorite_count=legacy.get("favorite_count", 0),
+            view_count=int(views) if views else None,
+            user=User.fromResult(author) if author else None,
+            media=[
+                Media.fromRaw(m)
+                for m in legacy.get("extended_entities", {}).get("media", [])
+            ],
+            raw=result if raw else None,
+        )
+
+
+@dataclass(slots=True)
+class Cursor:
+    value: str
+    type: str  # Top, Bottom, ShowMoreThreads...
+
+    @classmethod
+    def fromEntry(cls, entry: dict) -> "Cursor":
+        content = entry.get("content", {})
+        content = content.get("itemContent") or content
+        return cls(value=content.get("value"), type=content.get("cursorType"))
+
+
+def _results(data: dict | list, typename: str) -> Iterator[dict]:
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            kind = node.get("__typename")
+            if kind == "TweetWithVisibilityResults":
+                # the wrapped tweet has no __typename of its own
+                node, kind = node.get("tweet", {}), "Tweet"
+            if kind == typename and "rest_id" in node:
+                yield node
+                # a tweet's quoted/retweeted tweet is nested inside it
+                if typename == "User":
+                    continue
+            stack.extend(
+                v for v in reversed(node.values()) if isinstance(v, dict | list)
+            )
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def _models(res, typename: str, build, raw: bool):
+    seen = set()
+    for result in _results(res, typename):
+        if (rest_id := result["rest_id"]) not in seen:
+            seen.add(rest_id)
+            yield build(result, raw)
+
+
+def users(res: dict | list, raw: bool = False) -> Iterator[User]:
+    """Lazily build a User for every distinct user result in scraper output."""
+    return _models(res, "User", User.fromResult, raw)
+
+
+def tweets(res: dict | list, raw: bool = False) -> Iterator[Tweet]:
+    """Lazily build a Tweet for every distinct tweet result in scraper output."""
+    return _models(res, "Tweet", Tweet.fromResult, raw)
+
+
+def cursors(res: dict | list) -> Iterator[Cursor]:
+    """Every cursor entry in scraper output."""
+    stack = [res]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if str(node.get("entryId", "")).startswith("cursor-"):
+                yield Cursor.fromEntry(node)
+                continue
+            stack.extend(
+                v for v in reversed(node.values()) if isinstance(v, dict | list)
+            )
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
@@ -0,0 +1,80 @@
+from dataclasses import dataclass, field
+
+from .util import entry_items, find_key, get_cursor, get_entries, get_instructions
+
+
+@dataclass(slots=True)
+class Page:
+    cursor_top: str = None
+    cursor_bottom: str = None
+    entry_ids: list[str] = field(default_factory=list)  # every entryId, cursors included
+    rest_ids: list[str] = field(default_factory=list)
+    entries: list[dict] = field(default_factory=list)  # entries that are not cursors
+    users: list[dict] = field(default_factory=list)  # user results
+    tweets: list[dict] = field(default_factory=list)  # tweet results
+    pinned: dict = None  # entry of a TimelinePinEntry, also in entries
+
+
+class PageParser:
+    """
+    Parse a timeline page in a single pass over its entries.
+
+    Cursors, entry ids, rest_ids and the user/tweet results all come out of the same
+    walk, instead of one find_key traversal of the whole response per field.
+
+    page = PageParser("Followers").parse(data)
+    page.cursor_bottom, page.rest_ids, page.users
+    """
+
+    def __init__(self, operation: str):
+        self.operation = operation
+
+    def parse(self, data: dict) -> Page:
+        page = Page()
+        entries = get_entries(data, self.operation)
+        if entries is None:
+            # not a timeline, nothing to walk but the whole tree
+            page.rest_ids = find_key(data, "rest_id")
+            page.cursor_bottom = get_cursor(data)
+            return page
+        for instruction in get_instructions(data, self.operation):
+            if instruction.get("type") == "TimelinePinEntry":
+                page.pinned = instruction.get("entry")
+
+        for entry in entries:
+            entry_id = entry.get("entryId", "")
+            page.entry_ids.append(entry_id)
+            content = entry.get("content", {})
+
+            if entry_id.startswith("cursor-") or "cursorType" in content:
+                cursor = content.get("itemContent") or content  # v2 or v1 cursor
+                kind = cursor.get("cursorType", "")
+                if kind == "Top" or entry_id.startswith("cursor-top"):
+                    page.cursor_top = page.cursor_top or cursor.get("value")
+                elif (
+                    kind in ("Bottom", "ShowMoreThreads")
+                    or "cursor-bottom" in entry_id
+                    or "cursor-showmorethreads" in entry_id
+                ):
+                    page.cursor_bottom = page.cursor_bottom or cursor.get("value")
+                continue
+
+            page.entries.append(entry)
+            for item in entry_items(entry):
+                for k, results in (
+                    ("user_results", page.users),
+                    ("tweet_results", page.tweets),
+                ):
+                    if not (result := item.get(k, {}).get("result")):
+                        continue
+                    # TweetWithVisibilityResults wraps the tweet
+                    result = result.get("tweet", result)
+                    if rest_id := result.get("rest_id"):
+                        page.rest_ids.append(rest_id)
+                        results.append(result)
+        return page
+
+
+def get_rest_ids(data: dict, operation: str) -> list:
+    """rest_ids of the users/tweets in a timeline response"""
+    return PageParser(operation).parse(data).rest_ids
@@ -0,0 +1,207 @@
+import random
+import time
+
+from pathlib import Path
+
+from httpx import (
+    AsyncClient,
+    ConnectError,
+    ConnectTimeout,
+    ProxyError,
+    Response,
+)
+from httpx_socks import AsyncProxyTransport
+
+from .clientManager import ClientManager
+
+# the exit itself is unusable, as opposed to the account or the request
+BAN_ERRORS = (ProxyError,)
+# can't reach the proxy, which is also what our own network being down looks like
+CONNECT_ERRORS = (ConnectError, ConnectTimeout)
+BAN_STATUSES = {407}
+
+
+class Proxy:
+    def __init__(self, url: str, socks: bool = False):
+        self.url = url
+        self.socks = socks or url.startswith("socks")
+        self.latency = None  # EWMA, seconds
+        self.success = 1.0  # EWMA of successful responses, new proxies start trusted
+        self.failures = 0  # consecutive ban signals
+        self.banned_until = 0.0
+        self.inflight = 0
+
+    @property
+    def banned(self) -> bool:
+        return time.time() < self.banned_until
+
+    def score(self) -> float:
+        # unknown latency is optimistic so new proxies get tried
+        latency = 0.5 if self.latency is None else self.latency
+        return self.success / (latency + 0.05) / (1 + self.inflight)
+
+    def args(self) -> dict:
+        """AsyncClient arguments for a client going out through this proxy."""
+        if self.socks:
+            return {
+                "transport": AsyncProxyTransport.from_url(self.url, verify=False),
+                "proxy": None,
+            }
+        return {"transport": None, "proxy": self.url}
+
+    def __repr__(self):
+        latency = f"{self.latency:.3f}" if self.latency is not None else None
+        return (
+            f"Proxy({self.url!r}, success={self.success:.2f}, latency={latency}, "
+            f"banned={self.banned})"
+        )
+
+
+class ProxyPool:
+    """Many proxies, each with its own connection pools, scored by health.
+
+    Every proxy tracks an EWMA of its latency and success rate, plus consecutive ban
+    signals (proxy errors, 407, IP level 429s, and connect errors while other proxies
+    are getting through, so a local outage doesn't bench the whole pool). Requests go to the
+    better of two randomly drawn healthy proxies, which spreads load across hundreds
+    of exits while steering away from slow or failing ones. A proxy that keeps
+    failing is benched for `quarantine` seconds.
+
+    Every proxy gets its own connections. AsyncScraper.aclose closes them, when only
+    an AsyncAccount uses the pool call `aclose()` (or use it as an async context
+    manager) when done. A closed pool can be used again, it reconnects on demand.
+
+    async with ProxyPool.fromFile("proxies.txt") as pool:
+        async with AsyncScraper(proxyPool=pool) as scraper:
+            ...
+    """
+
+    def __init__(
+        self,
+        proxies: list[str],
+        httpxSocks: bool = False,
+        alpha: float = 0.2,
+        maxFailures: int = 3,
+        quarantine: float = 5 * 60,
+        **kwargs,
+    ):
+        """Initialize the proxy pool.
+
+        Args:
+            proxies (list[str]): Proxy urls, socks5:// urls always use httpx-socks.
+            httpxSocks (bool, optional): Use httpx-socks transports for every proxy. Defaults to False.
+            alpha (float, optional): EWMA weight of the newest sample. Defaults to 0.2.
+            maxFailures (int, optional): Consecutive ban signals before a proxy is benched. Defaults to 3.
+            quarantine (float, optional): Seconds a benched proxy is left alone. Defaults to 5 minutes.
+            **kwargs: Passed to the ClientManager holding the per proxy clients.
+        """
+        if not proxies:
+            raise ValueError("ProxyPool needs at least one proxy")
+        self.proxies = [Proxy(p, httpxSocks) for p in proxies]
+        self.alpha = alpha
+        self.maxFailures = maxFailures
+        self.quarantine = quarantine
+        self.clients = ClientManager(**kwargs)
+        self.lastSuccess = 0.0  # monotonic time of the last good response on any proxy
+
+    @classmethod
+    def fromFile(cls, path: str, **kwargs) -> "ProxyPool":
+        """One proxy url per line, blank lines and # comments are skipped."""
+        lines = Path(path).read_text().splitlines()
+        return cls(
+            [p for line in lines if (p := line.strip()) and not p.startswith("#")],
+            **kwargs,
+        )
+
+    def __len__(self):
+        return len(self.proxies)
+
+    def pick(self, exclude: Proxy = None) -> Proxy:
+        """Better of two random healthy proxies, the least recently benched if none are healthy."""
+        healthy = [p for p in self.proxies if not p.banned and p is not exclude]
+        if not healthy:
+            return min(self.proxies, key=lambda p: p.banned_until)
+        if len(healthy) == 1:
+            return healthy[0]
+        a, b = random.sample(healthy, 2)
+        return a if a.score() >= b.score() else b
+
+    def client(self, proxy: Proxy, client: AsyncClient) -> AsyncClient:
+        """`client`'s headers and cookie jar, sent through `proxy` on its own connection pool."""
+        name = f"proxy:{proxy.url}"
+        # proxy.args() would build a transport only to have it ignored
+        if (existing := self.clients.cached(name, client)) is not None:
+            return existing
+        return self.clients.get(
+            name,
+            client,
+            headers=client.headers,
+            cookies=client.cookies,
+            **proxy.args(),
+        )
+
+    def report(
+        self,
+        proxy: Proxy,
+        latency: float,
+        r: Response = None,
+        error: Exception = None,
+    ):
+        """Feed the outcome of one request back into the proxy's health."""
+        now = time.monotonic()
+        banned = (
+            isinstance(error, BAN_ERRORS)
+            # only the proxy's fault if another one got through meanwhile
+            or (isinstance(error, CONNECT_ERRORS) and self.lastSuccess > now - latency)
+            or (
+                r is not None
+                and (
+                    r.status_code in BAN_STATUSES
+                    # a 429 without rate limit headers comes from the IP, not the account
+                    or (r.status_code == 429 and "x-rate-limit-reset" not in r.headers)
+                )
+            )
+        )
+        ok = error is None and r is not None and r.status_code < 500 and not banned
+        proxy.success += self.alpha * (ok - proxy.success)
+        if ok:
+            self.lastSuccess = now
+            proxy.failures = 0
+            proxy.latency = (
+                latency
+                if proxy.latency is None
+                else proxy.latency + self.alpha * (latency - proxy.latency)
+            )
+        elif banned:
+            proxy.failures += 1
+            if proxy.failures >= self.maxFailures:
+                proxy.banned_until = time.time() + self.quarantine
+                proxy.failures = 0
+
+    async def send(self, client: AsyncClient, fn, proxy: Proxy = None) -> Response:
+        """Run `fn(proxied_client)` through `proxy`, or the best one, and score it on the outcome."""
+        proxy = proxy or self.pick()
+        proxy.inflight += 1
+        start = time.monotonic()
+        try:
+            r = await fn(self.client(proxy, client))
+        except Exception as e:
+            self.report(proxy, time.monotonic() - start, error=e)
+            raise
+        finally:
+            proxy.inflight -= 1
+        self.report(proxy, time.monotonic() - start, r)
+        return r
+
+    def stats(self) -> list[Proxy]:
+        return sorted(self.proxies, key=lambda p: p.score(), reverse=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the connections of every proxy."""
+        await self.clients.aclose()
@@ -0,0 +1,152 @@
+import asyncio
+import random
+import time
+
+from httpx import AsyncClient, Response
+
+
+def accountKey(session: AsyncClient) -> str | int:
+    """Identify the account behind a session.
+
+    Pooled clients share the cookie jar of the session they were built from,
+    so keying on auth_token lets them share one rate limit budget.
+    """
+    try:
+        if token := session.cookies.get("auth_token") or session.headers.get(
+            "x-guest-token"
+        ):
+            return token
+    except Exception:
+        ...
+    return id(session)
+
+
+class Bucket:
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+        self.next_at = 0.0
+        self.lock = asyncio.Lock()
+        self.known = asyncio.Event()
+        self.changed = asyncio.Event()  # limits arrived or the probe gave up
+        self.probing = False
+
+
+class RateLimiter:
+    """Token bucket scheduler driven by the x-rate-limit-* response headers.
+
+    One bucket is kept per (account, operation name). Every response refills the
+    bucket from the headers, and `acquire()` queues callers once the bucket is empty
+    until the window resets, so requests wait instead of running into 429s.
+
+    The same instance can be shared by AsyncScraper, AsyncAccount and AsyncSearch
+    through the `rateLimiter` keyword argument.
+    """
+
+    def __init__(
+        self,
+        pace: bool = False,
+        margin: int = 0,
+        probe_timeout: float = 30,
+        backoff: float = 60,
+    ):
+        """Initialize the rate limiter.
+
+        Args:
+            pace (bool, optional): Spread the remaining budget evenly over the window instead of bursting. Defaults to False.
+            margin (int, optional): Requests to keep in reserve per window. Defaults to 0.
+            probe_timeout (float, optional): Seconds to wait for the first response of an unknown bucket. Defaults to 30.
+            backoff (float, optional): Seconds to hold a bucket after a 429 without a reset in the future. Defaults to 60.
+        """
+        self.pace = pace
+        self.margin = margin
+        self.probe_timeout = probe_timeout
+        self.backoff = backoff
+        self.buckets = {}
+
+    def bucket(self, session: AsyncClient, operation: str) -> Bucket:
+        key = (accountKey(session), operation)
+        if (bucket := self.buckets.get(key)) is None:
+            bucket = self.buckets[key] = Bucket()
+        return bucket
+
+    def remaining(self, session: AsyncClient, operation: str) -> int | float:
+        """Requests left in the current window, inf if unknown."""
+        bucket = self.bucket(session, operation)
+        if bucket.remaining is None or (bucket.reset and time.time() >= bucket.reset):
+            return bucket.limit or float("inf")
+        return bucket.remaining
+
+    async def acquire(self, session: AsyncClient, operation: str):
+        """Wait until a request for `operation` can be sent on `session`."""
+        bucket = self.bucket(session, operation)
+
+        # only let one request through until we know the limits
+        deadline = time.monotonic() + self.probe_timeout
+        while not bucket.known.is_set():
+            if not bucket.probing:
+                bucket.probing = True
+                bucket.changed.clear()
+                return
+            try:
+                await asyncio.wait_for(
+                    bucket.changed.wait(), max(deadline - time.monotonic(), 0)
+                )
+            except asyncio.TimeoutError:
+                # the probe never reported back, stop holding everyone else up
+                bucket.known.set()
+
+        async with bucket.lock:
+            while True:
+                now = time.time()
+                if bucket.reset and now >= bucket.reset:
+                    bucket.remaining, bucket.reset = bucket.limit, None
+                if bucket.remaining is None or bucket.remaining > self.margin:
+                    break
+                await asyncio.sleep(
+                    max((bucket.reset or now + 60) - now, 0) + random.random()
+                )
+
+            if self.pace and bucket.remaining and bucket.reset:
+                interval = (bucket.reset - now) / bucket.remaining
+                if (wait := bucket.next_at - now) > 0:
+                    await asyncio.sleep(wait)
+                bucket.next_at = max(now, bucket.next_at) + interval
+
+            if bucket.remaining is not None:
+                bucket.remaining -= 1
+
+    def release(self, session: AsyncClient, operation: str):
+        """The request `acquire()` let through failed without a response.
+
+        If it was the probe of an unknown bucket, the next waiting caller becomes the
+        probe instead of everyone waiting out `probe_timeout`.
+        """
+        bucket = self.bucket(session, operation)
+        if not bucket.known.is_set() and bucket.probing:
+            bucket.probing = False
+            bucket.changed.set()
+
+    def update(self, session: AsyncClient, operation: str, r: Response) -> dict:
+        """Refill the bucket from a response, returns the parsed rate limit headers."""
+        bucket = self.bucket(session, operation)
+        limits = {k: int(v) for k, v in r.headers.items() if "rate-limit" in k}
+
+        if (reset := limits.get("x-rate-limit-reset")) is not None:
+            remaining = limits.get("x-rate-limit-remaining", 0)
+            bucket.limit = limits.get("x-rate-limit-limit", bucket.limit)
+            if bucket.reset == reset and bucket.remaining is not None:
+                # responses can arrive out of order, keep the most conservative count
+                remaining = min(remaining, bucket.remaining)
+            bucket.remaining, bucket.reset = remaining, reset
+
+        if r.status_code == 429:
+            bucket.remaining = 0
+            # no reset, or a stale one / clock skew: don't let acquire refill right away
+            if not bucket.reset or bucket.reset <= time.time():
+                bucket.reset = time.time() + self.backoff
+
+        bucket.known.set()
+        bucket.changed.set()
+        return limits
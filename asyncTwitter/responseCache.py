@@ -0,0 +1,140 @@
+import hashlib
+import sqlite3
+import time
+
+from pathlib import Path
+
+import orjson
+from httpx import Request, Response
+
+from .accountPool import LOCKED
+from .constants import CACHE_TTL
+
+
+class ResponseCache:
+    """On-disk cache of GraphQL responses backed by SQLite.
+
+    Responses are keyed by (query id, operation name, variables), the cursor being
+    part of the variables, and stay fresh for the operation's TTL in `CACHE_TTL`.
+    Once the stored bodies grow past `maxSize` the least recently used ones are
+    evicted.
+
+    cache = ResponseCache("data/cache.sqlite", ttl={"Followers": 0})
+    scraper = AsyncScraper(cache=cache)
+    """
+
+    def __init__(
+        self,
+        path: str = "data/cache.sqlite",
+        maxSize: int = 1024 * 1024 * 1024,
+        ttl: dict = None,
+    ):
+        """Initialize the response cache.
+
+        Args:
+            path (str, optional): SQLite database file. Defaults to "data/cache.sqlite".
+            maxSize (int, optional): Bytes of response bodies to keep before evicting. Defaults to 1 GB.
+            ttl (dict, optional): Per operation TTLs in seconds, merged over `CACHE_TTL`. Defaults to None.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.maxSize = maxSize
+        self.ttl = CACHE_TTL | (ttl or {})
+        self.hits = 0
+        self.misses = 0
+        self.db = sqlite3.connect(self.path, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, operation TEXT, url TEXT, body BLOB, "
+            "size INTEGER, expires REAL, accessed REAL)"
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+        )
+        self.size = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def cacheable(self, operation: str) -> bool:
+        return self.ttl.get(operation, 0) > 0
+
+    @staticmethod
+    def key(qid: str, operation: str, variables: dict) -> str:
+        raw = orjson.dumps([qid, operation, variables], option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha1(raw).hexdigest()
+
+    def get(self, key: str) -> Response | None:
+        """Cached response for `key`, None if missing or expired."""
+        row = self.db.execute(
+            "SELECT url, body, expires FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[2] < time.time():
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.db.execute(
+            "UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key)
+        )
+        url, body, _ = row
+        return Response(
+            200,
+            content=body,
+            headers={"content-type": "application/json", "x-cache": "hit"},
+            request=Request("GET", url),
+        )
+
+    def set(self, key: str, operation: str, r: Response):
+        """Store a successful response for the operation's TTL."""
+        body = r.content
+        if r.status_code != 200 or not self.cacheable(operation) or LOCKED in body:
+            return
+        if self.failed(body):
+            return
+        now = time.time()
+        old = self.db.execute(
+            "SELECT size FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        self.db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, operation, str(r.url), body, len(body), now + self.ttl[operation], now),
+        )
+        self.size += len(body) - (old[0] if old else 0)
+        if self.size > self.maxSize:
+            self.evict()
+
+    @staticmethod
+    def failed(body: bytes) -> bool:
+        """A 200 carrying GraphQL errors, e.g. a timeout partway through resolving."""
+        # only parse bodies that could have them
+        if b'"errors"' not in body:
+            return False
+        try:
+            return bool(orjson.loads(body).get("errors"))
+        except (orjson.JSONDecodeError, AttributeError):
+            return True
+
+    def evict(self):
+        """Drop expired responses, then the least recently used until under maxSize."""
+        self.db.execute("DELETE FROM responses WHERE expires < ?", (time.time(),))
+        self.size = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        # evict down to 90% so we don't evict again on the next insert
+        target = self.maxSize * 0.9
+        rows = self.db.execute("SELECT key, size FROM responses ORDER BY accessed")
+        stale = []
+        for key, size in rows:
+            if self.size <= target:
+                break
+            stale.append((key,))
+            self.size -= size
+        self.db.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self):
+        self.db.execute("DELETE FROM responses")
+        self.size = 0
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,123 @@
+import asyncio
+import random
+import time
+
+from email.utils import parsedate_to_datetime
+
+from httpx import ConnectError, ConnectTimeout, PoolTimeout, Response, TransportError
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# errors where the request never reached the server, safe to retry even for writes
+NOT_SENT = (ConnectError, ConnectTimeout, PoolTimeout)
+
+
+class RetryPolicy:
+    """Retry/backoff policy shared by AsyncScraper, AsyncSearch and AsyncAccount.
+
+    - exponential backoff with full jitter, capped at `cap` seconds
+    - waits for Retry-After / x-rate-limit-reset when the server says how long
+    - transport errors and 429/5xx are retried, everything else is returned/raised
+      as is. Non idempotent requests (POSTs) are only retried when they were never
+      sent or were refused with a 429
+    - a retry budget: every request earns `budgetRatio` of a retry, so when a whole
+      backend is down retries stay a small fraction of the traffic instead of
+      multiplying it
+
+    policy = RetryPolicy(retries=5)
+    r = await policy.run(lambda: client.get(url))
+    """
+
+    def __init__(
+        self,
+        retries: int = 3,
+        base: float = 1.0,
+        cap: float = 60.0,
+        maxWait: float = 15 * 60,
+        budgetRatio: float = 0.2,
+        minBudget: int = 10,
+    ):
+        """Initialize the retry policy.
+
+        Args:
+            retries (int, optional): Retries per request. Defaults to 3.
+            base (float, optional): Backoff of the first retry in seconds. Defaults to 1.0.
+            cap (float, optional): Longest jittered backoff in seconds. Defaults to 60.0.
+            maxWait (float, optional): Longest server requested wait that is honored. Defaults to 15 minutes.
+            budgetRatio (float, optional): Retries earned per request. Defaults to 0.2.
+            minBudget (int, optional): Retries available before any are earned, also the budget's cap. Defaults to 10.
+        """
+        self.retries = retries
+        self.base = base
+        self.cap = cap
+        self.maxWait = maxWait
+        self.budgetRatio = budgetRatio
+        self.minBudget = minBudget
+        self.budget = float(minBudget)
+
+    def retryable(self, outcome: Response | Exception, idempotent: bool = True) -> bool:
+        if isinstance(outcome, Exception):
+            if idempotent:
+                return isinstance(outcome, TransportError)
+            return isinstance(outcome, NOT_SENT)
+        if idempotent:
+            return outcome.status_code in RETRY_STATUSES
+        return outcome.status_code == 429
+
+    def delay(self, attempt: int, r: Response = None) -> float:
+        """Seconds to wait before retry number `attempt` (0 based)."""
+        if r is not None and (wait := self.serverDelay(r)) is not None:
+            return min(wait, self.maxWait) + random.random()
+        return random.uniform(0, min(self.cap, self.base * 2**attempt))
+
+    @staticmethod
+    def serverDelay(r: Response) -> float | None:
+        if retry_after := r.headers.get("retry-after"):
+            try:
+                return max(float(retry_after), 0)
+            except ValueError:
+                try:
+                    at = parsedate_to_datetime(retry_after).timestamp()
+                    return max(at - time.time(), 0)
+                except (TypeError, ValueError):
+                    ...
+        if r.status_code == 429 and (reset := r.headers.get("x-rate-limit-reset")):
+            return max(int(reset) - time.time(), 0)
+        return None
+
+    def spend(self) -> bool:
+        """Take one retry from the budget, False if it is exhausted."""
+        if self.budget < 1:
+            return False
+        self.budget -= 1
+        return True
+
+    async def run(self, fn, idempotent: bool = True, logger=None, name: str = ""):
+        """Call `fn()` (a coroutine function) until it succeeds or retries run out.
+
+        Returns the last response, a retryable status is returned once retries are
+        exhausted. Exceptions that aren't retryable, or outlive the retries, propagate.
+        """
+        self.budget = min(self.budget + self.budgetRatio, self.minBudget)
+        for attempt in range(self.retries + 1):
+            try:
+                r = await fn()
+            except Exception as e:
+                if (
+                    attempt == self.retries
+                    or not self.retryable(e, idempotent)
+                    or not self.spend()
+                ):
+                    raise
+                wait, reason = self.delay(attempt), f"{type(e).__name__}: {e}"
+            else:
+                if (
+                    not isinstance(r, Response)
+                    or attempt == self.retries
+                    or not self.retryable(r, idempotent)
+                    or not self.spend()
+                ):
+                    return r
+                wait, reason = self.delay(attempt, r), f"HTTP {r.status_code}"
+            if logger:
+                logger.warning(f"[{name}] {reason}, retrying in {wait:.2f} seconds")
+            await asyncio.sleep(wait)
@@ -0,0 +1,123 @@
+import re
+import sqlite3
+import time
+
+from pathlib import Path
+
+import orjson
+
+from .checkpoints import CheckpointStore
+
+# entries that are items of the timeline, not promoted tweets, modules or cursors
+ITEM_ENTRY = re.compile(r"^(tweet|user|profile-conversation)-")
+
+
+def newest_tweet(known: set) -> int:
+    """Highest tweet id among known entry ids, 0 if there are no tweets."""
+    return max(
+        (int(i[6:]) for i in known if i.startswith("tweet-") and i[6:].isdigit()),
+        default=0,
+    )
+
+
+def unseen(
+    entries: list[dict], known: set, newest: int = 0
+) -> tuple[list[dict], bool]:
+    """(entries whose entryId isn't in `known`, whether any of them was known).
+
+    Tweet ids grow with time, so a tweet not newer than the `newest` known one counts
+    as known too, even if the known ones were deleted since.
+    """
+    new, hit = [], False
+    for entry in entries:
+        entry_id = entry.get("entryId", "")
+        if not ITEM_ENTRY.match(entry_id):
+            continue
+        if entry_id in known or (
+            newest
+            and entry_id.startswith("tweet-")
+            and entry_id[6:].isdigit()
+            and int(entry_id[6:]) <= newest
+        ):
+            hit = True
+        else:
+            new.append(entry)
+    return new, hit
+
+
+class SeenStore:
+    """The newest entry ids seen per query, so a poll can stop at the first known one.
+
+    Timelines and Latest search are newest first: a poll pages only until a page
+    contains an entry it already saw, and only the unseen entries come back. The
+    `keep` newest ids of every query are remembered, in memory or in SQLite if a
+    path is given so monitors survive restarts.
+
+    scraper = AsyncScraper(seen=True)
+    async for query, entries in scraper.aiterNew(Operation.Followers, [user_id]):
+        ...
+    """
+
+    def __init__(self, path: str = None, keep: int = 200):
+        """Initialize the seen store.
+
+        Args:
+            path (str, optional): SQLite database file, None keeps everything in memory. Defaults to None.
+            keep (int, optional): Newest ids remembered per query. Defaults to 200.
+        """
+        self.keep = keep
+        self.heads = {}
+        self.db = None
+        if path:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(path, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                "operation TEXT, key TEXT, ids TEXT, updated REAL, "
+                "PRIMARY KEY (operation, key))"
+            )
+
+    key = staticmethod(CheckpointStore.key)
+
+    def get(self, operation: str, key: str) -> list[str]:
+        """Newest first entry ids of a query, empty if it was never polled."""
+        if (ids := self.heads.get((operation, key))) is not None:
+            return ids
+        ids = []
+        if self.db:
+            row = self.db.execute(
+                "SELECT ids FROM seen WHERE operation = ? AND key = ?",
+                (operation, key),
+            ).fetchone()
+            ids = orjson.loads(row[0]) if row else []
+        self.heads[(operation, key)] = ids
+        return ids
+
+    def add(self, operation: str, key: str, ids: list[str]):
+        """Put newly seen ids (newest first) in front of the query's known ones."""
+        if not ids:
+            return
+        head = (ids + self.get(operation, key))[: self.keep]
+        self.heads[(operation, key)] = head
+        if self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO seen VALUES (?, ?, ?, ?)",
+                (operation, key, orjson.dumps(head).decode(), time.time()),
+            )
+
+    def clear(self, operation: str = None):
+        """Forget the seen ids of one operation, or all of them."""
+        if operation:
+            self.heads = {k: v for k, v in self.heads.items() if k[0] != operation}
+            self.db and self.db.execute(
+                "DELETE FROM seen WHERE operation = ?", (operation,)
+            )
+        else:
+            self.heads.clear()
+            self.db and self.db.execute("DELETE FROM seen")
+
+    def close(self):
+        if self.db:
+            self.db.close()
@@ -0,0 +1,52 @@
+import asyncio
+import hashlib
+
+import orjson
+
+
+class SingleFlight:
+    """Coalesce concurrent identical GraphQL requests into one.
+
+    The first caller of a key sends the request, every caller asking for the same
+    (queryId, variables incl. cursor, features) while it is in flight awaits that
+    same request and gets the same result. Nothing is kept after it completes,
+    repeated requests over time are ResponseCache's job. Share one instance between
+    AsyncScraper, AsyncAccount and AsyncSearch to coalesce across all of them.
+
+    flight = SingleFlight()
+    scraper = AsyncScraper(singleFlight=flight)
+    account = AsyncAccount(singleFlight=flight)
+    """
+
+    def __init__(self):
+        self.inflight = {}
+        self.calls = 0
+        self.shared = 0
+
+    @staticmethod
+    def key(qid: str, variables: dict, features: dict = None) -> str:
+        return hashlib.sha1(
+            orjson.dumps(
+                [qid, variables, features], option=orjson.OPT_SORT_KEYS, default=str
+            )
+        ).hexdigest()
+
+    async def do(self, key: str, fn):
+        """Await `fn()`, or the call already in flight for `key`."""
+        self.calls += 1
+        if (task := self.inflight.get(key)) is None:
+            task = self.inflight[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.shared += 1
+        # one caller giving up must not cancel the request for the others
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        # retrieved here in case every caller was cancelled
+        task.cancelled() or task.exception()
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "shared": self.shared, "inflight": len(self.inflight)}
@@ -0,0 +1,339 @@
+import abc
+import atexit
+import re
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import fields
+from pathlib import Path
+
+import orjson
+
+from .models import Tweet, User, tweets, users
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class Sink(abc.ABC):
+    """Destination for scraped pages.
+
+    Scrapers call `write()` once per page with the operation name, the parsed page
+    (or None) and/or the raw response body, plus the query the page belongs to.
+    Sinks run alongside the JSON dumps of `save=True`, pass save=False to use them
+    instead.
+
+    `write()` must not block. A sink that has too much queued returns a Future
+    instead, the scrapers wait for it (without blocking the event loop) before they
+    go on, its result or error is the sink's own business.
+    """
+
+    @abc.abstractmethod
+    def write(
+        self, name: str, data: dict | list = None, raw: bytes = None, **query
+    ) -> Future | None:
+        ...
+
+    def flush(self):
+        ...
+
+    def close(self):
+        self.flush()
+
+    @staticmethod
+    def parse(data: dict | list, raw: bytes) -> dict | list:
+        return orjson.loads(raw) if data is None else data
+
+
+class JsonSink(Sink):
+    """One json file per page under out/{query values}/, the layout `save_json` writes."""
+
+    def __init__(self, out: str = "data"):
+        self.out = Path(out)
+
+    def write(self, name: str, data: dict | list = None, raw: bytes = None, **query):
+        query.pop("cursor", None)
+        path = self.out / "_".join(map(str, query.values()))
+        path.mkdir(parents=True, exist_ok=True)
+        (path / f"{time.time_ns()}_{name}.json").write_bytes(
+            raw if raw is not None else orjson.dumps(data)
+        )
+
+
+def _arrow_type(tp) -> "pa.DataType":
+    return {int: pa.int64(), bool: pa.bool_()}.get(tp, pa.string())
+
+
+def _schema(model) -> list:
+    return [
+        (f.name, _arrow_type(f.type))
+        for f in fields(model)
+        if f.name not in ("raw", "user", "media")
+    ]
+
+
+def _user_row(user: User) -> dict:
+    row = {f.name: getattr(user, f.name) for f in fields(User)}
+    row.pop("raw")
+    return row
+
+
+def _tweet_row(tweet: Tweet) -> dict:
+    row = {f.name: getattr(tweet, f.name) for f in fields(Tweet)}
+    row.pop("raw")
+    user, media = row.pop("user"), row.pop("media")
+    row["user_id"] = user.rest_id if user else None
+    row["user_screen_name"] = user.screen_name if user else None
+    row["media_types"] = [m.type for m in media]
+    row["media_urls"] = [m.video_url or m.media_url for m in media]
+    return row
+
+
+class ParquetSink(Sink):
+    """Flattened user and tweet rows batched into Parquet row groups.
+
+    Rows are kept per operation and written to out/{operation}_users.parquet and
+    out/{operation}_tweets.parquet once `rowGroupSize` rows are buffered. Pages are
+    parsed and encoded on a background thread, `write()` only queues them, and once
+    `maxPending` pages are queued returns the oldest one for the scraper to wait on.
+    Call `close()` (AsyncScraper.aclose does) to flush the last partial row group.
+
+    Requires pyarrow.
+
+    async with AsyncScraper(save=False, sink=ParquetSink("data/parquet")) as scraper:
+        ...
+    """
+
+    def __init__(
+        self,
+        out: str = "data",
+        rowGroupSize: int = 50_000,
+        maxPending: int = 64,
+        **kwargs,
+    ):
+        """Initialize the Parquet sink.
+
+        Args:
+            out (str, optional): Output directory. Defaults to "data".
+            rowGroupSize (int, optional): Rows buffered per file before a row group is written. Defaults to 50_000.
+            maxPending (int, optional): Pages queued for the encoding thread before write() asks the caller to wait. Defaults to 64.
+            **kwargs: Passed to pyarrow.parquet.ParquetWriter, e.g. compression="zstd".
+        """
+        if pa is None:
+            raise ImportError("ParquetSink requires pyarrow, `pip install pyarrow`")
+        self.out = Path(out)
+        self.out.mkdir(parents=True, exist_ok=True)
+        self.rowGroupSize = rowGroupSize
+        self.options = kwargs
+        self.schemas = {
+            "users": pa.schema(_schema(User)),
+            "tweets": pa.schema(
+                _schema(Tweet)
+                + [
+                    ("user_id", pa.string()),
+                    ("user_screen_name", pa.string()),
+                    ("media_types", pa.list_(pa.string())),
+                    ("media_urls", pa.list_(pa.string())),
+                ]
+            ),
+        }
+        self.buffers = {}  # (operation, kind) -> rows, only touched by the thread
+        self.writers = {}
+        # one thread keeps pages in order and the buffers single threaded
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix="parquet")
+        self.maxPending = maxPending
+        self.pending = deque()
+        self.error = None
+        self.closed = False
+
+    def write(
+        self, name: str, data: dict | list = None, raw: bytes = None, **query
+    ) -> Future | None:
+        self._raise()
+        future = self.executor.submit(self._write, name, data, raw)
+        self.pending.append(future)
+        future.add_done_callback(self._done)
+        # backpressure: the caller waits for the oldest page, not on this thread
+        if len(self.pending) > self.maxPending:
+            try:
+                return self.pending[0]
+            except IndexError:  # the thread caught up in the meantime
+                return None
+
+    def _done(self, future):
+        self.pending.remove(future)
+        if e := future.exception():
+            self.error = e
+
+    def _raise(self):
+        """Surface a failure of the background thread on the caller's next call."""
+        if e := self.error:
+            self.error = None
+            raise e
+
+    def _write(self, name: str, data: dict | list, raw: bytes):
+        data = self.parse(data, raw)
+        for kind, rows in (
+            ("users", map(_user_row, users(data))),
+            ("tweets", map(_tweet_row, tweets(data))),
+        ):
+            buffer = self.buffers.setdefault((name, kind), [])
+            buffer.extend(rows)
+            if len(buffer) >= self.rowGroupSize:
+                self._flush(name, kind)
+
+    def _flush(self, name: str, kind: str):
+        if not (rows := self.buffers.pop((name, kind), None)):
+            return
+        schema = self.schemas[kind]
+        if (writer := self.writers.get((name, kind))) is None:
+            writer = self.writers[(name, kind)] = pq.ParquetWriter(
+                self.out / f"{name}_{kind}.parquet", schema, **self.options
+            )
+        writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+
+    def _flushAll(self):
+        for name, kind in list(self.buffers):
+            self._flush(name, kind)
+
+    def flush(self):
+        """Write everything queued so far, blocks until it is on disk."""
+        self.executor.submit(self._flushAll).result()
+        self._raise()
+
+    def _close(self):
+        self._flushAll()
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.executor.submit(self._close).result()
+        self.executor.shutdown()
+        self._raise()
+
+
+class NdjsonSink(Sink):
+    """Append-only newline delimited json, one stream per operation.
+
+    Each page becomes one line, {"query": {...}, "data": <response>}. The raw response
+    bytes are spliced in as-is, so nothing is parsed or re-serialized. Lines are
+    buffered in memory and a single background thread appends them in large
+    sequential writes, either when `bufferSize` is reached or every `flushInterval`
+    seconds, so the event loop never waits on disk.
+
+    Files are out/{operation}-{part}.ndjson(.zst) and roll over to a new part once
+    they pass `rotateSize`. Reruns keep appending to the last part. A sink that was
+    never closed is closed at interpreter exit, so the last buffer isn't lost.
+    """
+
+    def __init__(
+        self,
+        out: str = "data",
+        bufferSize: int = 8 * 1024 * 1024,
+        flushInterval: float = 5.0,
+        rotateSize: int = 1024 * 1024 * 1024,
+        compress: bool = False,
+        level: int = 3,
+    ):
+        """Initialize the NDJSON sink.
+
+        Args:
+            out (str, optional): Output directory. Defaults to "data".
+            bufferSize (int, optional): Bytes buffered per operation before a write is triggered. Defaults to 8 MB.
+            flushInterval (float, optional): Seconds between background flushes. Defaults to 5.0.
+            rotateSize (int, optional): Bytes per file before rolling over to the next part. Defaults to 1 GB.
+            compress (bool, optional): Write zstd frames, requires zstandard. Defaults to False.
+            level (int, optional): zstd compression level. Defaults to 3.
+        """
+        if compress and zstandard is None:
+            raise ImportError(
+                "NdjsonSink(compress=True) requires zstandard, `pip install zstandard`"
+            )
+        self.out = Path(out)
+        self.out.mkdir(parents=True, exist_ok=True)
+        self.bufferSize = bufferSize
+        self.flushInterval = flushInterval
+        self.rotateSize = rotateSize
+        self.suffix = ".ndjson.zst" if compress else ".ndjson"
+        self.compressor = zstandard.ZstdCompressor(level=level) if compress else None
+        self.buffers = {}  # operation -> bytearray
+        self.parts = {}  # operation -> current part number
+        self.lock = threading.Lock()
+        self.writing = threading.Lock()  # keeps flush() and the thread from interleaving
+        self.wake = threading.Event()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, name: str, data: dict | list = None, raw: bytes = None, **query):
+        if raw is None or b"\n" in raw:
+            raw = orjson.dumps(self.parse(data, raw))
+        line = b'{"query":' + orjson.dumps(query) + b',"data":' + raw + b"}\n"
+        with self.lock:
+            buffer = self.buffers.setdefault(name, bytearray())
+            buffer += line
+            full = len(buffer) >= self.bufferSize
+        if full:
+            self.wake.set()
+
+    def _path(self, name: str) -> Path:
+        if (part := self.parts.get(name)) is None:
+            # continue the last part a previous run left behind
+            pattern = re.compile(rf"{re.escape(name)}-(\d+){re.escape(self.suffix)}$")
+            existing = [
+                int(m.group(1))
+                for p in self.out.iterdir()
+                if (m := pattern.match(p.name))
+            ]
+            part = self.parts[name] = max(existing, default=0)
+        path = self.out / f"{name}-{part:05d}{self.suffix}"
+        if path.exists() and path.stat().st_size >= self.rotateSize:
+            self.parts[name] = part + 1
+            path = self.out / f"{name}-{part + 1:05d}{self.suffix}"
+        return path
+
+    def _drain(self):
+        with self.writing:
+            with self.lock:
+                buffers, self.buffers = self.buffers, {}
+            for name, buffer in buffers.items():
+                chunk = bytes(buffer)
+                if self.compressor:
+                    # concatenated zstd frames decode as a single stream
+                    chunk = self.compressor.compress(chunk)
+                with open(self._path(name), "ab") as f:
+                    f.write(chunk)
+
+    def _run(self):
+        while not self.closed:
+            self.wake.wait(self.flushInterval)
+            self.wake.clear()
+            self._drain()
+
+    def flush(self):
+        """Write everything buffered so far, blocks until it is on disk."""
+        self._drain()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        self.wake.set()
+        self.thread.join()
+        self._drain()
@@ -1,3 +1,4 @@
+import asyncio
 import random
 import re
 import time
@@ -10,7 +11,19 @@ from urllib.parse import urlsplit, urlencode, urlunsplit, parse_qs, quote
 import orjson
 from httpx import Response, AsyncClient
 
-from .constants import GREEN, MAGENTA, RED, RESET, ID_MAP, USER_AGENTS
+from .constants import (
+    GREEN,
+    MAGENTA,
+    RED,
+    RESET,
+    ID_MAP,
+    INSTRUCTION_PATHS,
+    USER_AGENTS,
+)
+from .retry import RetryPolicy
+
+# instruction paths discovered at runtime when INSTRUCTION_PATHS no longer matches
+LEARNED_PATHS = {}
 
 
 def generate_random_string(length):
@@ -74,16 +87,24 @@ def build_params(params: dict) -> dict:
 
 
 def save_json(r: Response, path: Path, name: str, **kwargs):
+    # error pages come back as html/text, they are not json to save as-is
+    if "json" not in r.headers.get("content-type", ""):
+        return
     try:
-        data = r.json()
         kwargs.pop("cursor", None)
         out = path / "_".join(map(str, kwargs.values()))
         out.mkdir(parents=True, exist_ok=True)
-        (out / f"{time.time_ns()}_{name}.json").write_bytes(orjson.dumps(data))
+        # the body is already json, no need to parse and re-serialize it
+        (out / f"{time.time_ns()}_{name}.json").write_bytes(r.content)
     except Exception as e:
         print(f"Failed to save data: {e}")
 
 
+def loads(r: Response, fast: bool = False) -> any:
+    """Parse a json response, with fast=True orjson parses the raw bytes without decoding them to str first"""
+    return orjson.loads(r.content) if fast else r.json()
+
+
 def flatten(seq: list | tuple) -> list:
     flat = []
     for e in seq:
@@ -94,7 +115,7 @@ def flatten(seq: list | tuple) -> list:
     return flat
 
 
-def get_json(res: list[Response], **kwargs) -> list:
+def get_json(res: list[Response], fast: bool = False, **kwargs) -> list:
     cursor = kwargs.get("cursor")
     temp = res
     if any(isinstance(r, (list, tuple)) for r in res):
@@ -102,7 +123,7 @@ def get_json(res: list[Response], **kwargs) -> list:
     results = []
     for r in temp:
         try:
-            data = r.json()
+            data = loads(r, fast)
             if cursor:
                 results.append([data, cursor])
             else:
@@ -128,17 +149,94 @@ def set_qs(url: str, qs: dict, update=False, **kwargs) -> str:
     )
 
 
-def get_cursor(data: list | dict) -> str:
+def get_cursor(data: list | dict, operation: str = None) -> str:
+    if operation and (entries := get_entries(data, operation)) is not None:
+        return bottom_cursor(entries)
     # inefficient, but need to deal with arbitrary schema
     entries = find_key(data, "entries")
     if entries:
-        for entry in entries.pop():
-            entry_id = entry.get("entryId", "")
-            if ("cursor-bottom" in entry_id) or ("cursor-showmorethreads" in entry_id):
-                content = entry["content"]
-                if itemContent := content.get("itemContent"):
-                    return itemContent["value"]  # v2 cursor
-                return content["value"]  # v1 cursor
+        return bottom_cursor(entries.pop())
+
+
+def bottom_cursor(entries: list[dict]) -> str:
+    for entry in entries:
+        entry_id = entry.get("entryId", "")
+        if ("cursor-bottom" in entry_id) or ("cursor-showmorethreads" in entry_id):
+            content = entry["content"]
+            if itemContent := content.get("itemContent"):
+                return itemContent["value"]  # v2 cursor
+            return content["value"]  # v1 cursor
+
+
+def get_path(obj: any, path: tuple) -> any:
+    try:
+        for k in path:
+            obj = obj[k]
+        return obj
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def find_path(obj: any, key: str, path: tuple = ()) -> tuple | None:
+    """Path of keys/indexes to the first non-empty `key` within a nested dict or list"""
+    if isinstance(obj, dict):
+        if obj.get(key):
+            return path + (key,)
+        items = obj.items()
+    elif isinstance(obj, list):
+        items = enumerate(obj)
+    else:
+        return None
+    for k, v in items:
+        if isinstance(v, dict | list) and (found := find_path(v, key, path + (k,))):
+            return found
+    return None
+
+
+def get_instructions(data: dict, operation: str) -> list | None:
+    """
+    Timeline instructions of a response, without walking the whole tree.
+
+    Uses the path declared in INSTRUCTION_PATHS for the operation. If Twitter moved things
+    around, the path is searched for once and remembered for the following pages.
+
+    @param data: response data
+    @param operation: operation name
+    @return: list of instructions, None if the response has none
+    """
+    for path in (LEARNED_PATHS.get(operation), INSTRUCTION_PATHS.get(operation)):
+        if path and isinstance(instructions := get_path(data, path), list):
+            return instructions
+    if path := find_path(data, "instructions"):
+        LEARNED_PATHS[operation] = path
+        return get_path(data, path)
+    return None
+
+
+def get_entries(data: dict, operation: str) -> list[dict] | None:
+    """Timeline entries of a response, None if it has no instructions"""
+    instructions = get_instructions(data, operation)
+    if instructions is None:
+        return None
+    entries = []
+    for instruction in instructions:
+        if e := instruction.get("entries"):
+            entries.extend(e)
+        elif e := instruction.get("entry"):  # TimelineReplaceEntry, TimelinePinEntry
+            entries.append(e)
+    return entries
+
+
+def entry_items(entry: dict) -> list[dict]:
+    """itemContent of a timeline entry, modules hold several"""
+    content = entry.get("content", {})
+    if item := content.get("itemContent"):
+        return [item]
+    return [
+        i["item"]["itemContent"]
+        for i in content.get("items", [])
+        if "itemContent" in i.get("item", {})
+    ]
 
 
 def get_headers(session, **kwargs) -> dict:
@@ -197,27 +295,24 @@ def find_key(obj: any, key: str) -> list:
     @return: list of values
     """
 
-    def helper(obj: any, key: str, L: list) -> list:
-        if not obj:
-            return L
-
+    def helper(obj: any, L: list):
         if isinstance(obj, list):
             for e in obj:
-                L.extend(helper(e, key, []))
-            return L
+                if e and isinstance(e, dict | list):
+                    helper(e, L)
+        elif isinstance(obj, dict):
+            if obj.get(key):
+                L.append(obj[key])
+            for v in obj.values():
+                if v and isinstance(v, dict | list):
+                    helper(v, L)
 
-        if isinstance(obj, dict) and obj.get(key):
-            L.append(obj[key])
+    L = []
+    helper(obj, L)
+    return L
 
-        if isinstance(obj, dict) and obj:
-            for k in obj:
-                L.extend(helper(obj[k], key, []))
-        return L
 
-    return helper(obj, key, [])
-
-
-def log(logger: Logger, resp: Response, *args, **kwargs):
+def log(logger: Logger, resp: Response, *args, level: int = 0, **kwargs):
     # x-rate-limit-reset
     # x-rate-limit-remaining
     # x-rate-limit-limit
@@ -233,6 +328,9 @@ def log(logger: Logger, resp: Response, *args, **kwargs):
     logger.info(
         f"[{resp.status_code}] {resp.url} | Rate limit: {limitRemaining}/{limit} resets in {limitReset}"
     )
+    # only decode the body when it is actually printed
+    if level >= 3:
+        logger.debug(resp.text)
         
     return True
 
@@ -250,7 +348,12 @@ def fmt_status(status: int) -> str:
 
 def get_ids(data: list | dict, operation: tuple) -> set:
     expr = ID_MAP[operation[-1]]
-    return {k for k in find_key(data, "entryId") if re.search(expr, k)}
+    entries = get_entries(data, operation[-1])
+    if entries is None:
+        entry_ids = find_key(data, "entryId")
+    else:
+        entry_ids = (e.get("entryId", "") for e in entries)
+    return {k for k in entry_ids if re.search(expr, k)}
 
 
 def dump(path: str, **kwargs):
@@ -262,24 +365,24 @@ def dump(path: str, **kwargs):
     )
 
 
-def get_code(cls, retries=5) -> str | None:
-    """Get verification code from Proton Mail inbox"""
+def poll_inbox(cls) -> str | None:
+    inbox = cls.inbox()
+    for c in inbox.get("Conversations", []):
+        if c["Senders"][0]["Address"] == "info@twitter.com":
+            exprs = [
+                "Your Twitter confirmation code is (.+)",
+                "(.+) is your Twitter verification code",
+            ]
+            if temp := list(
+                filter(None, (re.search(expr, c["Subject"]) for expr in exprs))
+            ):
+                return temp[0].group(1)
 
-    def poll_inbox():
-        inbox = cls.inbox()
-        for c in inbox.get("Conversations", []):
-            if c["Senders"][0]["Address"] == "info@twitter.com":
-                exprs = [
-                    "Your Twitter confirmation code is (.+)",
-                    "(.+) is your Twitter verification code",
-                ]
-                if temp := list(
-                    filter(None, (re.search(expr, c["Subject"]) for expr in exprs))
-                ):
-                    return temp[0].group(1)
 
+def get_code(cls, retries=5) -> str | None:
+    """Get verification code from Proton Mail inbox"""
     for i in range(retries + 1):
-        if code := poll_inbox():
+        if code := poll_inbox(cls):
             return code
         if i == retries:
             print("Max retries exceeded")
@@ -287,3 +390,18 @@ def get_code(cls, retries=5) -> str | None:
         t = 2**i + random.random()
         print(f'Retrying in {f"{t:.2f}"} seconds')
         time.sleep(t)
+
+
+async def async_get_code(cls, retries=5, policy: RetryPolicy = None) -> str | None:
+    """Get verification code from Proton Mail inbox, waiting without blocking the event loop"""
+    policy = policy or RetryPolicy(retries=retries)
+    for i in range(policy.retries + 1):
+        # the inbox client is synchronous
+        if code := await asyncio.to_thread(poll_inbox, cls):
+            return code
+        if i == policy.retries:
+            print("Max retries exceeded")
+            return
+        t = policy.delay(i)
+        print(f'Retrying in {f"{t:.2f}"} seconds')
+        await asyncio.sleep(t)
@@ -0,0 +1,252 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+
+from dataclasses import dataclass, field
+
+from .asyncScraper import AsyncScraper
+from .constants import Operation
+
+PAGE_SIZE = 20  # entries per timeline page, to estimate what a poll cost
+
+
+@dataclass(slots=True)
+class Target:
+    operation: tuple
+    query: dict
+    interval: float
+    rate: float = None  # new entries per second, EWMA
+    lastPoll: float = None
+    polls: int = 0
+    found: int = 0
+
+
+@dataclass(slots=True)
+class Event:
+    operation: str
+    query: dict
+    entries: list[dict] = field(default_factory=list)  # new entries, newest first
+    time: float = 0.0
+
+
+class Watcher:
+    """Watch many accounts for new tweets/followers from one shared poll scheduler.
+
+    Every target sits in a heap ordered by its next poll time. A target's interval
+    follows its activity: it is set so a poll finds about `targetItems` new entries,
+    using an EWMA of the entries per second seen so far, clamped to
+    [minInterval, maxInterval]. Quiet accounts drift to maxInterval and busy ones
+    are polled often, so the request cost follows activity, not the number of
+    accounts. Polls use `AsyncScraper.aiterNew`, so a poll with nothing new costs
+    one request, and an optional global budget (requests per minute) holds back
+    the whole scheduler when it is spent.
+
+    watcher = Watcher(scraper, budget=300)
+    watcher.watchTweets(user_ids)
+    watcher.watchFollowers([my_id])
+
+    @watcher.on
+    async def handle(event):
+        print(event.operation, event.query, len(event.entries))
+
+    await watcher.run()
+    """
+
+    def __init__(
+        self,
+        scraper: AsyncScraper,
+        minInterval: float = 30,
+        maxInterval: float = 30 * 60,
+        interval: float = 5 * 60,
+        targetItems: float = 5,
+        budget: float = None,
+        workers: int = 20,
+        alpha: float = 0.3,
+        queue: asyncio.Queue = None,
+        emitInitial: bool = False,
+    ):
+        """Initialize the watcher.
+
+        Args:
+            scraper (AsyncScraper): Authenticated scraper the polls run on, its `seen` store remembers what was delivered.
+            minInterval (float, optional): Shortest seconds between polls of one target. Defaults to 30.
+            maxInterval (float, optional): Longest seconds between polls of one target. Defaults to 30 minutes.
+            interval (float, optional): Interval of a target until its activity is known. Defaults to 5 minutes.
+            targetItems (float, optional): New entries a poll should find on average. Defaults to 5.
+            budget (float, optional): Requests per minute for all targets together. Defaults to no budget.
+            workers (int, optional): Polls running at once. Defaults to 20.
+            alpha (float, optional): EWMA weight of the newest activity sample. Defaults to 0.3.
+            queue (asyncio.Queue, optional): Also put every Event on this queue. Defaults to None.
+            emitInitial (bool, optional): Deliver the first page of a target the seen store doesn't know yet as an event, instead of only remembering it. Defaults to False.
+        """
+        self.scraper = scraper
+        self.logger = scraper.logger
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self.interval = interval
+        self.targetItems = targetItems
+        self.budget = budget
+        self.workers = workers
+        self.alpha = alpha
+        self.queue = queue
+        self.emitInitial = emitInitial
+        self.callbacks = []
+        self.targets = {}
+        self.heap = []
+        self.seq = itertools.count()
+        self.tokens = budget or 0.0
+        self.refilled = time.monotonic()
+        self.running = False
+        self.wake = None
+
+    def watch(self, operation: tuple, queries: list, interval: float = None):
+        """Start polling queries of any paginated operation, e.g. Operation.Likes."""
+        keys, qid, name = operation
+        for query in queries:
+            if not isinstance(query, dict):
+                query = {dictKey: query for dictKey in keys}
+            key = (name, self.scraper.seen.key(query))
+            if key in self.targets:
+                continue
+            target = self.targets[key] = Target(
+                operation, query, interval or self.interval
+            )
+            self._schedule(target, 0)
+
+    def watchTweets(self, user_ids: list[int], **kwargs):
+        self.watch(Operation.UserTweets, user_ids, **kwargs)
+
+    def watchFollowers(self, user_ids: list[int], **kwargs):
+        self.watch(Operation.Followers, user_ids, **kwargs)
+
+    def unwatch(self, operation: tuple, queries: list):
+        keys, qid, name = operation
+        for query in queries:
+            if not isinstance(query, dict):
+                query = {dictKey: query for dictKey in keys}
+            # its heap entry is skipped when it comes up
+            self.targets.pop((name, self.scraper.seen.key(query)), None)
+
+    def on(self, callback):
+        """Register an async callback(event), usable as a decorator."""
+        self.callbacks.append(callback)
+        return callback
+
+    def stop(self):
+        self.running = False
+        self.wake and self.wake.set()
+
+    async def run(self):
+        """Poll targets as they come due until `stop()` is called."""
+        self.running = True
+        self.wake = asyncio.Event()
+        sem = asyncio.Semaphore(self.workers)
+        tasks = set()
+        try:
+            while self.running:
+                self.wake.clear()
+                if not self.heap:
+                    await self.wake.wait()
+                    continue
+                due, _, target = self.heap[0]
+                if (delay := due - time.monotonic()) > 0:
+                    # a new target or stop() may need us sooner
+                    try:
+                        await asyncio.wait_for(self.wake.wait(), delay)
+                    except asyncio.TimeoutError:
+                        ...
+                    continue
+                heapq.heappop(self.heap)
+                if self.targets.get(self._key(target)) is not target:
+                    continue
+                await self._spend(1)
+                await sem.acquire()
+                task = asyncio.create_task(self._poll(target))
+                tasks.add(task)
+                task.add_done_callback(lambda t: (tasks.discard(t), sem.release()))
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _key(self, target: Target) -> tuple:
+        return target.operation[-1], self.scraper.seen.key(target.query)
+
+    def _schedule(self, target: Target, delay: float):
+        heapq.heappush(self.heap, (time.monotonic() + delay, next(self.seq), target))
+        # the run loop may be sleeping until a later target
+        self.wake and self.wake.set()
+
+    async def _spend(self, cost: float):
+        """Take `cost` requests from the budget, waiting for it to refill if it is spent."""
+        if not self.budget:
+            return
+        perSecond = self.budget / 60
+        while True:
+            now = time.monotonic()
+            self.tokens = min(
+                self.budget, self.tokens + (now - self.refilled) * perSecond
+            )
+            self.refilled = now
+            if self.tokens >= cost:
+                self.tokens -= cost
+                return
+            await asyncio.sleep((cost - self.tokens) / perSecond)
+
+    async def _poll(self, target: Target):
+        name = target.operation[-1]
+        # nothing seen yet, not the first poll of this run: the store may be persisted
+        initial = not self.scraper.seen.get(name, self.scraper.seen.key(target.query))
+        new = []
+        try:
+            async for _, entries in self.scraper.aiterNew(
+                target.operation, [target.query]
+            ):
+                new.extend(entries)
+        except Exception as e:
+            self.logger.error(f"[{name}] Watch of {target.query} failed: {e}")
+            target.interval = min(self.maxInterval, target.interval * 2)
+            self._schedule(target, target.interval)
+            return
+
+        now = time.monotonic()
+        if target.lastPoll is not None:
+            rate = len(new) / max(now - target.lastPoll, 1e-3)
+            target.rate = (
+                rate
+                if target.rate is None
+                else target.rate + self.alpha * (rate - target.rate)
+            )
+            interval = self.targetItems / target.rate if target.rate else math.inf
+            target.interval = min(max(interval, self.minInterval), self.maxInterval)
+            target.found += len(new)
+        target.lastPoll = now
+        target.polls += 1
+        # every page past the first was paid for too
+        if self.budget and (pages := math.ceil(len(new) / PAGE_SIZE) - 1) > 0:
+            self.tokens -= pages
+        self._schedule(target, target.interval)
+
+        if not new or (initial and not self.emitInitial):
+            return
+        event = Event(name, target.query, new, time.time())
+        if self.queue is not None:
+            await self.queue.put(event)
+        for callback in self.callbacks:
+            try:
+                await callback(event)
+            except Exception as e:
+                self.logger.error(f"[{name}] Watch callback failed: {e}")
+
+    def stats(self) -> dict:
+        targets = list(self.targets.values())
+        return {
+            "targets": len(targets),
+            "polls": sum(t.polls for t in targets),
+            "found": sum(t.found for t in targets),
+            "avg_interval": (
+                sum(t.interval for t in targets) / len(targets) if targets else None
+            ),
+        }
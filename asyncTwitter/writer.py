@@ -0,0 +1,66 @@
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+class Writer:
+    """Runs blocking disk writes on a background thread.
+
+    `submit()` hands a write to the thread and returns right away, so the event loop
+    keeps paginating while data is persisted. At most `maxPending` writes are queued,
+    past that `submit()` waits for the thread to catch up instead of buffering
+    without bound. One worker keeps writes in submission order.
+
+    await writer.submit(path.write_bytes, data)
+    await writer.flush()
+    """
+
+    def __init__(self, maxPending: int = 256, workers: int = 1, logger=None):
+        """Initialize the writer.
+
+        Args:
+            maxPending (int, optional): Writes queued before submit() applies backpressure. Defaults to 256.
+            workers (int, optional): Writer threads. Defaults to 1.
+            logger (optional): Logger for failed writes. Defaults to None.
+        """
+        self.workers = workers
+        self.executor = None
+        self.slots = asyncio.Semaphore(maxPending)
+        self.pending = set()
+        self.logger = logger
+
+    async def submit(self, fn, *args, **kwargs) -> asyncio.Future:
+        """Queue `fn(*args, **kwargs)` on the writer thread."""
+        await self.slots.acquire()
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="writer"
+            )
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, partial(fn, *args, **kwargs)
+        )
+        self.pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future: asyncio.Future):
+        self.pending.discard(future)
+        self.slots.release()
+        if not future.cancelled() and (e := future.exception()):
+            if self.logger:
+                self.logger.error(f"Failed to write data\n{e}")
+            else:
+                print(f"Failed to write data: {e}")
+
+    async def flush(self):
+        """Wait until every queued write is on disk."""
+        while self.pending:
+            await asyncio.wait(list(self.pending))
+
+    async def aclose(self):
+        """Flush and stop the writer thread, it is restarted by the next submit()."""
+        await self.flush()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -9,6 +9,7 @@ from asyncTwitter.asyncAccount import AsyncAccount
 from asyncTwitter.asyncScraper import AsyncScraper
 from asyncTwitter.asyncSearch import AsyncSearch
 from asyncTwitter.asyncUtil import find_key
+from asyncTwitter.constants import Operation
 
 
 async def logAllNewFollowers():
@@ -18,7 +19,8 @@ async def logAllNewFollowers():
     twitterFollowers = mongoClient["twitterFollowers"]
     followers = twitterFollowers["followers"]
 
-    scraper = AsyncScraper(debug=True)
+    # remembers the newest followers, so each poll only pages until a known one
+    scraper = AsyncScraper(debug=True, seen=True)
     account = AsyncAccount(debug=True)
 
 
@@ -46,7 +48,12 @@ async def logAllNewFollowers():
             print("Failed to get restId.")
             exit()
 
-        results = await scraper.asyncFollowers(user_ids=[restId], limit=50)
+        results = [
+            entries
+            async for _, entries in scraper.aiterNew(
+                Operation.Followers, [restId], limit=50
+            )
+        ]
 
         print(json.dumps(results, indent=4), file=open("followers.json", "w"))
 
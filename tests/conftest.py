@@ -0,0 +1,74 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+RATE_HEADERS = {
+    "x-rate-limit-limit": "500",
+    "x-rate-limit-remaining": "499",
+    "x-rate-limit-reset": "9999999999",
+}
+
+
+def session(handler) -> httpx.AsyncClient:
+    """Authenticated-looking session whose requests go to `handler`."""
+    return httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        cookies={"ct0": "a", "auth_token": "b"},
+    )
+
+
+def user_page(ids: list[str], cursor: str = None) -> dict:
+    entries = [
+        {
+            "entryId": f"user-{i}",
+            "content": {
+                "itemContent": {
+                    "user_results": {"result": {"__typename": "User", "rest_id": i}}
+                }
+            },
+        }
+        for i in ids
+    ]
+    if cursor:
+        entries.append(
+            {
+                "entryId": f"cursor-bottom-{cursor}",
+                "content": {"value": cursor, "cursorType": "Bottom"},
+            }
+        )
+    return {
+        "data": {
+            "user": {
+                "result": {
+                    "timeline": {
+                        "timeline": {
+                            "instructions": [
+                                {"type": "TimelineAddEntries", "entries": entries}
+                            ]
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+
+async def scraper(handler, **kwargs):
+    """AsyncScraper whose pooled clients all go to `handler`."""
+    from asyncTwitter.asyncScraper import AsyncScraper
+
+    kwargs = {"save": False, "pbar": False} | kwargs
+    s = AsyncScraper(**kwargs)
+    await s.asyncAuthenticate(session=session(handler))
+    s.proxies = {"transport": httpx.MockTransport(handler), "proxy": None}
+    return s
+
+
+@pytest.fixture
+def run():
+    return asyncio.run
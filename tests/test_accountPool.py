@@ -0,0 +1,70 @@
+import httpx
+
+from asyncTwitter.accountPool import AccountPool
+from asyncTwitter.asyncScraper import AsyncScraper
+from asyncTwitter.asyncSearch import AsyncSearch
+from conftest import RATE_HEADERS, user_page
+
+
+def pooled(handler) -> AccountPool:
+    return AccountPool(
+        [
+            httpx.AsyncClient(
+                transport=httpx.MockTransport(handler),
+                cookies={"ct0": "a", "auth_token": token},
+            )
+            for token in ("A", "B")
+        ]
+    )
+
+
+def test_pages_after_a_lock_move_to_another_account(run):
+    served = []
+
+    def handler(request):
+        account = request.headers["cookie"].split("auth_token=")[1][0]
+        variables = request.url.params["variables"]
+        served.append((account, "cursor" in variables))
+        if account == "A" and "cursor" in variables:
+            return httpx.Response(200, content=b"this account is temporarily locked")
+        n = int(variables.split('"cursor":"c')[1][0]) if "cursor" in variables else 0
+        return httpx.Response(
+            200,
+            json=user_page([f"{n}{i}" for i in range(3)], f"c{n + 1}" if n < 3 else None),
+            headers=RATE_HEADERS,
+        )
+
+    async def main():
+        pool = pooled(handler)
+        s = AsyncScraper(save=False, pbar=False, accountPool=pool)
+        s.proxies = {"transport": httpx.MockTransport(handler), "proxy": None}
+        res = await s.asyncFollowers([1])
+        locked_at = next(i for i, (a, paged) in enumerate(served) if a == "A" and paged)
+        # every page after the lock went to B, none back to the locked A
+        assert all(a == "B" for a, _ in served[locked_at + 1 :]), served
+        assert pool.accounts["A"].locked and len(res) == 4
+        assert all(a.pending == 0 for a in pool.accounts.values())
+        await s.aclose()
+
+    run(main())
+
+
+def test_search_does_not_nest_leases_on_a_locked_account(run):
+    pending = []
+
+    def handler(request):
+        pending.append(sum(a.pending for a in pool.accounts.values()))
+        if "auth_token=A" in request.headers["cookie"]:
+            return httpx.Response(200, content=b"this account is temporarily locked")
+        return httpx.Response(200, json={"data": {}}, headers=RATE_HEADERS)
+
+    async def main():
+        search = AsyncSearch(save=False, accountPool=pool)
+        params = {"variables": {"rawQuery": "q"}, "features": {}}
+        await search.pooledGet(params)
+        assert pending == [1, 1]
+        assert pool.accounts["A"].locked
+        assert all(a.pending == 0 for a in pool.accounts.values())
+
+    pool = pooled(handler)
+    run(main())
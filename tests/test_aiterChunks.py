@@ -0,0 +1,97 @@
+import time
+
+import httpx
+import orjson
+
+from asyncTwitter.constants import Operation
+from asyncTwitter.rateLimiter import RateLimiter
+from asyncTwitter.retry import RetryPolicy
+from conftest import RATE_HEADERS, scraper, user_page
+
+
+def handler_for(sent, failing=()):
+    def handler(request):
+        user_id = orjson.loads(request.url.params["variables"])["userId"]
+        sent.append(user_id)
+        if user_id in failing:
+            headers = RATE_HEADERS | {
+                "x-rate-limit-remaining": "0",
+                "x-rate-limit-reset": str(int(time.time()) - 1),
+            }
+            return httpx.Response(429, headers=headers)
+        return httpx.Response(
+            200,
+            json={"data": {"user": {"result": {"rest_id": str(user_id)}}}},
+            headers=RATE_HEADERS,
+        )
+
+    return handler
+
+
+def test_resume_continues_at_the_query_offset(run, tmp_path):
+    sent = []
+
+    async def main():
+        s = await scraper(handler_for(sent), out=tmp_path)
+        async for _ in s.aiterChunks(Operation.UserByRestId, range(10), chunkSize=4):
+            break  # interrupted while handling the first chunk
+        assert not (tmp_path / "progress").exists() or not any(
+            (tmp_path / "progress").iterdir()
+        )
+        # asking for the next chunk marks the first 4 queries done
+        chunks = s.aiterChunks(Operation.UserByRestId, range(10), chunkSize=4)
+        await anext(chunks)
+        await anext(chunks)
+        await chunks.aclose()
+
+        sent.clear()
+        # a different chunk size resumes at the same query
+        results = [
+            r
+            async for r in s.aiterChunks(
+                Operation.UserByRestId, range(10), chunkSize=3, resume=True
+            )
+        ]
+        assert sorted(sent) == list(range(4, 10)), sent
+        assert len(results) == 2
+        await s.aclose()
+
+    run(main())
+
+
+def test_big_input_fails_instead_of_returning_partial_results(run, tmp_path):
+    sent = []
+
+    async def main():
+        s = await scraper(
+            handler_for(sent, failing={4}),
+            out=tmp_path,
+            retry=RetryPolicy(retries=0),
+            # so the rest of the chunk doesn't wait the 429 out
+            rateLimiter=RateLimiter(backoff=0),
+        )
+        s._chunkSize = lambda: 4
+        assert await s._asyncrun(Operation.UserByRestId, list(range(10))) is False
+        assert 8 not in sent
+        await s.aclose()
+
+    run(main())
+
+
+def test_aiter_methods_yield_the_entries_of_every_page(run):
+    pages = {None: user_page(["1", "2"], "a"), "a": user_page(["3"])}
+
+    def handler(request):
+        cursor = orjson.loads(request.url.params["variables"]).get("cursor")
+        return httpx.Response(200, json=pages[cursor], headers=RATE_HEADERS)
+
+    async def main():
+        s = await scraper(handler)
+        got = [
+            [e["entryId"] for e in entries]
+            async for entries in s.aiterFollowers([1])
+        ]
+        await s.aclose()
+        return got
+
+    assert run(main()) == [["user-1", "user-2"], ["user-3"]]
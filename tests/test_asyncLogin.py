@@ -0,0 +1,23 @@
+from asyncTwitter import asyncLogin
+from test_retry import Inbox
+
+
+def challenge(run, monkeypatch, proton) -> str:
+    sent = []
+
+    async def update(client, key, url, **kwargs):
+        sent.append(kwargs["json"]["subtask_inputs"][0]["enter_text"]["text"])
+        return client
+
+    monkeypatch.setattr(asyncLogin, "asyncUpdateToken", update)
+    client = asyncLogin.AsyncClient()
+    run(asyncLogin.asyncSolveConfirmationChallenge(client, proton=proton))
+    return sent[0]
+
+
+def test_confirmation_code_from_a_function_like_login_py(run, monkeypatch):
+    assert challenge(run, monkeypatch, lambda: "654321") == "654321"
+
+
+def test_confirmation_code_from_a_proton_client(run, monkeypatch):
+    assert challenge(run, monkeypatch, Inbox(1)) == "123456"
@@ -0,0 +1,107 @@
+import asyncio
+import math
+import re
+
+import httpx
+import orjson
+
+from asyncTwitter.asyncSearch import SNOWFLAKE_EPOCH, AsyncSearch, to_timestamp
+from asyncTwitter.retry import RetryPolicy
+from conftest import RATE_HEADERS, session
+from test_sinks import search_page
+
+START = 1_600_000_000  # after the snowflake epoch
+WINDOW = re.compile(r"since:(\S+) until:(\S+)")
+
+
+def tweet_id(ts: float) -> int:
+    return int(ts * 1000 - SNOWFLAKE_EPOCH) << 22
+
+
+def bounds(query: dict) -> tuple[float, float]:
+    since, until = WINDOW.search(query["query"]).groups()
+    return tuple(
+        to_timestamp(t.replace("_UTC", "+00:00").replace("_", "T"))
+        for t in (since, until)
+    )
+
+
+def test_dense_rest_under_two_min_windows_is_paginated_whole(run, tmp_path):
+    searched = []
+
+    async def pages(query, limit, out, **kwargs):
+        lo, hi = bounds(query)
+        searched.append((lo, hi, limit))
+        # always more than the limit, every tweet from the last second of the window
+        count = limit if limit < math.inf else 10
+        yield [{"entryId": f"tweet-{tweet_id(hi - 1) + i}"} for i in range(count)]
+
+    async def main():
+        search = AsyncSearch(save=False)
+        search._aiterPages = pages
+        return await search.asyncSearchWindows(
+            {"query": "python", "category": "Latest"},
+            since=START,
+            until=START + 6 * 60 * 60,
+            windows=1,
+            windowLimit=3,
+            minWindow=60 * 60,
+            out=tmp_path,
+        )
+
+    found = run(main())
+    whole = [(lo, hi) for lo, hi, limit in searched if limit == math.inf]
+    assert whole and all(hi - lo < 2 * 60 * 60 for lo, hi in whole)
+    # nothing is dropped: every rest is searched, and whole ones aren't split again
+    assert all(hi - lo >= 60 * 60 for lo, hi, _ in searched[1:])
+    assert len(searched) < 20
+    assert len(found) == 3 * (len(searched) - len(whole)) + 10 * len(whole)
+
+
+def test_windows_still_running_at_the_limit_are_cancelled_and_awaited(run, tmp_path):
+    cancelled = []
+
+    async def pages(query, limit, out, **kwargs):
+        lo, hi = bounds(query)
+        if lo > START:
+            try:
+                await asyncio.Event().wait()
+            finally:
+                cancelled.append(lo)
+        yield [{"entryId": "tweet-1"}]
+
+    async def main():
+        search = AsyncSearch(save=False)
+        search._aiterPages = pages
+        found = await search.asyncSearchWindows(
+            {"query": "python", "category": "Latest"},
+            since=START,
+            until=START + 4 * 60 * 60,
+            windows=4,
+            limit=1,
+            out=tmp_path,
+        )
+        assert len(found) == 1
+        assert len(cancelled) == 3
+
+    run(main())
+
+
+def test_paginate_keeps_the_pages_before_a_failure(run, tmp_path):
+    def handler(request):
+        variables = orjson.loads(request.url.params["variables"])
+        if variables.get("cursor"):
+            raise httpx.ConnectError("down", request=request)
+        return httpx.Response(
+            200, json=search_page([1, 2, 3], "next"), headers=RATE_HEADERS
+        )
+
+    async def main():
+        search = AsyncSearch(save=False, retry=RetryPolicy(retries=0))
+        search.session = session(handler)
+        results = []
+        query = {"query": "python", "category": "Latest"}
+        res = await search.paginate(query, 100, tmp_path, results)
+        assert len(res) == 3 and results == [res]
+
+    run(main())
@@ -0,0 +1,119 @@
+import sqlite3
+
+import httpx
+import orjson
+import pytest
+
+from asyncTwitter.checkpoints import CheckpointStore
+from asyncTwitter.constants import Operation
+from asyncTwitter.retry import RetryPolicy
+from conftest import RATE_HEADERS, scraper, user_page
+
+
+def paged(sent, fail_at=None):
+    """Followers in pages of 3, cursor c<n> is page n, up to page 4."""
+
+    def handler(request):
+        cursor = orjson.loads(request.url.params["variables"]).get("cursor", "c0")
+        n = int(cursor[1:])
+        sent.append(n)
+        if n == fail_at:
+            raise httpx.ConnectError("down", request=request)
+        ids = [f"{n}{i}" for i in range(3)]
+        return httpx.Response(
+            200, json=user_page(ids, f"c{n + 1}" if n < 4 else None), headers=RATE_HEADERS
+        )
+
+    return handler
+
+
+def test_store_roundtrip(tmp_path):
+    store = CheckpointStore(tmp_path / "checkpoints.sqlite")
+    key = store.key({"userId": 1})
+    assert store.get("Followers", key) is None
+    store.save("Followers", key, {"userId": 1}, "c2", 6)
+    assert store.get("Followers", key) == ("c2", 6, False)
+    store.clear("Followers")
+    assert store.get("Followers", key) is None
+    store.close()
+
+
+def test_resumed_limit_counts_from_the_original_start(run, tmp_path):
+    sent = []
+
+    async def main():
+        retry = RetryPolicy(retries=0)
+        s = await scraper(
+            paged(sent, fail_at=2), out=tmp_path, checkpoints=True, retry=retry
+        )
+        await s.asyncFollowers([1], limit=9)
+        assert sent == [0, 1, 2]
+        state = s.checkpoints.get("Followers", s.checkpoints.key({"userId": 1}))
+        assert state == ("c2", 6, False)
+        await s.aclose()
+
+        sent.clear()
+        s = await scraper(paged(sent), out=tmp_path, retry=retry)
+        await s.asyncFollowers([1], limit=9, resume=True)
+        # 6 were found before, one more page reaches 9
+        assert sent == [2]
+        # the query got through, nothing is left to resume
+        assert s.checkpoints.get("Followers", s.checkpoints.key({"userId": 1})) is None
+        await s.aclose()
+
+    run(main())
+
+
+def test_resume_skips_finished_queries_until_the_run_gets_through(run, tmp_path):
+    sent = []
+
+    def handler(request):
+        user_id = orjson.loads(request.url.params["variables"])["userId"]
+        sent.append(user_id)
+        if user_id == 2 and len(sent) < 3:
+            raise httpx.ConnectError("down", request=request)
+        return httpx.Response(200, json=user_page([f"{user_id}0"]), headers=RATE_HEADERS)
+
+    async def main():
+        retry = RetryPolicy(retries=0)
+        s = await scraper(handler, out=tmp_path, checkpoints=True, retry=retry)
+        await s.asyncFollowers([1, 2])
+        await s.aclose()
+
+        s = await scraper(handler, out=tmp_path, retry=retry)
+        await s.asyncFollowers([1, 2], resume=True)
+        assert sorted(sent) == [1, 2, 2]
+        # done with both, the next resume=True run fetches everything again
+        await s.asyncFollowers([1, 2], resume=True)
+        assert sorted(sent) == [1, 1, 2, 2, 2]
+        await s.aclose()
+
+    run(main())
+
+
+def test_completed_chunked_run_is_not_skipped_by_the_next(run, tmp_path):
+    sent = []
+
+    async def main():
+        s = await scraper(paged(sent), out=tmp_path, checkpoints=True)
+        for _ in range(2):
+            chunks = [
+                c async for c in s.aiterChunks(Operation.Followers, [1, 2], 1, resume=True)
+            ]
+            assert all(chunks)
+        await s.aclose()
+
+    run(main())
+    assert len(sent) == 2 * 2 * 5
+
+
+def test_aclose_closes_the_store(run, tmp_path):
+    async def main():
+        s = await scraper(paged([]), out=tmp_path, checkpoints=True, cache=True)
+        await s.aclose()
+        with pytest.raises(sqlite3.ProgrammingError):
+            s.checkpoints.db.execute("SELECT 1")
+        with pytest.raises(sqlite3.ProgrammingError):
+            s.cache.db.execute("SELECT 1")
+
+    run(main())
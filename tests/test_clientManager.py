@@ -0,0 +1,92 @@
+import httpx
+
+import asyncTwitter.asyncScraper as asyncScraper
+from asyncTwitter.clientManager import ClientManager
+from conftest import RATE_HEADERS, scraper
+
+
+def handler(request):
+    return httpx.Response(200, json={}, headers=RATE_HEADERS)
+
+
+def test_clients_are_reused_per_name_and_session(run):
+    async def main():
+        s = await scraper(handler)
+        assert s._client() is s._client()
+        assert s._client("media") is not s._client()
+        await s.aclose()
+        assert s._client().is_closed is False
+
+    run(main())
+
+
+def test_trends_client_is_cookieless(run):
+    async def main():
+        s = await scraper(handler)
+        assert not s._client("trends", cookies=None).cookies
+        assert s._client().cookies.get("ct0") == "a"
+        await s.aclose()
+
+    run(main())
+
+
+def test_rotated_cookies_reach_the_session_and_its_other_clients(run):
+    def rotating(request):
+        headers = {"set-cookie": "ct0=rotated; Domain=.twitter.com; Path=/"}
+        return httpx.Response(200, headers=headers)
+
+    async def main():
+        session = httpx.AsyncClient()
+        session.cookies.set("ct0", "a", domain=".twitter.com")
+        clients = ClientManager(transport=httpx.MockTransport(rotating))
+        api = clients.get("api", session, cookies=session.cookies)
+        await api.get("https://twitter.com/i/api/1.1/x.json")
+        assert session.cookies.get("ct0") == "rotated"
+        media = clients.get("media", session, cookies=session.cookies)
+        assert media.cookies.get("ct0") == "rotated"
+        assert clients.cached("api", session) is api
+        await clients.aclose()
+        assert clients.cached("api", session) is None
+
+    run(main())
+
+
+def test_csrf_header_follows_the_rotated_ct0(run):
+    tokens = []
+
+    def rotating(request):
+        tokens.append(request.headers["x-csrf-token"])
+        headers = {"set-cookie": f"ct0=t{len(tokens)}; Domain=.twitter.com; Path=/"}
+        return httpx.Response(200, headers=headers)
+
+    async def main():
+        session = httpx.AsyncClient()
+        session.cookies.set("ct0", "t0", domain=".twitter.com")
+        clients = ClientManager(transport=httpx.MockTransport(rotating))
+        options = {"headers": {"x-csrf-token": "t0"}, "cookies": session.cookies}
+        api = clients.get("api", session, **options)
+        await api.get("https://twitter.com/i/api/1.1/x.json")
+        await api.get("https://twitter.com/i/api/1.1/x.json")
+        media = clients.get("media", session, **options)
+        await media.get("https://twitter.com/i/api/1.1/x.json")
+        await clients.aclose()
+
+    run(main())
+    assert tokens == ["t0", "t1", "t2"]
+
+
+def test_cached_client_does_not_rebuild_headers(run, monkeypatch):
+    built = []
+    get_headers = asyncScraper.get_headers
+    monkeypatch.setattr(
+        asyncScraper, "get_headers", lambda s: built.append(s) or get_headers(s)
+    )
+
+    async def main():
+        s = await scraper(handler)
+        for _ in range(3):
+            s._client()
+        await s.aclose()
+
+    run(main())
+    assert len(built) == 1
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+import httpx
+
+from asyncTwitter.concurrency import AdaptiveLimiter, TaskPool
+from asyncTwitter.proxyPool import ProxyPool
+from conftest import RATE_HEADERS, scraper, session
+
+
+def test_map_keeps_input_order_and_the_cap(run):
+    pool = TaskPool({"gql": 3})
+    running = peak = 0
+
+    async def fn(x):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001 * (10 - x))
+        running -= 1
+        return x * 2
+
+    assert run(pool.map("gql", fn, range(10))) == [x * 2 for x in range(10)]
+    assert peak == 3
+
+
+def test_first_error_stops_the_rest(run):
+    pool = TaskPool({"gql": 2})
+    started = []
+
+    async def fn(x):
+        started.append(x)
+        await asyncio.sleep(0)
+        if x == 1:
+            raise ValueError(x)
+        await asyncio.sleep(1)
+
+    with pytest.raises(ValueError):
+        run(pool.map("gql", fn, range(100)))
+    assert len(started) < 10
+
+
+def test_nested_map_of_the_same_class_fails_fast(run):
+    pool = TaskPool({"gql": 2})
+
+    async def outer(x):
+        return await pool.map("gql", asyncio.sleep, [0])
+
+    with pytest.raises(RuntimeError, match="deadlock"):
+        run(asyncio.wait_for(pool.map("gql", outer, range(4)), 5))
+
+
+def test_nested_map_of_another_class_runs(run):
+    pool = TaskPool({"gql": 2, "media": 2})
+
+    async def outer(x):
+        return sum(await pool.map("media", lambda y: asyncio.sleep(0, y), range(x)))
+
+    assert run(pool.map("gql", outer, range(4))) == [0, 0, 1, 3]
+
+
+def test_aimd_grows_while_latency_is_under_target():
+    limiter = AdaptiveLimiter(initial=4, latencyTarget=1.0)
+    for _ in range(40):
+        limiter.record(200, 0.1)
+    assert limiter.limit > 4
+
+
+def test_a_burst_of_overload_backs_off_once_per_round_trip():
+    limiter = AdaptiveLimiter(initial=16)
+    for _ in range(10):
+        limiter.record(429, 1.0)
+    assert limiter.limit == 8
+
+
+def test_latency_backoff_is_also_once_per_round_trip():
+    limiter = AdaptiveLimiter(initial=16, latencyTarget=0.5)
+    for _ in range(50):
+        limiter.record(200, 2.0)
+    assert limiter.limit == 16 * 0.9
+
+
+def test_slots_are_keyed_by_the_proxy_that_served_them(run):
+    def handler(request):
+        return httpx.Response(200, json={"data": {}}, headers=RATE_HEADERS)
+
+    async def main():
+        pool = ProxyPool(["http://p1:1", "http://p2:2"])
+        used = set()
+        pool.client = lambda proxy, client: used.add(proxy.url) or session(handler)
+        s = await scraper(handler, proxyPool=pool, adaptive=True)
+        await s.asyncUsersById(list(range(20)))
+        assert {via for _, via in s.adaptive.limiters} == used
+
+    run(main())
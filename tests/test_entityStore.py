@@ -0,0 +1,29 @@
+from asyncTwitter.entityStore import EntityStore
+
+
+def tweet(result: dict) -> dict:
+    return {"content": {"itemContent": {"tweet_results": {"result": result}}}}
+
+
+def test_tweets_are_merged_by_rest_id():
+    store = EntityStore()
+    first = store.ingest([tweet({"__typename": "Tweet", "rest_id": "1", "a": 1})])
+    second = store.ingest([tweet({"__typename": "Tweet", "rest_id": "1", "b": 2})])
+    stored = store.tweet("1")
+    assert stored == {"__typename": "Tweet", "rest_id": "1", "a": 1, "b": 2}
+    result = second[0]["content"]["itemContent"]["tweet_results"]["result"]
+    assert result is stored and store.stats()["merged"] == 1
+    assert first[0]["content"]["itemContent"]["tweet_results"]["result"] is stored
+
+
+def test_tweet_with_visibility_results_is_stored():
+    store = EntityStore()
+    wrapped = {
+        "__typename": "TweetWithVisibilityResults",
+        "tweet": {"rest_id": "2", "legacy": {"full_text": "hi"}},
+    }
+    data = store.ingest([tweet(wrapped)])
+    assert store.tweet("2")["legacy"] == {"full_text": "hi"}
+    result = data[0]["content"]["itemContent"]["tweet_results"]["result"]
+    assert result["__typename"] == "TweetWithVisibilityResults"
+    assert result["tweet"] is store.tweet("2")
@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+
+from asyncTwitter.accountPool import AccountPool
+from asyncTwitter.asyncScraper import AsyncScraper
+from asyncTwitter.hedge import Hedger
+from conftest import RATE_HEADERS
+
+
+def warmed(delay: float = 0.01) -> Hedger:
+    """Hedger that hedges after `delay` seconds right away."""
+    hedger = Hedger(minSamples=1, minDelay=delay)
+    hedger.record("UserByRestId", delay)
+    return hedger
+
+
+def test_slow_success_beats_a_fast_429(run):
+    async def primary():
+        await asyncio.sleep(0.05)
+        return httpx.Response(200)
+
+    async def backup():
+        return httpx.Response(429)
+
+    r = run(warmed().run("UserByRestId", primary, backup))
+    assert r.status_code == 200
+
+
+def test_both_requests_are_cancelled_with_the_caller(run):
+    started = []
+
+    async def request():
+        task = asyncio.current_task()
+        started.append(task)
+        await asyncio.sleep(10)
+
+    async def main():
+        call = asyncio.create_task(warmed().run("UserByRestId", request, request))
+        while len(started) < 2:
+            await asyncio.sleep(0.005)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert all(task.cancelled() for task in started)
+
+    run(main())
+
+
+def test_primary_is_cancelled_with_the_caller_before_the_hedge(run):
+    started = []
+
+    async def request():
+        started.append(asyncio.current_task())
+        await asyncio.sleep(10)
+
+    async def main():
+        call = asyncio.create_task(warmed(5).run("UserByRestId", request, request))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert len(started) == 1 and started[0].cancelled()
+
+    run(main())
+
+
+def test_hedge_account_is_leased(run):
+    pending = {}
+
+    async def handler(request):
+        token = request.headers["cookie"].split("auth_token=")[1][0]
+        pending[token] = pool.accounts[token].pending
+        if token == "A":
+            await asyncio.sleep(0.1)
+        return httpx.Response(
+            200, json={"data": {"user": {"result": {}}}}, headers=RATE_HEADERS
+        )
+
+    async def main():
+        s = AsyncScraper(save=False, pbar=False, accountPool=pool, hedge=warmed())
+        s.proxies = {"transport": httpx.MockTransport(handler), "proxy": None}
+        pool.accounts["B"].pending = 1  # A serves the primary
+        await s.asyncUsersById([1])
+        pool.accounts["B"].pending -= 1
+        assert pending == {"A": 1, "B": 2}
+        assert all(a.pending == 0 for a in pool.accounts.values())
+        await s.aclose()
+
+    pool = AccountPool(
+        [
+            httpx.AsyncClient(cookies={"ct0": "a", "auth_token": token})
+            for token in ("A", "B")
+        ]
+    )
+    run(main())
@@ -0,0 +1,34 @@
+from asyncTwitter.models import tweets, users
+
+
+def test_tweets_unwraps_tweet_with_visibility_results():
+    data = {
+        "tweet_results": {
+            "result": {
+                "__typename": "TweetWithVisibilityResults",
+                "tweet": {"rest_id": "1", "legacy": {"full_text": "hidden"}},
+            }
+        }
+    }
+    assert [(t.rest_id, t.text) for t in tweets(data)] == [("1", "hidden")]
+
+
+def test_quoted_tweets_inside_a_wrapped_tweet_are_found():
+    data = {
+        "__typename": "TweetWithVisibilityResults",
+        "tweet": {
+            "rest_id": "1",
+            "quoted_status_result": {"result": {"__typename": "Tweet", "rest_id": "2"}},
+        },
+    }
+    assert [t.rest_id for t in tweets(data)] == ["1", "2"]
+
+
+def test_blue_and_legacy_verified_are_separate():
+    data = [
+        {"__typename": "User", "rest_id": "1", "is_blue_verified": True, "legacy": {}},
+        {"__typename": "User", "rest_id": "2", "legacy": {"verified": True}},
+    ]
+    blue, legacy = users(data)
+    assert (blue.verified, blue.is_blue_verified) == (False, True)
+    assert (legacy.verified, legacy.is_blue_verified) == (True, False)
@@ -0,0 +1,35 @@
+from asyncTwitter.pageParser import PageParser, get_rest_ids
+from conftest import user_page
+
+
+def test_one_pass_gives_cursor_ids_and_results():
+    page = PageParser("Followers").parse(user_page(["1", "2"], "next"))
+    assert page.cursor_bottom == "next"
+    assert page.rest_ids == ["1", "2"]
+    assert [u["rest_id"] for u in page.users] == ["1", "2"]
+    assert len(page.entries) == 2 and len(page.entry_ids) == 3
+
+
+def test_get_rest_ids_unwraps_tweets_with_visibility_results():
+    data = user_page([])
+    entries = data["data"]["user"]["result"]["timeline"]["timeline"]
+    entries["instructions"][0]["entries"].append(
+        {
+            "entryId": "tweet-5",
+            "content": {
+                "itemContent": {
+                    "tweet_results": {
+                        "result": {
+                            "__typename": "TweetWithVisibilityResults",
+                            "tweet": {"rest_id": "5"},
+                        }
+                    }
+                }
+            },
+        }
+    )
+    assert get_rest_ids(data, "UserTweets") == ["5"]
+
+
+def test_non_timeline_falls_back_to_the_whole_tree():
+    assert get_rest_ids({"data": {"x": [{"rest_id": "9"}]}}, "UserTweets") == ["9"]
@@ -0,0 +1,58 @@
+import httpx
+
+from asyncTwitter.proxyPool import ProxyPool
+from conftest import RATE_HEADERS, scraper
+
+REQUEST = httpx.Request("GET", "https://twitter.com")
+
+
+def test_a_local_outage_benches_no_proxy():
+    pool = ProxyPool(["http://p1:1", "http://p2:2"], maxFailures=2)
+    for _ in range(5):
+        for proxy in pool.proxies:
+            pool.report(proxy, 0.1, error=httpx.ConnectError("down", request=REQUEST))
+    assert not any(p.banned for p in pool.proxies)
+
+
+def test_connect_errors_bench_a_proxy_while_others_work():
+    pool = ProxyPool(["http://p1:1", "http://p2:2"], maxFailures=2)
+    good, bad = pool.proxies
+    for _ in range(2):
+        pool.report(good, 0.1, httpx.Response(200))
+        pool.report(bad, 0.1, error=httpx.ConnectError("refused", request=REQUEST))
+    assert bad.banned and not good.banned
+
+
+def test_proxy_errors_and_ip_429s_are_ban_signals():
+    pool = ProxyPool(["http://p1:1"], maxFailures=2)
+    (proxy,) = pool.proxies
+    pool.report(proxy, 0.1, error=httpx.ProxyError("bad gateway"))
+    pool.report(proxy, 0.1, httpx.Response(429))
+    assert proxy.banned
+
+
+def test_proxied_clients_share_the_cookie_jar(run):
+    async def main():
+        pool = ProxyPool(["http://p1:1"])
+        session = httpx.AsyncClient(cookies={"ct0": "a", "auth_token": "b"})
+        proxied = pool.client(pool.proxies[0], session)
+        assert pool.client(pool.proxies[0], session) is proxied
+        proxied.cookies.set("ct0", "rotated")
+        assert session.cookies.get("ct0") == "rotated"
+        await pool.aclose()
+
+    run(main())
+
+
+def test_scraper_aclose_closes_the_proxied_clients(run):
+    async def main():
+        s = await scraper(lambda request: httpx.Response(200, headers=RATE_HEADERS))
+        s.proxyPool = pool = ProxyPool(["http://p1:1"])
+        proxied = pool.client(pool.proxies[0], s._client())
+        await s.aclose()
+        assert proxied.is_closed
+        # usable again, it reconnects on demand
+        assert not pool.client(pool.proxies[0], s._client()).is_closed
+        await pool.aclose()
+
+    run(main())
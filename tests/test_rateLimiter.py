@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import httpx
+
+from asyncTwitter.rateLimiter import RateLimiter
+from asyncTwitter.retry import RetryPolicy
+from conftest import RATE_HEADERS, scraper, session, user_page
+
+
+def response(status=200, **headers):
+    return httpx.Response(status, headers=headers)
+
+
+def limits(remaining: int) -> httpx.Response:
+    return httpx.Response(
+        200,
+        headers={
+            "x-rate-limit-limit": "50",
+            "x-rate-limit-remaining": str(remaining),
+            "x-rate-limit-reset": str(int(time.time()) + 900),
+        },
+    )
+
+
+def test_one_probe_per_unknown_bucket(run):
+    async def main():
+        limiter, s = RateLimiter(probe_timeout=5), session(None)
+        await limiter.acquire(s, "Op")
+        waiter = asyncio.create_task(limiter.acquire(s, "Op"))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        limiter.update(s, "Op", limits(49))
+        await asyncio.wait_for(waiter, 1)
+        assert limiter.remaining(s, "Op") == 48
+
+    run(main())
+
+
+def test_failed_probe_hands_over_instead_of_timing_out(run):
+    async def main():
+        limiter, s = RateLimiter(probe_timeout=30), session(None)
+        await limiter.acquire(s, "Op")
+        waiters = [asyncio.create_task(limiter.acquire(s, "Op")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        # the probe's request raised, one waiter becomes the next probe
+        limiter.release(s, "Op")
+        done, pending = await asyncio.wait(waiters, timeout=1)
+        assert len(done) == 1 and len(pending) == 2
+        limiter.update(s, "Op", response())
+        await asyncio.wait_for(asyncio.gather(*pending), 1)
+
+    run(main())
+
+
+def test_429_empties_the_bucket(run):
+    async def main():
+        limiter, s = RateLimiter(), session(None)
+        await limiter.acquire(s, "Op")
+        limiter.update(s, "Op", response(429))
+        assert limiter.remaining(s, "Op") == 0
+        waiter = asyncio.create_task(limiter.acquire(s, "Op"))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        waiter.cancel()
+
+    run(main())
+
+
+def test_429_with_a_stale_reset_still_holds_the_bucket(run):
+    async def main():
+        limiter, s = RateLimiter(backoff=30), session(None)
+        await limiter.acquire(s, "Op")
+        stale = str(int(time.time()) - 5)
+        limiter.update(s, "Op", response(429, **{"x-rate-limit-reset": stale}))
+        waiter = asyncio.create_task(limiter.acquire(s, "Op"))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        waiter.cancel()
+
+    run(main())
+
+
+def test_pagination_gives_up_on_repeated_429s(run):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(200, json=user_page(["1"], "a"), headers=RATE_HEADERS)
+        stale = RATE_HEADERS | {
+            "x-rate-limit-remaining": "0",
+            "x-rate-limit-reset": str(int(time.time()) - 5),
+        }
+        return httpx.Response(429, headers=stale)
+
+    async def main():
+        s = await scraper(
+            handler,
+            retry=RetryPolicy(retries=0),
+            rateLimiter=RateLimiter(backoff=0.01),
+        )
+        await asyncio.wait_for(s.asyncFollowers([1]), 5)
+        await s.aclose()
+
+    run(main())
+    assert len(calls) == 4
+
+
+def test_scraper_releases_the_probe_when_its_request_raises(run):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("down")
+        return httpx.Response(200, json={"data": {}}, headers=RATE_HEADERS)
+
+    async def main():
+        s = await scraper(handler, retry=RetryPolicy(retries=0))
+        start = time.monotonic()
+        await s.asyncUsers(["a", "b", "c"])
+        assert time.monotonic() - start < 5 and len(calls) == 3
+        await s.aclose()
+
+    run(main())
@@ -0,0 +1,35 @@
+import httpx
+import orjson
+
+from asyncTwitter.responseCache import ResponseCache
+
+
+def response(data: dict) -> httpx.Response:
+    return httpx.Response(
+        200, json=data, request=httpx.Request("GET", "https://x.com/i/api/graphql")
+    )
+
+
+def test_hit_after_set(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    cache.set("k", "UserByRestId", response({"data": {"user": {}}}))
+    assert orjson.loads(cache.get("k").content) == {"data": {"user": {}}}
+    assert cache.hits == 1
+
+
+def test_200_with_graphql_errors_is_not_cached(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    cache.set("k", "UserByRestId", response({"errors": [{"message": "Timeout"}]}))
+    assert cache.get("k") is None and cache.size == 0
+
+
+def test_nested_errors_key_does_not_block_caching(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    cache.set("k", "UserByRestId", response({"data": {"errors": []}}))
+    assert cache.get("k") is not None
+
+
+def test_operation_with_zero_ttl_is_not_cached(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl={"UserByRestId": 0})
+    cache.set("k", "UserByRestId", response({"data": {}}))
+    assert cache.get("k") is None
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from asyncTwitter import util
+from asyncTwitter.retry import RetryPolicy
+
+
+def fast(**kwargs) -> RetryPolicy:
+    return RetryPolicy(base=0.001, cap=0.001, **kwargs)
+
+
+def test_retries_5xx_then_returns_the_success(run):
+    statuses = iter([503, 502, 200])
+
+    async def fn():
+        return httpx.Response(next(statuses))
+
+    assert run(fast().run(fn)).status_code == 200
+
+
+def test_retryable_status_comes_back_once_retries_run_out(run):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        return httpx.Response(500)
+
+    assert run(fast(retries=2).run(fn)).status_code == 500
+    assert len(calls) == 3
+
+
+def test_posts_are_only_retried_when_never_sent(run):
+    request = httpx.Request("POST", "https://x.com")
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        raise httpx.ReadTimeout("sent, maybe applied", request=request)
+
+    with pytest.raises(httpx.ReadTimeout):
+        run(fast().run(fn, idempotent=False))
+    assert len(calls) == 1
+
+
+def test_budget_caps_retries_when_everything_fails(run):
+    policy = fast(retries=3, minBudget=2, budgetRatio=0.1)
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        return httpx.Response(503)
+
+    async def main():
+        for _ in range(10):
+            await policy.run(fn)
+
+    run(main())
+    # the 2 retries of the starting budget, the 9 requests after it earn < 1 more
+    assert len(calls) == 10 + 2
+
+
+def test_server_delay_is_honored_and_capped():
+    policy = RetryPolicy(maxWait=5)
+    r = httpx.Response(429, headers={"retry-after": "100"})
+    assert 5 <= policy.delay(0, r) < 6
+    reset = str(int(time.time()) + 3)
+    r = httpx.Response(429, headers={"x-rate-limit-reset": reset})
+    assert 1 < policy.delay(0, r) < 5
+
+
+class Inbox:
+    def __init__(self, polls_until_code: int):
+        self.polls = polls_until_code
+
+    def inbox(self):
+        self.polls -= 1
+        subject = "123456 is your Twitter verification code" if self.polls <= 0 else "hi"
+        sender = {"Address": "info@twitter.com"}
+        return {"Conversations": [{"Senders": [sender], "Subject": subject}]}
+
+
+def test_async_get_code_waits_without_blocking_the_loop(run):
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(1)
+            await asyncio.sleep(0.001)
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        code = await util.async_get_code(Inbox(3), policy=fast(retries=5))
+        task.cancel()
+        return code
+
+    assert run(main()) == "123456"
+    assert ticks
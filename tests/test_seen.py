@@ -0,0 +1,114 @@
+import sqlite3
+
+import httpx
+import orjson
+import pytest
+
+from asyncTwitter.asyncSearch import AsyncSearch
+from asyncTwitter.constants import Operation
+from asyncTwitter.seen import SeenStore, newest_tweet, unseen
+from conftest import RATE_HEADERS, scraper, user_page
+
+
+def pinned(page: dict, user_id: str) -> dict:
+    """`page` with `user_id` pinned on top, like a profile's pinned tweet."""
+    pin = user_page([user_id])["data"]["user"]["result"]["timeline"]["timeline"]
+    entry = pin["instructions"][0]["entries"][0]
+    timeline = page["data"]["user"]["result"]["timeline"]["timeline"]
+    timeline["instructions"].insert(0, {"type": "TimelinePinEntry", "entry": entry})
+    return page
+
+
+def handler_for(pages: dict, sent: list):
+    """Serve `pages[cursor]`, the first page under the cursor None."""
+
+    def handler(request):
+        cursor = orjson.loads(request.url.params["variables"]).get("cursor")
+        sent.append(cursor)
+        return httpx.Response(200, json=pages[cursor], headers=RATE_HEADERS)
+
+    return handler
+
+
+async def poll(s, **kwargs) -> list[str]:
+    return [
+        e["entryId"]
+        async for _, entries in s.aiterNew(Operation.Followers, [1], **kwargs)
+        for e in entries
+    ]
+
+
+def test_a_known_pinned_entry_does_not_end_the_poll(run):
+    sent = []
+    pages = {None: pinned(user_page(["1", "2"], "a"), "p")}
+
+    async def main():
+        s = await scraper(handler_for(pages, sent))
+        assert await poll(s) == ["user-1", "user-2"]
+        pages[None] = pinned(user_page(["3", "4"], "b"), "p")
+        pages["b"] = user_page(["5", "1"], "c")
+        assert await poll(s) == ["user-3", "user-4", "user-5"]
+        await s.aclose()
+
+    run(main())
+    assert sent == [None, None, "b"]
+
+
+def test_first_poll_reads_limit_entries(run):
+    sent = []
+    pages = {
+        None: user_page(["1", "2"], "a"),
+        "a": user_page(["3", "4"], "b"),
+        "b": user_page(["5", "6"], "c"),
+        "c": user_page(["7", "8"], "d"),
+    }
+
+    async def main():
+        s = await scraper(handler_for(pages, sent))
+        assert len(await poll(s, limit=5)) == 6
+        # known ones now, so the limit doesn't apply
+        pages[None] = user_page(["9", "1"], "a")
+        assert await poll(s, limit=5) == ["user-9"]
+        await s.aclose()
+
+    run(main())
+    assert sent == [None, "a", "b", None]
+
+
+def test_poll_whose_known_entries_are_gone_stops_after_max_pages(run):
+    sent = []
+    pages = {None: user_page(["1"], "c1")}
+    for n in range(1, 50):
+        pages[f"c{n}"] = user_page([f"{n}0", f"{n}1"], f"c{n + 1}")
+
+    async def main():
+        s = await scraper(handler_for(pages, sent))
+        await poll(s)
+        # user 1 unfollowed, nothing known comes back any more
+        pages[None] = user_page(["2"], "c1")
+        assert len(await poll(s, maxPages=3)) == 1 + 2 * 2
+        await s.aclose()
+
+    run(main())
+    assert len(sent) == 1 + 3
+
+
+def test_tweets_older_than_the_newest_known_one_count_as_known():
+    entries = [{"entryId": f"tweet-{i}"} for i in (30, 25, 12)]
+    known = {"tweet-20", "tweet-10"}
+    new, hit = unseen(entries, known, newest_tweet(known))
+    assert [e["entryId"] for e in new] == ["tweet-30", "tweet-25"]
+    assert hit
+
+
+def test_aclose_closes_a_persisted_store(run, tmp_path):
+    async def main():
+        s = await scraper(handler_for({}, []), out=tmp_path, seen=True)
+        search = AsyncSearch(save=False, seen=SeenStore(tmp_path / "search.sqlite"))
+        await s.aclose()
+        await search.aclose()
+        for store in (s.seen, search.seen):
+            with pytest.raises(sqlite3.ProgrammingError):
+                store.db.execute("SELECT 1")
+
+    run(main())
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from asyncTwitter.singleFlight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_request(run):
+    flight, calls = SingleFlight(), []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "page"
+
+    async def main():
+        key = flight.key("qid", {"userId": 1, "cursor": "a"})
+        results = await asyncio.gather(*(flight.do(key, fetch) for _ in range(5)))
+        assert results == ["page"] * 5
+        # done requests aren't kept, the next one is sent again
+        await flight.do(key, fetch)
+
+    run(main())
+    assert len(calls) == 2
+    assert flight.stats() == {"calls": 6, "shared": 4, "inflight": 0}
+
+
+def test_failure_reaches_every_caller_and_is_not_kept(run):
+    flight, calls = SingleFlight(), []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("bad page")
+
+    async def main():
+        results = await asyncio.gather(
+            flight.do("k", fetch), flight.do("k", fetch), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+        with pytest.raises(ValueError):
+            await flight.do("k", fetch)
+
+    run(main())
+    assert len(calls) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_others(run):
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "page"
+
+    async def main():
+        first = asyncio.create_task(flight.do("k", fetch))
+        second = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "page"
+        assert first.cancelled()
+
+    run(main())
@@ -0,0 +1,169 @@
+import asyncio
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+from contextlib import aclosing
+from pathlib import Path
+
+import httpx
+import orjson
+import pytest
+
+from asyncTwitter.asyncSearch import AsyncSearch
+from asyncTwitter.sinks import NdjsonSink, Sink
+from conftest import RATE_HEADERS, session
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class Recorder(Sink):
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.pages = []
+        self.flushes = 0
+        self.closed = False
+
+    def write(self, name, data=None, raw=None, **query):
+        if self.fail:
+            raise OSError("disk full")
+        self.pages.append((name, data, query))
+
+    def flush(self):
+        self.flushes += 1
+
+    def close(self):
+        self.closed = True
+
+
+def search_page(ids: list[int], cursor: str) -> dict:
+    entries = [
+        {
+            "entryId": f"tweet-{i}",
+            "content": {
+                "itemContent": {
+                    "tweet_results": {"result": {"__typename": "Tweet", "rest_id": str(i)}}
+                }
+            },
+        }
+        for i in ids
+    ]
+    entries.append(
+        {"entryId": f"cursor-bottom-{cursor}", "content": {"value": cursor}}
+    )
+    instructions = [{"type": "TimelineAddEntries", "entries": entries}]
+    return {
+        "data": {
+            "search_by_raw_query": {
+                "search_timeline": {"timeline": {"instructions": instructions}}
+            }
+        }
+    }
+
+
+def handler(request):
+    return httpx.Response(200, json=search_page([1, 2, 3], "next"), headers=RATE_HEADERS)
+
+
+def test_sink_write_is_abstract():
+    with pytest.raises(TypeError):
+        Sink()
+
+
+def test_ndjson_lines_are_on_disk_after_close(tmp_path):
+    sink = NdjsonSink(tmp_path, flushInterval=60)
+    sink.write("Followers", raw=b'{"data":1}', userId=1)
+    sink.write("Followers", data={"data": 2}, userId=2)
+    sink.close()
+    lines = (tmp_path / "Followers-00000.ndjson").read_bytes().splitlines()
+    assert [orjson.loads(line) for line in lines] == [
+        {"query": {"userId": 1}, "data": {"data": 1}},
+        {"query": {"userId": 2}, "data": {"data": 2}},
+    ]
+
+
+def test_failing_sink_does_not_stop_the_search(run, tmp_path):
+    broken, ok = Recorder(fail=True), Recorder()
+
+    async def main():
+        search = AsyncSearch(save=False, sink=[broken, ok])
+        search.session = session(handler)
+        query = {"query": "python", "category": "Latest"}
+        async with aclosing(search.aiterSearch([query], out=tmp_path)) as pages:
+            async for entries in pages:
+                break
+        assert len(entries) == 3 and len(ok.pages) == 1
+        # flushed although the caller stopped early
+        assert ok.flushes == 1
+        async with search:
+            ...
+        assert broken.closed and ok.closed
+
+    run(main())
+
+
+def test_parquet_encoding_errors_surface_on_the_next_call(tmp_path):
+    pytest.importorskip("pyarrow")
+    from asyncTwitter.sinks import ParquetSink
+
+    sink = ParquetSink(tmp_path)
+    sink.write("Followers", raw=b"not json")
+    with pytest.raises(orjson.JSONDecodeError):
+        sink.flush()
+    sink.close()
+
+
+def test_ndjson_sink_left_open_is_written_at_exit(tmp_path):
+    code = (
+        "from asyncTwitter.sinks import NdjsonSink\n"
+        f"NdjsonSink({str(tmp_path)!r}, flushInterval=60).write('Likes', raw=b'1')\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT)
+    assert (tmp_path / "Likes-00000.ndjson").read_bytes() == b'{"query":{},"data":1}\n'
+
+
+class Behind(Recorder):
+    """Sink with a backlog, every write asks the caller to wait for `backlog`."""
+
+    def __init__(self):
+        super().__init__()
+        self.backlog = Future()
+
+    def write(self, name, data=None, raw=None, **query):
+        super().write(name, data, raw, **query)
+        return self.backlog
+
+
+def test_sink_backlog_holds_the_request_not_the_event_loop(run, tmp_path):
+    sink = Behind()
+
+    async def main():
+        search = AsyncSearch(save=False, sink=sink)
+        search.session = session(handler)
+        query = {"query": "python", "category": "Latest"}
+        async with aclosing(search.aiterSearch([query], out=tmp_path)) as pages:
+            page = asyncio.ensure_future(anext(pages))
+            # the loop keeps running while the page waits for the sink
+            await asyncio.sleep(0.05)
+            assert sink.pages and not page.done()
+            sink.backlog.set_result(None)
+            assert len(await asyncio.wait_for(page, 1)) == 3
+
+    run(main())
+
+
+def test_parquet_write_returns_the_backlog_instead_of_blocking(tmp_path):
+    pytest.importorskip("pyarrow")
+    from asyncTwitter.sinks import ParquetSink
+
+    sink = ParquetSink(tmp_path, maxPending=2)
+    gate = threading.Event()
+    sink.executor.submit(gate.wait)  # hold the encoding thread
+    page = b'{"data": {}}'
+    assert sink.write("Followers", raw=page) is None
+    assert sink.write("Followers", raw=page) is None
+    backlog = sink.write("Followers", raw=page)
+    assert backlog is not None and not backlog.done()
+    gate.set()
+    backlog.result(timeout=5)
+    sink.close()
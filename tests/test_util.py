@@ -0,0 +1,28 @@
+import logging
+
+import httpx
+
+from asyncTwitter.util import log, save_json
+
+
+def test_save_json_writes_the_raw_body(tmp_path):
+    r = httpx.Response(200, json={"data": {}})
+    save_json(r, tmp_path, "UserTweets", userId=1)
+    (saved,) = (tmp_path / "1").iterdir()
+    assert saved.read_bytes() == r.content
+
+
+def test_save_json_skips_bodies_that_are_not_json(tmp_path):
+    r = httpx.Response(200, html="<html>this account is temporarily locked</html>")
+    save_json(r, tmp_path, "UserTweets", userId=1)
+    assert not (tmp_path / "1").exists()
+
+
+def test_log_prints_the_body_only_from_level_3(caplog):
+    logger = logging.getLogger("test_util")
+    r = httpx.Response(200, text="body", request=httpx.Request("GET", "https://x.com"))
+    with caplog.at_level(logging.DEBUG, logger="test_util"):
+        log(logger, r, level=2)
+        assert "body" not in caplog.text
+        log(logger, r, level=3)
+        assert "body" in caplog.text
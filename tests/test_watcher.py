@@ -0,0 +1,72 @@
+import asyncio
+
+import httpx
+
+from asyncTwitter.retry import RetryPolicy
+from asyncTwitter.seen import SeenStore
+from asyncTwitter.watcher import Watcher
+from conftest import RATE_HEADERS, scraper, user_page
+
+
+def serving(pages: list):
+    def handler(request):
+        return httpx.Response(200, json=pages[0], headers=RATE_HEADERS)
+
+    return handler
+
+
+async def polled(watcher: Watcher, events: list) -> list:
+    (target,) = watcher.targets.values()
+    await watcher._poll(target)
+    return [e["entryId"] for event in events for e in event.entries]
+
+
+def test_new_target_is_remembered_then_new_entries_are_events(run):
+    pages = [user_page(["1", "2"])]
+
+    async def main():
+        s = await scraper(serving(pages))
+        watcher, events = Watcher(s), []
+        watcher.on(lambda event: asyncio.sleep(0, events.append(event)))
+        watcher.watchFollowers([1])
+        assert await polled(watcher, events) == []
+        pages[0] = user_page(["3", "1"])
+        assert await polled(watcher, events) == ["user-3"]
+        await s.aclose()
+
+    run(main())
+
+
+def test_restart_with_a_persisted_seen_store_emits_the_first_poll(run, tmp_path):
+    seen = SeenStore(tmp_path / "seen.sqlite")
+    seen.add("Followers", seen.key({"userId": 1}), ["user-1"])
+    seen.close()
+
+    async def main():
+        s = await scraper(
+            serving([user_page(["2", "1"])]), seen=SeenStore(tmp_path / "seen.sqlite")
+        )
+        watcher, events = Watcher(s), []
+        watcher.on(lambda event: asyncio.sleep(0, events.append(event)))
+        watcher.watchFollowers([1])
+        assert await polled(watcher, events) == ["user-2"]
+        await s.aclose()
+
+    run(main())
+
+
+def test_failed_poll_backs_off_without_an_event(run):
+    def failing(request):
+        raise httpx.ConnectError("down")
+
+    async def main():
+        s = await scraper(failing, retry=RetryPolicy(retries=0))
+        watcher, events = Watcher(s, interval=60, maxInterval=100), []
+        watcher.on(lambda event: asyncio.sleep(0, events.append(event)))
+        watcher.watchFollowers([1])
+        (target,) = watcher.targets.values()
+        assert await polled(watcher, events) == []
+        assert target.interval == 100 and target.polls == 0
+        await s.aclose()
+
+    run(main())